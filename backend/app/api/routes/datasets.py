@@ -1,8 +1,13 @@
 """Dataset management API routes"""
+import asyncio
+import shutil
+import uuid
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel
 from typing import List, Optional
 from app.core.database import db_manager
+from app.services.import_jobs import import_jobs
+from app.services.result_cache import invalidate_dataset_results
 from app.utils.csv_importer import CSVImporter
 
 
@@ -77,28 +82,43 @@ async def upload_csv(
     user_id: str,
     dataset_id: str,
     file: UploadFile = File(...),
-    table_name: Optional[str] = Form(None)
+    table_name: Optional[str] = Form(None),
+    background: bool = Form(False),
+    mode: str = Form("replace")
 ):
     """
     Upload CSV file to a dataset
     
-    Creates or replaces a table in the dataset with the CSV data
+    Creates or replaces a table in the dataset with the CSV data, or with
+    ``mode=append`` adds the rows to an existing table. With
+    ``background=true`` the import runs as a job and the response carries a
+    ``job_id`` to poll at ``GET /imports/{job_id}``.
     """
+    table_name = table_name or file.filename.replace('.csv', '').replace('.CSV', '')
+    
+    if mode not in ("replace", "append"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode '{mode}' (expected 'replace' or 'append')"
+        )
+    
+    if background:
+        return await _submit_import_job(user_id, dataset_id, file, table_name, mode)
+    
     try:
         # Ensure dataset exists
         await db_manager.create_database(user_id, dataset_id)
-        engine = await db_manager.get_engine(user_id, dataset_id)
-        
-        # Read file content
-        contents = await file.read()
+        engine = await db_manager.get_writer_engine(user_id, dataset_id)
         
-        # Import CSV
-        result = await CSVImporter.import_csv(
+        # Stream the spooled upload straight into SQLite in chunks
+        result = await CSVImporter.import_csv_stream(
             engine,
-            contents,
-            table_name=table_name or file.filename.replace('.csv', '').replace('.CSV', ''),
-            encoding='utf-8'
+            file.file,
+            table_name=table_name,
+            encoding='utf-8',
+            mode=mode
         )
+        invalidate_dataset_results(user_id, dataset_id)
         
         return {
             "success": True,
@@ -115,13 +135,78 @@ async def upload_csv(
         )
 
 
+async def _submit_import_job(
+    user_id: str,
+    dataset_id: str,
+    file: UploadFile,
+    table_name: str,
+    mode: str
+):
+    """Save the upload next to the dataset and queue a background import"""
+    # The request's spooled file is closed once the response is sent,
+    # so the job gets its own copy on disk.
+    db_path = db_manager.get_database_path(user_id, dataset_id)
+    csv_path = db_path.with_name(f".{dataset_id}.{uuid.uuid4().hex}.upload")
+    
+    def save_upload() -> int:
+        file.file.seek(0)
+        with open(csv_path, "wb") as out:
+            shutil.copyfileobj(file.file, out, length=1024 * 1024)
+        return csv_path.stat().st_size
+    
+    try:
+        loop = asyncio.get_event_loop()
+        total_bytes = await loop.run_in_executor(None, save_upload)
+    except Exception as e:
+        csv_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to upload CSV: {str(e)}"
+        )
+    
+    job = import_jobs.submit(
+        user_id,
+        dataset_id,
+        csv_path,
+        table_name=table_name,
+        total_bytes=total_bytes,
+        mode=mode,
+    )
+    return {
+        "success": True,
+        "message": "Import queued",
+        "job_id": job.job_id,
+        "status": job.status,
+    }
+
+
+@router.get("/imports/{job_id}")
+async def get_import_job(job_id: str):
+    """Get progress of a background CSV import"""
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Import job '{job_id}' not found"
+        )
+    return job.to_dict()
+
+
 @router.delete("/datasets/{user_id}/{dataset_id}")
 async def delete_dataset(user_id: str, dataset_id: str):
     """Delete a dataset"""
     try:
         db_path = db_manager.get_database_path(user_id, dataset_id)
         if db_path.exists():
+            await db_manager.release_engine(user_id, dataset_id)
             db_path.unlink()
+            # WAL-mode databases leave -wal/-shm sidecar files behind
+            for suffix in ("-wal", "-shm"):
+                sidecar = db_path.with_name(db_path.name + suffix)
+                if sidecar.exists():
+                    sidecar.unlink()
+            db_manager.invalidate_schema(user_id, dataset_id)
+            invalidate_dataset_results(user_id, dataset_id)
             return {"deleted": True, "message": f"Dataset '{dataset_id}' deleted"}
         else:
             raise HTTPException(
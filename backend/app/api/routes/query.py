@@ -1,14 +1,27 @@
 """Query API routes"""
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+import asyncio
+import uuid
+from functools import partial
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from pydantic_core import to_json
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Literal, Tuple, Union
+import numpy as np
 from app.services.query_service import QueryService
 from app.services.data_analysis_service import DataAnalysisService
 from app.services.viz_service import VisualizationService
 from app.services.analysis_service import AnalysisService
-from app.services import playbooks
+from app.services import playbooks, sql_playbooks
 import pandas as pd
+from app.config import settings
 from app.core.database import db_manager
+from app.core.executor import cpu_executor
+from app.services.analysis_service import INSIGHTS_PREVIEW_ROWS
+from app.services.result_cache import result_cache, result_cache_key
+from app.utils.cache import TTLCache
+from app.utils.column_stats import CrossMoments
+from app.utils.task_graph import TaskGraph
 
 
 router = APIRouter()
@@ -18,48 +31,476 @@ data_analysis_service = DataAnalysisService()
 viz_service = VisualizationService()
 analysis_service = AnalysisService()
 
+# Row sets behind result cursors, by result id: aggregated rows (a list of
+# row dicts) are kept as they are; table rows are kept as the statement that
+# fetched them (see ``_table_rows_source``) and re-read a page at a time, so a
+# cursor never pins a whole table in memory
+result_pages = TTLCache(
+    max_entries=settings.result_pages_max_entries,
+    ttl_seconds=settings.result_pages_ttl_seconds,
+)
+
+# Rows returned with a query / result page: a DataFrame (full-table path) or
+# row dicts (SQL aggregate path)
+Rows = Union[pd.DataFrame, List[Dict[str, Any]]]
+
 
 class QueryRequest(BaseModel):
     """Query request model"""
     user_id: str
     dataset_id: str
     query: str
+    # Raw rows in the response: none (default), the first page plus a cursor
+    # for the rest, or an evenly spaced sample
+    results_mode: Literal["none", "page", "sample"] = "none"
+    page_size: int = Field(100, ge=1, le=settings.results_max_page_size)
+    # Embed the full feature correlation matrix in correlation charts' metadata
+    include_correlation_matrix: bool = False
 
 
 class QueryResponse(BaseModel):
     """Query response model"""
-    sql: str
-    results: List[Dict[str, Any]]
+    # Statement behind the returned rows (None when there are no rows to page)
+    sql: Optional[str] = None
+    results: List[Dict[str, Any]] = []
+    # Rows in the queried table (not the number of aggregated rows returned)
+    total_rows: int = 0
+    next_cursor: Optional[str] = None
     visualization: Dict[str, Any]
     extra_visualizations: Optional[List[Dict[str, Any]]] = None
     analysis: Dict[str, Any]
     data_structure: Dict[str, Any]
 
 
+class ResultPage(BaseModel):
+    """One page of a query's rows"""
+    results: List[Dict[str, Any]]
+    total_rows: int
+    next_cursor: Optional[str] = None
+
+
+def _frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a fetched DataFrame to JSON-safe row dicts (missing values as None)"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def _page_rows(rows: Rows, offset: int, limit: int) -> List[Dict[str, Any]]:
+    """Row dicts for rows[offset:offset + limit]"""
+    if isinstance(rows, pd.DataFrame):
+        return _frame_to_records(rows.iloc[offset:offset + limit])
+    return rows[offset:offset + limit]
+
+
+def _sample_rows(rows: Rows, size: int) -> List[Dict[str, Any]]:
+    """Up to `size` evenly spaced row dicts, first and last row included"""
+    if len(rows) <= size:
+        return _page_rows(rows, 0, size)
+    positions = np.unique(np.linspace(0, len(rows) - 1, size).astype(int))
+    if isinstance(rows, pd.DataFrame):
+        return _frame_to_records(rows.iloc[positions])
+    return [rows[i] for i in positions]
+
+
+def _table_rows_source(
+    request: QueryRequest,
+    sql: str,
+    table: Dict[str, Any],
+    data_version: Tuple[int, ...],
+    row_count: int,
+) -> Dict[str, Any]:
+    """Where a query's table rows come from, for re-reading pages of them later"""
+    return {
+        "user_id": request.user_id,
+        "dataset_id": request.dataset_id,
+        "sql": sql,
+        "column_types": {col["name"]: col.get("type") for col in table.get("columns", [])},
+        "data_version": data_version,
+        "row_count": row_count,
+    }
+
+
+async def _table_page(source: Dict[str, Any], offset: int, limit: int) -> List[Dict[str, Any]]:
+    """Row dicts for rows[offset:offset + limit] of a table rows source"""
+    df = await db_manager.execute_frame(
+        source["user_id"],
+        source["dataset_id"],
+        f"SELECT * FROM ({source['sql']}) LIMIT :limit OFFSET :offset",
+        column_types=source["column_types"],
+        params={"limit": limit, "offset": offset},
+    )
+    return await cpu_executor.run(_frame_to_records, df)
+
+
+async def _results_payload(
+    rows: Optional[Rows],
+    source: Optional[Dict[str, Any]],
+    results_mode: str,
+    page_size: int,
+    total_rows: int,
+) -> Dict[str, Any]:
+    """
+    The rows to send back for a query, per the request's results mode
+
+    In "page" mode a longer row set gets a cursor to its next page, kept in
+    ``result_pages``. Table rows come with their ``source``; ``rows`` may then
+    be None (a cached result) and in "page" mode the first page is read from
+    the source. ``total_rows`` is the number of rows in the queried table,
+    which on the SQL aggregate path is not the number of (aggregated) rows
+    returned.
+    """
+    results: List[Dict[str, Any]] = []
+    next_cursor = None
+    if results_mode == "sample":
+        results = _sample_rows(rows, page_size)
+    elif results_mode == "page":
+        if rows is None:
+            results = await _table_page(source, 0, page_size)
+        else:
+            results = _page_rows(rows, 0, page_size)
+        row_count = source["row_count"] if source is not None else len(rows)
+        if row_count > page_size:
+            result_id = uuid.uuid4().hex
+            result_pages.set(result_id, source if source is not None else rows)
+            next_cursor = f"{result_id}:{page_size}"
+    return {"results": results, "total_rows": total_rows, "next_cursor": next_cursor}
+
+
+def _filter_frame(
+    df: pd.DataFrame,
+    filter_segment: Optional[Dict[str, Any]],
+    focus_range: Optional[Dict[str, Any]],
+) -> pd.DataFrame:
+    """Apply the planner's segment filter and focus range to a DataFrame"""
+    # Apply segment filter if provided (equality filter only for now)
+    if isinstance(filter_segment, dict):
+        col = filter_segment.get("column")
+        value = filter_segment.get("value")
+        if col in df.columns:
+            try:
+                df = df[df[col] == value]
+            except Exception:
+                # If filtering fails, keep original df
+                pass
+
+    # Apply focus range for a numeric feature if provided
+    if isinstance(focus_range, dict):
+        fr_feature = focus_range.get("feature")
+        fr_min = focus_range.get("min")
+        fr_max = focus_range.get("max")
+        if fr_feature in df.columns and isinstance(fr_min, (int, float)) and isinstance(fr_max, (int, float)):
+            try:
+                series = pd.to_numeric(df[fr_feature], errors="coerce")
+                mask = series.between(fr_min, fr_max)
+                df = df[mask]
+            except Exception:
+                pass
+
+    return df
+
+
+def _sql_playbook_slots(
+    playbook_name: str,
+    target: Optional[str],
+    feature: Optional[str],
+    segment_column: Optional[str],
+    bins: Optional[int],
+) -> Dict[str, Any]:
+    """Map planner slots onto SQL playbook arguments (same defaults as the pandas path)"""
+    if playbook_name == "distribution":
+        return {"feature": feature, "bins": bins or 10}
+    if playbook_name == "outcome_breakdown":
+        return {"outcome": target or "Outcome"}
+    if playbook_name == "segment_comparison":
+        return {"segment_column": segment_column, "outcome": target}
+    return {"feature": feature, "segment_column": segment_column}
+
+
+def _frame_playbook(
+    playbook_name: str,
+    df: pd.DataFrame,
+    target: Optional[str],
+    feature: Optional[str],
+    segment_column: Optional[str],
+    feature_x: Optional[str],
+    feature_y: Optional[str],
+    top_n: Optional[int],
+    bins: Optional[int],
+    include_correlation_matrix: bool = False,
+    moments: Optional[CrossMoments] = None,
+    column_stats: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[Callable[[], Dict[str, Any]]]:
+    """
+    Bind a DataFrame playbook to its planner slots
+
+    Correlation playbooks also get the table's stored cross moments, and
+    distribution and segment playbooks its stored column statistics; they
+    use them only when they still describe ``df`` (same row count).
+
+    Returns:
+        A no-argument callable running the playbook, or None for any other
+        playbook name (the primary playbook falls back to the overview)
+    """
+    if playbook_name == "correlation":
+        return partial(
+            playbooks.correlation_playbook,
+            df,
+            outcome=target or "Outcome",
+            top_n=top_n or 5,
+            include_matrix=include_correlation_matrix,
+            moments=moments,
+        )
+    if playbook_name == "distribution":
+        # Fallbacks are handled inside the playbook if feature is None or invalid
+        return partial(
+            playbooks.distribution_playbook, df, feature=feature, bins=bins or 10, column_stats=column_stats
+        )
+    if playbook_name == "segmented_distribution":
+        return partial(
+            playbooks.segmented_distribution_playbook,
+            df,
+            feature=feature,
+            segment_column=segment_column,
+            column_stats=column_stats,
+        )
+    if playbook_name == "segment_comparison":
+        # Outcome is optional; playbook will fall back to row counts if not usable
+        return partial(
+            playbooks.segment_comparison_playbook,
+            df,
+            segment_column=segment_column,
+            outcome=target,
+            column_stats=column_stats,
+        )
+    if playbook_name == "outcome_breakdown":
+        return partial(playbooks.outcome_breakdown_playbook, df, outcome=target or "Outcome")
+    if playbook_name == "feature_outcome_profile":
+        return partial(
+            playbooks.feature_outcome_profile_playbook,
+            df,
+            feature=feature,
+            outcome=target or "Outcome",
+            bins=bins or 8,
+        )
+    if playbook_name == "relationship":
+        return partial(
+            playbooks.relationship_playbook,
+            df,
+            feature_x=feature_x,
+            feature_y=feature_y,
+            max_points=settings.scatter_max_points,
+            moments=moments,
+        )
+    return None
+
+
+def _sse(event: str, data: Any) -> bytes:
+    """Format one Server-Sent Event (JSON payload, NaN/inf as null)"""
+    return b"event: " + event.encode() + b"\ndata: " + to_json(data, inf_nan_mode="null", serialize_unknown=True) + b"\n\n"
+
+
 @router.post("/query", response_model=QueryResponse)
 async def execute_query(request: QueryRequest):
     """
     Execute a natural language query using analysis playbooks.
 
+    Runs the same pipeline as ``/query/stream`` and returns once the
+    narrative is ready.
+    """
+    stages: Dict[str, Any] = {}
+    extra_visualizations: List[Dict[str, Any]] = []
+    async for event, data in _query_events(request):
+        if event == "extra_visualization":
+            extra_visualizations.append(data)
+        else:
+            stages[event] = data
+
+    primary = stages["visualization"]
+    return QueryResponse(
+        sql=primary["sql"],
+        results=primary["results"],
+        total_rows=primary["total_rows"],
+        next_cursor=primary["next_cursor"],
+        visualization=primary["visualization"],
+        extra_visualizations=extra_visualizations or None,
+        analysis=stages["analysis"],
+        data_structure=primary["data_structure"],
+    )
+
+
+@router.post("/query/stream")
+async def stream_query(request: QueryRequest):
+    """
+    Execute a natural language query, streaming each stage as it completes.
+
+    Server-Sent Events, in order:
+    - ``plan``: the analysis request chosen by the planner
+    - ``visualization``: sql, results (per ``results_mode``), primary
+      visualization and data structure
+    - ``extra_visualization``: one per secondary playbook
+    - ``insights_token``: raw narrative text as the LLM generates it
+    - ``analysis``: the parsed narrative (same shape as ``/query``)
+    - ``done``, or ``error`` with ``status_code`` and ``detail`` on failure
+    """
+    async def events():
+        try:
+            async for event, data in _query_events(request, stream_insights=True):
+                yield _sse(event, data)
+        except HTTPException as e:
+            yield _sse("error", {"status_code": e.status_code, "detail": e.detail})
+        else:
+            yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/query/results", response_model=ResultPage)
+async def get_result_page(
+    cursor: str,
+    limit: int = Query(100, ge=1, le=settings.results_max_page_size),
+):
+    """
+    Fetch the next page of a query's rows
+
+    Args:
+        cursor: ``next_cursor`` from a query response or a previous page
+        limit: Maximum number of rows to return
+    """
+    result_id, _, offset = cursor.partition(":")
+    rows = result_pages.get(result_id)
+    if rows is None or not offset.isdigit():
+        raise HTTPException(
+            status_code=404,
+            detail="Result set not found or expired; run the query again",
+        )
+
+    offset = int(offset)
+    if isinstance(rows, list):
+        page = _page_rows(rows, offset, limit)
+        row_count = len(rows)
+    else:
+        # Table rows are re-read, so the data must not have changed since
+        try:
+            data_version = db_manager.data_version(rows["user_id"], rows["dataset_id"])
+        except FileNotFoundError:
+            data_version = None
+        if data_version != rows["data_version"]:
+            raise HTTPException(
+                status_code=404,
+                detail="Dataset changed since the query ran; run the query again",
+            )
+        page = await _table_page(rows, offset, limit)
+        row_count = rows["row_count"]
+
+    next_offset = offset + limit
+    return ResultPage(
+        results=page,
+        total_rows=row_count,
+        next_cursor=f"{result_id}:{next_offset}" if next_offset < row_count else None,
+    )
+
+
+async def _query_events(
+    request: QueryRequest,
+    stream_insights: bool = False,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run the query pipeline, yielding ``(event, data)`` as each stage completes.
+
     Flow:
     1. Get schema context
-    2. Use LLM to choose an analysis playbook (no SQL generation)
-    3. Execute fixed SQL to fetch data
-    4. Run the playbook to produce visualization + context
+    2. Use LLM to choose an analysis playbook (no SQL generation); column
+       statistics and a speculative full-table fetch load concurrently and
+       the fetch is cancelled if the plan doesn't need it
+    3. Execute fixed SQL to fetch data (aggregate-only playbooks are compiled
+       to GROUP BY / COUNT / AVG queries so only aggregated rows are fetched,
+       and an overview reads the column statistics stored at import time)
+    4. Run the playbook to produce visualization + context (steps 3-4 are
+       skipped when the same plan already ran on this version of the data)
     5. Generate textual analysis
+
+    Args:
+        request: The query request
+        stream_insights: Also yield ``insights_token`` events while the
+            narrative is generated
+
+    Raises:
+        HTTPException: If the dataset is missing or a required stage fails
     """
     import traceback
     import logging
 
     logger = logging.getLogger(__name__)
 
-    try:
-        # Step 1: Get schema
+    # Steps that only depend on the schema run concurrently on this graph
+    graph = TaskGraph()
+
+    async def load_schema() -> Dict[str, Any]:
+        return await db_manager.get_schema(request.user_id, request.dataset_id)
+
+    async def load_column_stats(schema: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        # Column statistics stored at import time (None for older datasets)
+        try:
+            return await db_manager.get_column_stats(
+                request.user_id,
+                request.dataset_id,
+                schema["tables"][0]["name"],
+            )
+        except Exception as e:
+            logger.error(f"Failed to read column statistics: {str(e)}")
+            return None
+
+    async def load_cross_moments(schema: Dict[str, Any]) -> Optional[CrossMoments]:
+        # Numeric cross moments stored at import time (None for older datasets)
         try:
-            schema_info = await db_manager.get_schema(
+            return await db_manager.get_cross_moments(
                 request.user_id,
                 request.dataset_id,
+                schema["tables"][0]["name"],
             )
+        except Exception as e:
+            logger.error(f"Failed to read cross moments: {str(e)}")
+            return None
+
+    async def count_rows(table_name: str) -> int:
+        rows = await db_manager.execute_query(
+            request.user_id,
+            request.dataset_id,
+            f"SELECT COUNT(*) AS row_count FROM {table_name}",
+        )
+        return int(rows[0]["row_count"])
+
+    async def plan(schema: Dict[str, Any]) -> Dict[str, Any]:
+        return await query_service.select_analysis(request.query, schema)
+
+    async def fetch_rows(table: Dict[str, Any], statement: str) -> pd.DataFrame:
+        # Straight into typed column arrays (no per-row dicts)
+        return await db_manager.execute_frame(
+            request.user_id,
+            request.dataset_id,
+            statement,
+            column_types={col["name"]: col.get("type") for col in table.get("columns", [])},
+        )
+
+    async def fetch_table(
+        schema: Dict[str, Any],
+        column_stats: Optional[List[Dict[str, Any]]],
+    ) -> Optional[pd.DataFrame]:
+        # Speculative: most playbooks need the whole table, so start loading
+        # it while the planner runs. Skipped for tables known to be large.
+        if column_stats and column_stats[0]["row_count"] > settings.speculative_fetch_max_rows:
+            return None
+        table = schema["tables"][0]
+        return await fetch_rows(table, f"SELECT * FROM {table['name']}")
+
+    try:
+        # Step 1: Get schema
+        graph.add("schema", load_schema)
+        try:
+            schema_info = await graph.get("schema")
         except Exception as e:
             logger.error(f"Failed to get schema: {str(e)}")
             logger.error(traceback.format_exc())
@@ -77,11 +518,15 @@ async def execute_query(request: QueryRequest):
 
         main_table = tables[0]["name"]
 
+        graph.add("column_stats", load_column_stats, deps=["schema"])
+        graph.add("cross_moments", load_cross_moments, deps=["schema"])
+        graph.add("plan", plan, deps=["schema"])
+        if settings.speculative_fetch_enabled:
+            graph.add("table_frame", fetch_table, deps=["schema", "column_stats"])
+
         # Step 2: Use LLM to select analysis playbook (no SQL)
         try:
-            analysis_request = await query_service.select_analysis(
-                request.query, schema_info
-            )
+            analysis_request = await graph.get("plan")
         except Exception as e:
             logger.error(f"Failed to select analysis: {str(e)}")
             logger.error(traceback.format_exc())
@@ -112,112 +557,9 @@ async def execute_query(request: QueryRequest):
         secondary_playbooks = analysis_request.get("secondary_playbooks") or []
         mode = analysis_request.get("mode", "quick")
 
-        # Step 3: Execute fixed SQL (no LLM-generated SQL)
-        if playbook_name == "overview":
-            sql = f"SELECT * FROM {main_table} LIMIT 500"
-        else:
-            sql = f"SELECT * FROM {main_table}"
-
-        try:
-            results = await db_manager.execute_query(
-                request.user_id,
-                request.dataset_id,
-                sql,
-            )
-        except Exception as e:
-            logger.error(f"Failed to execute query: {str(e)}")
-            logger.error(f"SQL that failed: {sql}")
-            logger.error(traceback.format_exc())
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to execute data fetch: {str(e)}",
-            )
-
-        # Step 4: Analyze data structure (generic)
-        try:
-            data_structure = data_analysis_service.analyze_structure(results)
-        except Exception as e:
-            logger.error(f"Failed to analyze data structure: {str(e)}")
-            data_structure = {}
-
-        # Step 5: Build DataFrame and apply any filters from the planner
-        df = pd.DataFrame(results)
-
-        # Apply segment filter if provided (equality filter only for now)
-        if isinstance(filter_segment, dict):
-            col = filter_segment.get("column")
-            value = filter_segment.get("value")
-            if col in df.columns:
-                try:
-                    df = df[df[col] == value]
-                except Exception:
-                    # If filtering fails, keep original df
-                    pass
-
-        # Apply focus range for a numeric feature if provided
-        if isinstance(focus_range, dict):
-            fr_feature = focus_range.get("feature")
-            fr_min = focus_range.get("min")
-            fr_max = focus_range.get("max")
-            if fr_feature in df.columns and isinstance(fr_min, (int, float)) and isinstance(fr_max, (int, float)):
-                try:
-                    series = pd.to_numeric(df[fr_feature], errors="coerce")
-                    mask = series.between(fr_min, fr_max)
-                    df = df[mask]
-                except Exception:
-                    pass
-
-        if playbook_name == "correlation":
-            outcome_col = target or "Outcome"
-            play = playbooks.correlation_playbook(
-                df,
-                outcome=outcome_col,
-                top_n=top_n or 5,
-            )
-        elif playbook_name == "distribution":
-            feature_col = feature
-            # Fallbacks are handled inside the playbook if feature_col is None or invalid
-            play = playbooks.distribution_playbook(
-                df,
-                feature=feature_col,
-                bins=bins or 10,
-            )
-        elif playbook_name == "segmented_distribution":
-            play = playbooks.segmented_distribution_playbook(
-                df,
-                feature=feature,
-                segment_column=segment_column,
-            )
-        elif playbook_name == "segment_comparison":
-            seg_col = segment_column
-            # Outcome is optional; playbook will fall back to row counts if not usable
-            play = playbooks.segment_comparison_playbook(df, segment_column=seg_col, outcome=target)
-        elif playbook_name == "outcome_breakdown":
-            outcome_col = target or "Outcome"
-            play = playbooks.outcome_breakdown_playbook(df, outcome=outcome_col)
-        elif playbook_name == "feature_outcome_profile":
-            feature_col = feature
-            outcome_col = target or "Outcome"
-            play = playbooks.feature_outcome_profile_playbook(
-                df,
-                feature=feature_col,
-                outcome=outcome_col,
-                bins=bins or 8,
-            )
-        elif playbook_name == "relationship":
-            play = playbooks.relationship_playbook(
-                df,
-                feature_x=feature_x,
-                feature_y=feature_y,
-            )
-        else:  # default to overview
-            play = playbooks.overview_playbook(df)
-
-        visualization = play["visualization"]
-        analysis_context = play.get("analysis_context", {})
-        merged_structure = {**data_structure, **analysis_context}
+        yield "plan", analysis_request
 
-        # Step 6: Determine any default secondary playbooks based on INTENT
+        # Step 3: Determine any default secondary playbooks based on INTENT
         # (LLM may still override by explicitly setting secondary_playbooks.)
         if not secondary_playbooks:
             if intent == "drivers":
@@ -228,81 +570,321 @@ async def execute_query(request: QueryRequest):
                 # For group comparisons, a segmented distribution is often helpful.
                 secondary_playbooks = ["segmented_distribution"]
 
-        # Step 7: Optionally run secondary playbooks requested by the planner
-        extra_visualizations: List[Dict[str, Any]] = []
-        for secondary in secondary_playbooks:
-            try:
-                if secondary == "correlation":
-                    outcome_col = target or "Outcome"
-                    secondary_play = playbooks.correlation_playbook(
-                        df,
-                        outcome=outcome_col,
-                        top_n=top_n or 5,
-                    )
-                elif secondary == "distribution":
-                    secondary_play = playbooks.distribution_playbook(
-                        df,
-                        feature=feature,
-                        bins=bins or 10,
-                    )
-                elif secondary == "segment_comparison":
-                    secondary_play = playbooks.segment_comparison_playbook(
-                        df,
-                        segment_column=segment_column,
-                        outcome=target,
+        column_stats = await graph.get("column_stats")
+
+        # An unfiltered overview is read straight from the column statistics
+        use_column_stats = (
+            playbook_name == "overview"
+            and column_stats is not None
+            and not isinstance(filter_segment, dict)
+            and not isinstance(focus_range, dict)
+        )
+
+        # Aggregate-only plans are compiled to SQL so only the aggregated rows
+        # leave the database; anything else needs the full table as a DataFrame.
+        use_sql_aggregates = (
+            use_column_stats or playbook_name in sql_playbooks.SQL_PLAYBOOKS
+        ) and all(
+            name in sql_playbooks.SQL_PLAYBOOKS for name in secondary_playbooks
+        )
+        sql_runner: Optional[sql_playbooks.SQLPlaybookRunner] = None
+        play: Optional[Dict[str, Any]] = None
+        moments: Optional[CrossMoments] = None
+
+        # The speculative full-table fetch is only used by the DataFrame path
+        # for non-overview playbooks; drop it as soon as the plan says otherwise.
+        if use_sql_aggregates or playbook_name == "overview":
+            graph.cancel("table_frame")
+
+        async def fetch(statement: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return await db_manager.execute_query(
+                request.user_id,
+                request.dataset_id,
+                statement,
+                params=params,
+            )
+
+        # Identical plans on an unchanged dataset reuse the computed stages.
+        # Entries keep aggregated rows but not table rows, which are read
+        # again only when the request asks for a page or sample of them.
+        data_version = db_manager.data_version(request.user_id, request.dataset_id)
+        cache_key = result_cache_key(
+            request.user_id,
+            request.dataset_id,
+            data_version,
+            playbook_name,
+            analysis_request,
+            secondary_playbooks,
+            include_correlation_matrix=request.include_correlation_matrix,
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            graph.cancel("table_frame")
+            sql = cached["sql"]
+            results = cached["results"]
+            rows_source = cached["rows_source"]
+            results_preview = cached["results_preview"]
+            total_rows = cached["total_rows"]
+            visualization = cached["visualization"]
+            merged_structure = cached["data_structure"]
+            extra_visualizations = cached["extra_visualizations"]
+            if results is None and request.results_mode == "sample":
+                try:
+                    results = await fetch_rows(tables[0], sql)
+                except Exception as e:
+                    logger.error(f"Failed to execute query: {str(e)}")
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to execute data fetch: {str(e)}",
                     )
-                elif secondary == "outcome_breakdown":
-                    outcome_col = target or "Outcome"
-                    secondary_play = playbooks.outcome_breakdown_playbook(df, outcome=outcome_col)
-                elif secondary == "feature_outcome_profile":
-                    outcome_col = target or "Outcome"
-                    # If we have top_correlations from the primary "drivers"
-                    # playbook, pick the strongest feature as the profile target.
-                    feature_for_profile = feature
-                    if analysis_context.get("kind") == "correlation":
-                        top_corrs = analysis_context.get("top_correlations") or {}
-                        if isinstance(top_corrs, dict) and top_corrs:
-                            feature_for_profile = max(
-                                top_corrs.keys(),
-                                key=lambda k: abs(top_corrs[k] or 0),
-                            )
-                    secondary_play = playbooks.feature_outcome_profile_playbook(
-                        df,
-                        feature=feature_for_profile,
-                        outcome=outcome_col,
-                        bins=bins or 8,
+            yield "visualization", {
+                "sql": sql,
+                **await _results_payload(
+                    results, rows_source, request.results_mode, request.page_size, total_rows
+                ),
+                "visualization": visualization,
+                "data_structure": merged_structure,
+            }
+            for viz in extra_visualizations:
+                yield "extra_visualization", viz
+        else:
+            # Step 4: Execute fixed SQL (no LLM-generated SQL)
+            rows_source: Optional[Dict[str, Any]] = None
+            if use_sql_aggregates:
+                sql = None
+                try:
+                    sql_runner = sql_playbooks.SQLPlaybookRunner(
+                        fetch,
+                        main_table,
+                        tables[0].get("columns", []),
+                        filter_segment=filter_segment,
+                        focus_range=focus_range,
                     )
-                elif secondary == "relationship":
-                    secondary_play = playbooks.relationship_playbook(
-                        df,
-                        feature_x=feature_x,
-                        feature_y=feature_y,
+                    if use_column_stats:
+                        # The overview comes from the statistics; rows, when
+                        # requested, are read from the table itself
+                        play = playbooks.overview_from_stats(column_stats)
+                        row_count = column_stats[0]["row_count"]
+                        if row_count:
+                            sql = f"SELECT * FROM {sql_playbooks.quote_identifier(main_table)}"
+                            results = None
+                            rows_source = _table_rows_source(request, sql, tables[0], data_version, row_count)
+                        else:
+                            results = []
+                    else:
+                        play = await sql_runner.run(
+                            playbook_name,
+                            **_sql_playbook_slots(playbook_name, target, feature, segment_column, bins),
+                        )
+                        sql = play.pop("sql", None) or None
+                        results = play.pop("rows", [])
+                except Exception as e:
+                    logger.error(f"Failed to execute aggregate query: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to execute data fetch: {str(e)}",
                     )
-                elif secondary == "segmented_distribution":
-                    secondary_play = playbooks.segmented_distribution_playbook(
-                        df,
-                        feature=feature,
-                        segment_column=segment_column,
+            else:
+                if playbook_name == "overview":
+                    sql = f"SELECT * FROM {main_table} LIMIT 500"
+                else:
+                    sql = f"SELECT * FROM {main_table}"
+
+                try:
+                    df = None
+                    if playbook_name != "overview" and "table_frame" in graph.tasks:
+                        df = await graph.get("table_frame")
+                    if df is None:
+                        df = await fetch_rows(tables[0], sql)
+                    # Rows stay columnar; only the requested page is converted
+                    results = df
+                    rows_source = _table_rows_source(request, sql, tables[0], data_version, len(df))
+                except Exception as e:
+                    logger.error(f"Failed to execute query: {str(e)}")
+                    logger.error(f"SQL that failed: {sql}")
+                    logger.error(traceback.format_exc())
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to execute data fetch: {str(e)}",
                     )
+
+            # Step 5: Analyze data structure (generic) of the whole table, from
+            # the stored column statistics when available instead of rescanning
+            # rows. The SQL aggregate path only has aggregated rows, so without
+            # statistics it describes the table from its schema and a row count.
+            try:
+                if column_stats:
+                    total_rows = column_stats[0]["row_count"]
+                elif play is None and playbook_name != "overview":
+                    total_rows = len(df)
                 else:
-                    continue
+                    total_rows = await count_rows(main_table)
+            except Exception as e:
+                logger.error(f"Failed to count rows: {str(e)}")
+                total_rows = len(results)
 
-                viz = secondary_play.get("visualization")
-                if isinstance(viz, dict):
-                    extra_visualizations.append(viz)
+            try:
+                if column_stats is not None:
+                    data_structure = data_analysis_service.analyze_column_stats(column_stats)
+                elif play is not None:
+                    data_structure = data_analysis_service.analyze_schema(tables[0], total_rows)
+                else:
+                    data_structure = await cpu_executor.run(data_analysis_service.analyze_structure, df)
             except Exception as e:
-                logger.error(f"Secondary playbook '{secondary}' failed: {str(e)}")
+                logger.error(f"Failed to analyze data structure: {str(e)}")
+                data_structure = {}
+
+            # Step 6: Apply any filters from the planner to the DataFrame
+            # (the SQL aggregate path already applied them as WHERE clauses)
+            if play is None:
+                df = await cpu_executor.run(_filter_frame, df, filter_segment, focus_range)
+                moments = await graph.get("cross_moments")
+
+                run_primary = _frame_playbook(
+                    playbook_name,
+                    df,
+                    target,
+                    feature,
+                    segment_column,
+                    feature_x,
+                    feature_y,
+                    top_n,
+                    bins,
+                    include_correlation_matrix=request.include_correlation_matrix,
+                    moments=moments,
+                    column_stats=column_stats,
+                ) or partial(playbooks.overview_playbook, df)
+                play = await cpu_executor.run(run_primary)
+
+            if results is None and request.results_mode == "sample":
+                results = await fetch_rows(tables[0], sql)
+            if results is None:
+                results_preview = await _table_page(rows_source, 0, INSIGHTS_PREVIEW_ROWS)
+            else:
+                results_preview = _page_rows(results, 0, INSIGHTS_PREVIEW_ROWS)
+            visualization = play["visualization"]
+            analysis_context = play.get("analysis_context", {})
+            merged_structure = {**data_structure, **analysis_context}
+
+            yield "visualization", {
+                "sql": sql,
+                **await _results_payload(
+                    results, rows_source, request.results_mode, request.page_size, total_rows
+                ),
+                "visualization": visualization,
+                "data_structure": merged_structure,
+            }
+
+            # Step 7: Optionally run secondary playbooks requested by the planner.
+            # They run concurrently (DataFrame playbooks on the CPU executor, all
+            # reading the same filtered frame), each with its own time limit, and
+            # are reported in the order the planner asked for them.
+            timeout = settings.secondary_playbook_timeout_seconds
+
+            async def run_secondary(secondary: str) -> Optional[Dict[str, Any]]:
+                if sql_runner is not None:
+                    return await asyncio.wait_for(
+                        sql_runner.run(
+                            secondary,
+                            **_sql_playbook_slots(secondary, target, feature, segment_column, bins),
+                        ),
+                        timeout,
+                    )
 
-        # Step 7: Generate analysis narrative
+                feature_for_secondary = feature
+                if secondary == "feature_outcome_profile" and analysis_context.get("kind") == "correlation":
+                    # If we have top_correlations from the primary "drivers"
+                    # playbook, pick the strongest feature as the profile target.
+                    top_corrs = analysis_context.get("top_correlations") or {}
+                    if isinstance(top_corrs, dict) and top_corrs:
+                        feature_for_secondary = max(
+                            top_corrs.keys(),
+                            key=lambda k: abs(top_corrs[k] or 0),
+                        )
+                run = _frame_playbook(
+                    secondary,
+                    df,
+                    target,
+                    feature_for_secondary,
+                    segment_column,
+                    feature_x,
+                    feature_y,
+                    top_n,
+                    bins,
+                    include_correlation_matrix=request.include_correlation_matrix,
+                    moments=moments,
+                    column_stats=column_stats,
+                )
+                if run is None:
+                    return None
+                # A timed-out playbook finishes in the background; its result is
+                # discarded
+                return await asyncio.wait_for(cpu_executor.run(run), timeout)
+
+            for index, secondary in enumerate(secondary_playbooks):
+                graph.add(f"secondary:{index}", partial(run_secondary, secondary))
+
+            extra_visualizations: List[Dict[str, Any]] = []
+            secondaries_complete = True
+            for index, secondary in enumerate(secondary_playbooks):
+                try:
+                    secondary_play = await graph.get(f"secondary:{index}")
+                    if secondary_play is None:
+                        continue
+
+                    viz = secondary_play.get("visualization")
+                    if isinstance(viz, dict):
+                        extra_visualizations.append(viz)
+                        yield "extra_visualization", viz
+                except asyncio.TimeoutError:
+                    secondaries_complete = False
+                    logger.error(f"Secondary playbook '{secondary}' timed out after {timeout}s")
+                except Exception as e:
+                    secondaries_complete = False
+                    logger.error(f"Secondary playbook '{secondary}' failed: {str(e)}")
+
+            # Partial results (a secondary timed out or failed) are not cached
+            if secondaries_complete:
+                result_cache.set(cache_key, {
+                    "sql": sql,
+                    # Aggregated rows only; table rows are re-read from `rows_source`
+                    "results": None if isinstance(results, pd.DataFrame) else results,
+                    "results_preview": results_preview,
+                    "rows_source": rows_source,
+                    "total_rows": total_rows,
+                    "visualization": visualization,
+                    "data_structure": merged_structure,
+                    "extra_visualizations": extra_visualizations,
+                })
+
+        # Step 8: Generate analysis narrative (the prompt only shows the row
+        # count and the first rows)
         try:
-            textual_analysis = await analysis_service.generate_insights(
-                request.query,
-                results,
-                sql,
-                merged_structure,
-                visualization,
-                extra_visualizations,
-            )
+            if stream_insights:
+                async for event, data in analysis_service.stream_insights(
+                    request.query,
+                    results_preview,
+                    sql,
+                    merged_structure,
+                    visualization,
+                    extra_visualizations,
+                    total_rows=total_rows,
+                ):
+                    if event == "token":
+                        yield "insights_token", {"text": data}
+                    else:
+                        textual_analysis = data
+            else:
+                textual_analysis = await analysis_service.generate_insights(
+                    request.query,
+                    results_preview,
+                    sql,
+                    merged_structure,
+                    visualization,
+                    extra_visualizations,
+                    total_rows=total_rows,
+                )
         except Exception as e:
             logger.error(f"Failed to generate analysis: {str(e)}")
             textual_analysis = {
@@ -312,14 +894,7 @@ async def execute_query(request: QueryRequest):
                 "recommendations": [],
             }
 
-        return QueryResponse(
-            sql=sql,
-            results=results,
-            visualization=visualization,
-            extra_visualizations=extra_visualizations or None,
-            analysis=textual_analysis,
-            data_structure=merged_structure,
-        )
+        yield "analysis", textual_analysis
 
     except HTTPException:
         raise
@@ -330,4 +905,7 @@ async def execute_query(request: QueryRequest):
             status_code=500,
             detail=f"Query execution failed: {str(e)}",
         )
+    finally:
+        # Cancel speculative work that was never awaited
+        await graph.aclose()
 
@@ -1,7 +1,7 @@
 """Application configuration"""
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Union
+from typing import List, Optional, Union
 import os
 
 
@@ -11,10 +11,58 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: str
     openai_model: str = "gpt-4-turbo-preview"
+    # Async client: per-call timeout, retries and in-flight request limit
+    llm_timeout_seconds: float = 60.0
+    llm_max_retries: int = 2
+    llm_max_concurrent_requests: int = 8
+    # Planner cache: validated plans keyed by question + schema fingerprint
+    planner_cache_max_entries: int = 1024
+    planner_cache_ttl_seconds: int = 3600
+    # Plan common phrasings with rules before falling back to the LLM
+    intent_router_enabled: bool = True
+    # Load the full table while the planner runs (skipped above this many rows)
+    speculative_fetch_enabled: bool = True
+    speculative_fetch_max_rows: int = 1_000_000
+    # CPU executor for pandas work in request handling: "thread" or
+    # "process" pool, worker count, and how many calls may be admitted
+    # (running + queued) before callers wait
+    cpu_executor_kind: str = "thread"
+    cpu_executor_max_workers: int = 4
+    cpu_executor_max_pending: int = 64
+    # Time limit per secondary playbook
+    secondary_playbook_timeout_seconds: float = 30.0
+    # Most points sent for a scatter plot (larger tables are downsampled)
+    scatter_max_points: int = 2000
+    # Computed query results per (dataset version, plan); 0 disables
+    result_cache_max_bytes: int = 256 * 1024 * 1024
+    # Raw rows in query responses: largest page, and how many result cursors
+    # stay available (and for how long); table rows are re-read per page
+    results_max_page_size: int = 5000
+    result_pages_max_entries: int = 64
+    result_pages_ttl_seconds: int = 600
+    # Narrative insights per prompt digest; set a path to persist them in SQLite
+    insights_cache_max_entries: int = 1024
+    insights_cache_ttl_seconds: int = 7 * 24 * 3600
+    insights_cache_path: Optional[str] = None
     
     # Database Configuration
     database_type: str = "sqlite"
     database_path: str = "./data"
+    # Engine pool: one engine (and its open file handles) per user dataset
+    engine_pool_max_size: int = 128
+    engine_idle_timeout_seconds: int = 300
+    # Open-files budget for engines; defaults to half the RLIMIT_NOFILE soft limit
+    engine_pool_max_open_files: Optional[int] = None
+    # Decoded cross moments kept in memory across datasets (LRU by size)
+    moments_cache_max_bytes: int = 64 * 1024 * 1024
+    # SQLite connection tuning (applied once per connection)
+    sqlite_busy_timeout_seconds: int = 30
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+
+    # Background CSV imports
+    import_max_concurrent_jobs: int = 2
+    import_max_tracked_jobs: int = 1000
     
     # Application Configuration
     debug: bool = False
@@ -1,18 +1,115 @@
 """Database connection and management"""
+import asyncio
 import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-from sqlalchemy import text
+from urllib.parse import quote
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.utils.cache import SizedLRUCache
+from app.utils.column_stats import (
+    INTERNAL_TABLE_PREFIX,
+    MOMENTS_TABLE,
+    STATS_TABLE,
+    CrossMoments,
+    SUMMARY_COLUMNS,
+    decode_stats_row,
+)
+from app.utils.sqlite_types import is_integer_type, is_numeric_type
+
+
+def _column_array(values: tuple, declared_type: Optional[str]) -> np.ndarray:
+    """
+    Convert one column of a fetched chunk into a typed NumPy array
+    
+    Uses the declared SQLite type to pick the dtype: INTEGER columns become
+    int64 (float64 with NaN if the chunk has NULLs), other numeric columns
+    (REAL, NUMERIC, BOOLEAN, ...) become float64, everything else stays as
+    object. Values that don't fit
+    the declared type fall back to object so nothing is silently coerced.
+    """
+    if is_integer_type(declared_type):
+        candidates = [np.int64, np.float64]
+    elif is_numeric_type(declared_type):
+        candidates = [np.float64]
+    else:
+        candidates = []
+    
+    for dtype in candidates:
+        try:
+            return np.array(values, dtype=dtype)
+        except (TypeError, ValueError, OverflowError):
+            continue
+    
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _concat_column(chunks: List[np.ndarray]) -> np.ndarray:
+    """Concatenate per-chunk arrays, promoting to a common dtype"""
+    if not chunks:
+        return np.empty(0, dtype=object)
+    if len(chunks) == 1:
+        return chunks[0]
+    dtypes = {chunk.dtype for chunk in chunks}
+    if len(dtypes) > 1 and np.dtype(object) in dtypes:
+        chunks = [chunk.astype(object) for chunk in chunks]
+    return np.concatenate(chunks)
+
+
+# Rough file-descriptor cost of one open engine: a couple of pooled
+# connections, each holding the database, -wal and -shm files
+FILES_PER_ENGINE = 6
+
+
+def _max_engines_for_open_files(max_open_files: Optional[int]) -> Optional[int]:
+    """
+    How many engines fit in the open-files budget
+    
+    Defaults to half of the process's RLIMIT_NOFILE soft limit so sockets and
+    other files keep some headroom. Returns None when there is no limit.
+    """
+    if not max_open_files:
+        try:
+            import resource
+            soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        except (ImportError, ValueError, OSError):
+            return None
+        if soft_limit == resource.RLIM_INFINITY:
+            return None
+        max_open_files = soft_limit // 2
+    return max(1, max_open_files // FILES_PER_ENGINE)
 
 
 class DatabaseManager:
     """Manages database connections for users"""
     
     def __init__(self):
-        self.connections: Dict[str, Any] = {}
+        # LRU of engines by "user_id:dataset_id", most recently used last
+        self.connections: "OrderedDict[str, Any]" = OrderedDict()
+        self.last_used: Dict[str, float] = {}
+        fd_cap = _max_engines_for_open_files(settings.engine_pool_max_open_files)
+        self.engine_pool_max_size = min(settings.engine_pool_max_size, fd_cap or settings.engine_pool_max_size)
+        self.engine_idle_timeout = settings.engine_idle_timeout_seconds
+        self.pool_metrics = {"hits": 0, "misses": 0, "evictions": 0}
+        self.idle_sweeper: Optional[asyncio.Task] = None
+        self.schema_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Decoded cross moments by (user_id, dataset_id, table), with the
+        # data_version they were read at; least recently used dropped first
+        self.moments_cache = SizedLRUCache(
+            settings.moments_cache_max_bytes,
+            sizeof=lambda entry: entry[1].nbytes,
+        )
+        # Import/delete counter per database path (part of data_version)
+        self.data_generations: Dict[str, int] = {}
         self.data_path = Path(settings.database_path)
         self.data_path.mkdir(parents=True, exist_ok=True)
     
@@ -22,32 +119,205 @@ class DatabaseManager:
         user_dir.mkdir(parents=True, exist_ok=True)
         return user_dir / f"{dataset_id}.db"
     
-    def get_connection_string(self, user_id: str, dataset_id: str) -> str:
-        """Get SQLite connection string for user's database"""
+    def get_connection_string(self, user_id: str, dataset_id: str, read_only: bool = False) -> str:
+        """
+        Get SQLite connection string for user's database
+        
+        Read-only connections use the URI form with ``mode=ro`` so analytical
+        queries can never write and never take a write lock.
+        """
         db_path = self.get_database_path(user_id, dataset_id)
+        if read_only:
+            return f"sqlite+aiosqlite:///file:{quote(str(db_path))}?mode=ro&uri=true"
         return f"sqlite+aiosqlite:///{db_path}"
     
-    async def get_engine(self, user_id: str, dataset_id: str):
-        """Get or create async engine for user's database"""
-        cache_key = f"{user_id}:{dataset_id}"
-        
-        if cache_key not in self.connections:
-            conn_str = self.get_connection_string(user_id, dataset_id)
-            engine = create_async_engine(
-                conn_str,
-                echo=False,
-                pool_pre_ping=True
+    def _create_engine(self, conn_str: str, pragmas: List[str]):
+        """Create an async engine that applies the given PRAGMAs once per new connection"""
+        engine = create_async_engine(
+            conn_str,
+            echo=False,
+            pool_pre_ping=True
+        )
+        
+        @event.listens_for(engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+        
+        return engine
+    
+    def _reader_pragmas(self) -> List[str]:
+        """Connection settings for analytical (read-only) engines"""
+        return [
+            f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_seconds * 1000}",
+            f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+            f"PRAGMA cache_size = -{settings.sqlite_cache_size_kib}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+    
+    def _writer_pragmas(self) -> List[str]:
+        """Connection settings for import (writer) engines"""
+        return [
+            f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_seconds * 1000}",
+            # WAL lets readers keep their snapshot while an import replaces a table
+            "PRAGMA journal_mode = WAL",
+            "PRAGMA synchronous = NORMAL",
+            f"PRAGMA cache_size = -{settings.sqlite_cache_size_kib}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+    
+    def _require_database(self, user_id: str, dataset_id: str) -> Path:
+        """Return the database path, raising FileNotFoundError if it doesn't exist"""
+        db_path = self.get_database_path(user_id, dataset_id)
+        
+        # Check if database file exists
+        if not db_path.exists():
+            raise FileNotFoundError(
+                f"Database file not found: {db_path}. "
+                f"Please ensure the dataset '{dataset_id}' has been imported."
             )
+        return db_path
+    
+    @staticmethod
+    def _first_statement(sql: str) -> str:
+        """Extract only the first statement if multiple are present"""
+        # Split by semicolon and take the first non-empty statement
+        statements = [s.strip() for s in sql.split(';') if s.strip()]
+        if not statements:
+            raise ValueError("No valid SQL statement found")
+        return statements[0]
+    
+    async def get_engine(self, user_id: str, dataset_id: str):
+        """Get or create the read-only async engine for user's database"""
+        return await self._get_pooled_engine(
+            f"{user_id}:{dataset_id}",
+            lambda: self._create_engine(
+                self.get_connection_string(user_id, dataset_id, read_only=True),
+                self._reader_pragmas(),
+            ),
+        )
+    
+    async def get_writer_engine(self, user_id: str, dataset_id: str):
+        """Get or create the read-write async engine used by imports"""
+        return await self._get_pooled_engine(
+            f"{user_id}:{dataset_id}:writer",
+            lambda: self._create_engine(
+                self.get_connection_string(user_id, dataset_id),
+                self._writer_pragmas(),
+            ),
+        )
+    
+    async def _get_pooled_engine(self, cache_key: str, create_engine):
+        """
+        Get an engine from the pool, creating it on a miss
+        
+        Engines are kept in a bounded LRU: engines idle for longer than
+        ``engine_idle_timeout`` are disposed on access (and by the idle
+        sweeper, so they are also closed when no requests arrive), and the
+        least recently used engine is disposed once more than
+        ``engine_pool_max_size`` are open.
+        """
+        now = time.monotonic()
+        
+        # Evictions are chosen (without awaiting) before the new entry goes in,
+        # and never include the engine being returned
+        engine = self.connections.get(cache_key)
+        if engine is not None:
+            self.connections.move_to_end(cache_key)
+            self.last_used[cache_key] = now
+            self.pool_metrics["hits"] += 1
+            evicted = self._take_evictions(now, keep=cache_key)
+        else:
+            evicted = self._take_evictions(now, keep=cache_key, room=1)
+            engine = create_engine()
             self.connections[cache_key] = engine
+            self.last_used[cache_key] = now
+            self.pool_metrics["misses"] += 1
+        
+        await self._dispose_engines(evicted)
+        return engine
+    
+    def _take_evictions(self, now: float, keep: Optional[str] = None, room: int = 0) -> List[Any]:
+        """
+        Remove idle engines, and enough least recently used ones to leave
+        `room` free slots, from the pool; returns them for disposal
+        """
+        evicted = []
+        
+        # OrderedDict is kept in recency order, so idle engines are at the front
+        for key in list(self.connections):
+            if key == keep:
+                continue
+            over_capacity = len(self.connections) + room > self.engine_pool_max_size
+            idle = now - self.last_used.get(key, now) > self.engine_idle_timeout
+            if not (over_capacity or idle):
+                break
+            evicted.append(self.connections.pop(key))
+            self.last_used.pop(key, None)
+        return evicted
+    
+    async def _dispose_engines(self, evicted: List[Any]):
+        """Dispose engines already removed from the pool"""
+        for engine in evicted:
+            self.pool_metrics["evictions"] += 1
+            await engine.dispose()
+    
+    async def evict_idle_engines(self):
+        """Dispose engines idle for longer than ``engine_idle_timeout``"""
+        await self._dispose_engines(self._take_evictions(time.monotonic()))
+    
+    def start_idle_sweeper(self):
+        """Evict idle engines periodically, in the background, until ``close_all``"""
+        if self.idle_sweeper is not None and not self.idle_sweeper.done():
+            return
+        interval = max(1.0, self.engine_idle_timeout / 2)
         
-        return self.connections[cache_key]
+        async def sweep():
+            while True:
+                await asyncio.sleep(interval)
+                await self.evict_idle_engines()
+        
+        self.idle_sweeper = asyncio.create_task(sweep(), name="engine-idle-sweeper")
+    
+    async def release_engine(self, user_id: str, dataset_id: str):
+        """Dispose and forget the engines for a dataset (e.g. before deleting it)"""
+        for cache_key in (f"{user_id}:{dataset_id}", f"{user_id}:{dataset_id}:writer"):
+            engine = self.connections.pop(cache_key, None)
+            self.last_used.pop(cache_key, None)
+            if engine is not None:
+                await engine.dispose()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Engine pool metrics: hits, misses, evictions and open engines"""
+        return {
+            **self.pool_metrics,
+            "open_engines": len(self.connections),
+            "max_size": self.engine_pool_max_size,
+            "idle_timeout_seconds": self.engine_idle_timeout,
+        }
+    
+    @asynccontextmanager
+    async def _busy_timeout(self, conn, timeout: Optional[int]):
+        """Temporarily override the connect-time busy timeout for one query"""
+        if timeout is None:
+            yield
+            return
+        await conn.execute(text(f"PRAGMA busy_timeout = {timeout * 1000}"))
+        try:
+            yield
+        finally:
+            default_ms = settings.sqlite_busy_timeout_seconds * 1000
+            await conn.execute(text(f"PRAGMA busy_timeout = {default_ms}"))
     
     async def execute_query(
         self,
         user_id: str,
         dataset_id: str,
         sql: str,
-        timeout: int = 30
+        timeout: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Execute SQL query and return results
@@ -56,7 +326,9 @@ class DatabaseManager:
             user_id: User identifier
             dataset_id: Dataset identifier
             sql: SQL query to execute
-            timeout: Query timeout in seconds
+            timeout: Optional busy timeout in seconds overriding the
+                connection default for this query
+            params: Optional named parameters bound into the query
             
         Returns:
             List of result rows as dictionaries
@@ -65,32 +337,14 @@ class DatabaseManager:
             FileNotFoundError: If database file doesn't exist
             Exception: For other database errors
         """
-        db_path = self.get_database_path(user_id, dataset_id)
-        
-        # Check if database file exists
-        if not db_path.exists():
-            raise FileNotFoundError(
-                f"Database file not found: {db_path}. "
-                f"Please ensure the dataset '{dataset_id}' has been imported."
-            )
-        
-        # Extract only the first statement if multiple are present
-        # Split by semicolon and take the first non-empty statement
-        statements = [s.strip() for s in sql.split(';') if s.strip()]
-        if not statements:
-            raise ValueError("No valid SQL statement found")
-        
-        # Use only the first statement
-        sql = statements[0]
+        self._require_database(user_id, dataset_id)
+        sql = self._first_statement(sql)
         
         engine = await self.get_engine(user_id, dataset_id)
         
-        async with engine.begin() as conn:
-            # Set timeout
-            await conn.execute(text(f"PRAGMA busy_timeout = {timeout * 1000}"))
-            
+        async with engine.connect() as conn, self._busy_timeout(conn, timeout):
             # Execute query
-            result = await conn.execute(text(sql))
+            result = await conn.execute(text(sql), params or {})
             
             # Fetch results
             rows = result.fetchall()
@@ -99,10 +353,108 @@ class DatabaseManager:
             columns = result.keys()
             return [dict(zip(columns, row)) for row in rows]
     
+    async def execute_frame(
+        self,
+        user_id: str,
+        dataset_id: str,
+        sql: str,
+        column_types: Optional[Dict[str, str]] = None,
+        timeout: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 10000
+    ) -> pd.DataFrame:
+        """
+        Execute SQL query and return results as a DataFrame
+        
+        Rows are streamed from the cursor in chunks and transposed straight
+        into typed NumPy column arrays, skipping the per-row dicts built by
+        execute_query.
+        
+        Args:
+            user_id: User identifier
+            dataset_id: Dataset identifier
+            sql: SQL query to execute
+            column_types: Declared SQLite types by column name (from PRAGMA
+                table_info / get_schema); columns not listed are kept as object
+            timeout: Optional busy timeout in seconds overriding the
+                connection default for this query
+            params: Optional named parameters bound into the query
+            chunk_size: Number of rows fetched from the cursor per chunk
+            
+        Returns:
+            DataFrame with one typed column per result column
+            
+        Raises:
+            FileNotFoundError: If database file doesn't exist
+            Exception: For other database errors
+        """
+        self._require_database(user_id, dataset_id)
+        sql = self._first_statement(sql)
+        column_types = column_types or {}
+        
+        engine = await self.get_engine(user_id, dataset_id)
+        
+        async with engine.connect() as conn, self._busy_timeout(conn, timeout):
+            result = await conn.stream(text(sql), params or {})
+            columns = list(result.keys())
+            chunks: List[List[np.ndarray]] = [[] for _ in columns]
+            
+            async for partition in result.partitions(chunk_size):
+                for i, values in enumerate(zip(*partition)):
+                    chunks[i].append(_column_array(values, column_types.get(columns[i])))
+        
+        return pd.DataFrame(
+            {col: _concat_column(col_chunks) for col, col_chunks in zip(columns, chunks)},
+            columns=columns,
+        )
+    
+    def _schema_stamp(self, db_path: Path) -> Tuple[int, int]:
+        """Cheap change stamp for a database: mtimes of the file and its WAL"""
+        wal_path = db_path.with_name(db_path.name + "-wal")
+        wal_mtime = wal_path.stat().st_mtime_ns if wal_path.exists() else 0
+        return (db_path.stat().st_mtime_ns, wal_mtime)
+    
+    def invalidate_schema(self, user_id: str, dataset_id: str):
+        """Drop the cached schema for a dataset (after import or delete)"""
+        self.schema_cache.pop((user_id, dataset_id), None)
+        self.moments_cache.invalidate(lambda key: key[:2] == (user_id, dataset_id))
+        self._bump_generation(str(self.get_database_path(user_id, dataset_id)))
+    
+    def invalidate_engine_schema(self, engine):
+        """Drop cached schemas for whichever dataset an engine points at"""
+        db_path = engine.url.database
+        for key, entry in list(self.schema_cache.items()):
+            if entry["path"] == db_path:
+                self.schema_cache.pop(key, None)
+        self._bump_generation(db_path)
+    
+    def _bump_generation(self, db_path: str):
+        self.data_generations[db_path] = self.data_generations.get(db_path, 0) + 1
+    
+    def data_version(self, user_id: str, dataset_id: str) -> Tuple[int, int, int]:
+        """
+        Version of a dataset's contents, for keying derived results
+        
+        Combines a counter bumped by every import/delete in this process with
+        the file (and WAL) mtimes, so writes from other processes also change
+        the version.
+        
+        Raises:
+            FileNotFoundError: If database file doesn't exist
+        """
+        db_path = self._require_database(user_id, dataset_id)
+        return (self.data_generations.get(str(db_path), 0), *self._schema_stamp(db_path))
+    
     async def get_schema(self, user_id: str, dataset_id: str) -> Dict[str, Any]:
         """
         Get database schema information
         
+        Results are cached per (user_id, dataset_id). A cached entry is reused
+        while the database file (and WAL) mtimes are unchanged; if they moved,
+        PRAGMA schema_version decides whether the schema must be re-read.
+        Imports and deletes invalidate the entry explicitly. The returned
+        dict is shared between callers and must not be mutated.
+        
         Args:
             user_id: User identifier
             dataset_id: Dataset identifier
@@ -114,93 +466,202 @@ class DatabaseManager:
             FileNotFoundError: If database file doesn't exist
             Exception: For other database errors
         """
-        db_path = self.get_database_path(user_id, dataset_id)
+        db_path = self._require_database(user_id, dataset_id)
+        cache_key = (user_id, dataset_id)
+        stamp = self._schema_stamp(db_path)
         
-        # Check if database file exists
-        if not db_path.exists():
-            raise FileNotFoundError(
-                f"Database file not found: {db_path}. "
-                f"Please ensure the dataset '{dataset_id}' has been imported."
-            )
+        cached = self.schema_cache.get(cache_key)
+        if cached is not None and cached["stamp"] == stamp:
+            return cached["schema"]
         
         engine = await self.get_engine(user_id, dataset_id)
         
+        async with engine.connect() as conn:
+            result = await conn.execute(text("PRAGMA schema_version"))
+            schema_version = result.scalar()
+            
+            if cached is not None and cached["schema_version"] == schema_version:
+                # Only data changed; table layout is the same
+                cached["stamp"] = stamp
+                return cached["schema"]
+            
+            schema_info = await self._read_schema(conn)
+        
+        self.schema_cache[cache_key] = {
+            "path": str(db_path),
+            "stamp": stamp,
+            "schema_version": schema_version,
+            "schema": schema_info,
+        }
+        return schema_info
+    
+    async def _read_schema(self, conn) -> Dict[str, Any]:
+        """Read tables, columns and sample rows over a single connection"""
         schema_info = {
             "tables": []
         }
         
         # Get all table names using SQLite system tables
-        async with engine.begin() as conn:
-            # Query SQLite master table for table names
-            result = await conn.execute(text("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name NOT LIKE 'sqlite_%'
-                ORDER BY name
-            """))
-            table_rows = result.fetchall()
-            table_names = [row[0] for row in table_rows]
+        result = await conn.execute(text("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+        """))
+        table_rows = result.fetchall()
+        # Internal metadata tables (e.g. column statistics) are not user data
+        table_names = [
+            row[0] for row in table_rows
+            if not row[0].startswith(INTERNAL_TABLE_PREFIX)
+        ]
         
         for table_name in table_names:
             # Get column information using PRAGMA
-            async with engine.begin() as conn:
-                result = await conn.execute(text(f"PRAGMA table_info({table_name})"))
-                column_rows = result.fetchall()
-                
-                table_info = {
-                    "name": table_name,
-                    "columns": []
-                }
-                
-                for col_row in column_rows:
-                    # PRAGMA table_info returns: cid, name, type, notnull, dflt_value, pk
-                    col_name = col_row[1]
-                    col_type = col_row[2]
-                    not_null = col_row[3] == 1
-                    
-                    table_info["columns"].append({
-                        "name": col_name,
-                        "type": col_type,
-                        "nullable": not not_null
-                    })
+            result = await conn.execute(text(f"PRAGMA table_info({table_name})"))
+            column_rows = result.fetchall()
+            
+            table_info = {
+                "name": table_name,
+                "columns": []
+            }
+            
+            for col_row in column_rows:
+                # PRAGMA table_info returns: cid, name, type, notnull, dflt_value, pk
+                col_name = col_row[1]
+                col_type = col_row[2]
+                not_null = col_row[3] == 1
                 
-                # Get sample data (first 3 rows)
-                try:
-                    sample_result = await conn.execute(
-                        text(f"SELECT * FROM {table_name} LIMIT 3")
-                    )
-                    sample_rows = sample_result.fetchall()
-                    if sample_rows:
-                        columns = sample_result.keys()
-                        table_info["sample_rows"] = [
-                            dict(zip(columns, row)) for row in sample_rows
-                        ]
-                    else:
-                        table_info["sample_rows"] = []
-                except Exception:
+                table_info["columns"].append({
+                    "name": col_name,
+                    "type": col_type,
+                    "nullable": not not_null
+                })
+            
+            # Get sample data (first 3 rows)
+            try:
+                sample_result = await conn.execute(
+                    text(f"SELECT * FROM {table_name} LIMIT 3")
+                )
+                sample_rows = sample_result.fetchall()
+                if sample_rows:
+                    columns = sample_result.keys()
+                    table_info["sample_rows"] = [
+                        dict(zip(columns, row)) for row in sample_rows
+                    ]
+                else:
                     table_info["sample_rows"] = []
+            except Exception:
+                table_info["sample_rows"] = []
             
             schema_info["tables"].append(table_info)
         
         return schema_info
     
+    async def get_column_stats(
+        self,
+        user_id: str,
+        dataset_id: str,
+        table_name: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the column statistics precomputed when a table was imported
+        
+        Args:
+            user_id: User identifier
+            dataset_id: Dataset identifier
+            table_name: Table the statistics describe
+            
+        Returns:
+            One statistics dict per column in table order, or None if the
+            table was imported before statistics existed
+        """
+        exists = await self.execute_query(
+            user_id,
+            dataset_id,
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name",
+            params={"name": STATS_TABLE},
+        )
+        if not exists:
+            return None
+        
+        select_list = ", ".join(f'"{name}"' for name in SUMMARY_COLUMNS)
+        rows = await self.execute_query(
+            user_id,
+            dataset_id,
+            f"SELECT {select_list} FROM {STATS_TABLE} "
+            "WHERE table_name = :table_name ORDER BY position",
+            params={"table_name": table_name},
+        )
+        return [decode_stats_row(row) for row in rows] or None
+    
+    async def get_cross_moments(
+        self,
+        user_id: str,
+        dataset_id: str,
+        table_name: str
+    ) -> Optional[CrossMoments]:
+        """
+        Get the numeric columns' cross moments stored when a table was imported
+        
+        Decoded moments are kept per dataset until its data_version changes
+        (within the ``moments_cache_max_bytes`` LRU budget), so repeated
+        correlation questions don't re-read the matrices.
+        
+        Args:
+            user_id: User identifier
+            dataset_id: Dataset identifier
+            table_name: Table the statistics describe
+            
+        Returns:
+            The table's cross moments, or None if the table was imported
+            before they existed
+        """
+        cache_key = (user_id, dataset_id, table_name)
+        version = self.data_version(user_id, dataset_id)
+        cached = self.moments_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        exists = await self.execute_query(
+            user_id,
+            dataset_id,
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name",
+            params={"name": MOMENTS_TABLE},
+        )
+        rows = []
+        if exists:
+            rows = await self.execute_query(
+                user_id,
+                dataset_id,
+                f"SELECT * FROM {MOMENTS_TABLE} WHERE table_name = :table_name",
+                params={"table_name": table_name},
+            )
+        if not rows:
+            return None
+        
+        moments = CrossMoments.from_row(rows[0])
+        self.moments_cache.set(cache_key, (version, moments))
+        return moments
+    
     async def create_database(self, user_id: str, dataset_id: str):
         """Create a new database file"""
         db_path = self.get_database_path(user_id, dataset_id)
         if not db_path.exists():
             # Create empty database by executing a simple query
-            # This ensures the SQLite file is actually created on disk
-            engine = await self.get_engine(user_id, dataset_id)
-            try:
-                async with engine.begin() as conn:
-                    await conn.execute(text("SELECT 1"))
-            finally:
-                await engine.dispose()
+            # This ensures the SQLite file is actually created on disk. The
+            # writer engine stays in the pool (disposed by eviction or close_all)
+            engine = await self.get_writer_engine(user_id, dataset_id)
+            async with engine.begin() as conn:
+                await conn.execute(text("SELECT 1"))
     
     async def close_all(self):
         """Close all database connections"""
+        if self.idle_sweeper is not None:
+            self.idle_sweeper.cancel()
+            self.idle_sweeper = None
         for engine in self.connections.values():
             await engine.dispose()
         self.connections.clear()
+        self.last_used.clear()
 
 
 # Global database manager instance
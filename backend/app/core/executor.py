@@ -0,0 +1,107 @@
+"""Executor for CPU-bound work (pandas/NumPy) kept off the event loop"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.config import settings
+
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class CPUExecutor:
+    """
+    Bounded pool for CPU-heavy steps of request handling
+
+    Work runs on a thread pool (pandas/NumPy release the GIL for most
+    operations, and arguments are shared rather than copied) or a process
+    pool (full isolation from the event loop's interpreter, at the cost of
+    pickling arguments and results; callables must be module-level functions
+    or partials of them). At most ``max_workers`` calls run at once and at
+    most ``max_pending`` are admitted in total; further callers wait for a
+    slot, so a burst of heavy requests queues instead of piling onto the pool.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_pending: int = 64):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}'; expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._pool: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self.in_flight = 0
+        self.waiting = 0
+        self.metrics = {"submitted": 0, "completed": 0, "failed": 0, "max_queue_depth": 0}
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu")
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a worker: admitted but not running, plus those waiting for admission"""
+        return max(0, self.in_flight - self.max_workers) + self.waiting
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` on the pool and await its result
+
+        Cancelling the awaiting task does not interrupt a call that already
+        started; its result is discarded.
+
+        Args:
+            fn: Function to call (picklable for the process pool)
+            *args: Positional arguments for ``fn``
+
+        Returns:
+            The function's return value (its exception is re-raised)
+        """
+        slots = self._slots
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.metrics["submitted"] += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.queue_depth)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+        except BaseException:
+            self.metrics["failed"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            slots.release()
+        self.metrics["completed"] += 1
+        return result
+
+    def shutdown(self):
+        """Stop the pool without waiting for running calls"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration, load and completion counters"""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": min(self.in_flight, self.max_workers),
+            "queue_depth": self.queue_depth,
+            **self.metrics,
+        }
+
+
+# Global executor instance
+cpu_executor = CPUExecutor(
+    kind=settings.cpu_executor_kind,
+    max_workers=settings.cpu_executor_max_workers,
+    max_pending=settings.cpu_executor_max_pending,
+)
@@ -1,57 +1,184 @@
 """LLM client wrapper for OpenAI"""
+import asyncio
 import json
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import re
+import weakref
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+import httpx
+from openai import AsyncOpenAI
 from app.config import settings
 
 
+# Per event loop: one async client (and HTTP connection pool) shared by every
+# LLMClient, and one limit on in-flight requests. Both are bound to the loop
+# they are first used on, so a new loop (tests, workers) gets its own pair.
+_loop_resources: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _resources() -> Tuple[AsyncOpenAI, asyncio.Semaphore]:
+    """The running loop's client and request slots, created on first use"""
+    loop = asyncio.get_running_loop()
+    resources = _loop_resources.get(loop)
+    if resources is None:
+        client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.llm_timeout_seconds,
+            max_retries=settings.llm_max_retries,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_concurrent_requests,
+                    max_keepalive_connections=settings.llm_max_concurrent_requests,
+                ),
+            ),
+        )
+        resources = (client, asyncio.Semaphore(settings.llm_max_concurrent_requests))
+        _loop_resources[loop] = resources
+    return resources
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Get the running loop's shared AsyncOpenAI client, creating it on first use"""
+    return _resources()[0]
+
+
+def get_request_slots() -> asyncio.Semaphore:
+    """Get the running loop's limit on in-flight LLM requests"""
+    return _resources()[1]
+
+
+async def close_async_client():
+    """Close the running loop's client and forget it and its request slots"""
+    resources = _loop_resources.pop(asyncio.get_running_loop(), None)
+    if resources is not None:
+        await resources[0].close()
+
+
+def parse_json_response(response: str) -> Dict[str, Any]:
+    """Parse a JSON object from a model response, tolerating surrounding text"""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        # Try to extract JSON from response if it's wrapped in text
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        raise Exception("Failed to parse JSON response from LLM")
+
+
 class LLMClient:
     """Wrapper for OpenAI API"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self._client: Optional[AsyncOpenAI] = None
         self.model = settings.openai_model
     
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The running loop's shared client, unless one was set explicitly"""
+        return self._client if self._client is not None else get_async_client()
+    
+    @client.setter
+    def client(self, client: AsyncOpenAI):
+        self._client = client
+    
     async def chat_completion(
         self,
         messages: list[Dict[str, str]],
         temperature: float = 0.3,
-        response_format: Optional[Dict[str, str]] = None
+        response_format: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
     ) -> str:
         """
         Make a chat completion request
         
+        The request is awaited on the shared async client, so the event loop
+        keeps serving other requests while the model responds. At most
+        ``llm_max_concurrent_requests`` calls are in flight at once; further
+        calls wait for a free slot.
+        
         Args:
             messages: List of message dicts with 'role' and 'content'
             temperature: Sampling temperature (0-2)
             response_format: Optional JSON schema for structured output
+            timeout: Optional timeout in seconds for this call, overriding
+                ``llm_timeout_seconds``
             
         Returns:
             Response content as string
         """
         try:
-            kwargs = {
-                "model": self.model,
-                "messages": messages,
-            }
-            
-            # Some models (like gpt-5-nano) only support default temperature (1)
-            # Check if model name contains 'nano' and skip temperature parameter
-            if 'nano' not in self.model.lower():
-                kwargs["temperature"] = temperature
-            
-            if response_format:
-                kwargs["response_format"] = response_format
-            
-            response = self.client.chat.completions.create(**kwargs)
+            kwargs = self._completion_kwargs(messages, temperature, response_format, timeout)
+            async with get_request_slots():
+                response = await self.client.chat.completions.create(**kwargs)
             return response.choices[0].message.content
         except Exception as e:
             raise Exception(f"LLM API error: {str(e)}")
     
+    async def stream_chat_completion(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float = 0.3,
+        response_format: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Make a streaming chat completion request
+        
+        Holds one request slot until the stream is exhausted or closed.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            response_format: Optional JSON schema for structured output
+            timeout: Optional timeout in seconds for this call
+            
+        Yields:
+            Pieces of the response content as they are generated
+        """
+        try:
+            kwargs = self._completion_kwargs(messages, temperature, response_format, timeout)
+            async with get_request_slots():
+                stream = await self.client.chat.completions.create(stream=True, **kwargs)
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+        except Exception as e:
+            raise Exception(f"LLM API error: {str(e)}")
+    
+    def _completion_kwargs(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, str]],
+        timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        """Request arguments shared by the plain and streaming calls"""
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+        }
+        
+        # Some models (like gpt-5-nano) only support default temperature (1)
+        # Check if model name contains 'nano' and skip temperature parameter
+        if 'nano' not in self.model.lower():
+            kwargs["temperature"] = temperature
+        
+        if response_format:
+            kwargs["response_format"] = response_format
+        
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        
+        return kwargs
+    
     async def generate_json(
         self,
         messages: list[Dict[str, str]],
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Generate and parse JSON response
@@ -59,20 +186,12 @@ class LLMClient:
         Args:
             messages: List of message dicts
             temperature: Sampling temperature
+            timeout: Optional timeout in seconds for this call
             
         Returns:
             Parsed JSON as dict
         """
         response_format = {"type": "json_object"}
-        response = await self.chat_completion(messages, temperature, response_format)
-        
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Try to extract JSON from response if it's wrapped in text
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            raise Exception("Failed to parse JSON response from LLM")
+        response = await self.chat_completion(messages, temperature, response_format, timeout)
+        return parse_json_response(response)
 
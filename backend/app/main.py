@@ -9,6 +9,9 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.config import settings
 from app.api.routes import query, datasets, schema, auth
 from app.core.database import db_manager
+from app.core.executor import cpu_executor
+from app.services.result_cache import result_cache
+from app.core.llm import close_async_client
 from app.utils.csv_importer import CSVImporter
 
 # Configure logging
@@ -102,6 +105,7 @@ async def startup_event():
     """Initialize MVP dataset on startup if it doesn't exist"""
     # Log CORS configuration
     logger.info(f"CORS allowed origins: {settings.cors_origins}")
+    db_manager.start_idle_sweeper()
     
     user_id = "default_user"
     dataset_id = "mvp_dataset"
@@ -130,23 +134,20 @@ async def startup_event():
             try:
                 logger.info(f"Found CSV file at {csv_file}. Importing...")
                 await db_manager.create_database(user_id, dataset_id)
-                engine = await db_manager.get_engine(user_id, dataset_id)
+                engine = await db_manager.get_writer_engine(user_id, dataset_id)
                 
                 with open(csv_file, 'rb') as f:
-                    csv_content = f.read()
-                
-                result = await CSVImporter.import_csv(
-                    engine,
-                    csv_content,
-                    table_name="diabetes",
-                    encoding='utf-8'
-                )
+                    result = await CSVImporter.import_csv_stream(
+                        engine,
+                        f,
+                        table_name="diabetes",
+                        encoding='utf-8'
+                    )
                 
                 logger.info(
                     f"Successfully imported MVP dataset: "
                     f"{result['rows_imported']} rows into table '{result['table_name']}'"
                 )
-                await engine.dispose()
             except Exception as e:
                 logger.error(f"Failed to import MVP dataset: {str(e)}")
                 logger.exception(e)
@@ -160,6 +161,14 @@ async def startup_event():
         logger.info(f"MVP dataset found at {db_path}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled LLM and database connections and the CPU executor"""
+    await close_async_client()
+    await db_manager.close_all()
+    cpu_executor.shutdown()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -171,3 +180,17 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for capacity monitoring"""
+    return {
+        "engine_pool": db_manager.pool_stats(),
+        "moments_cache": db_manager.moments_cache.stats(),
+        "planner_cache": query.query_service.plan_cache.stats(),
+        "intent_router": query.query_service.router_metrics,
+        "cpu_executor": cpu_executor.stats(),
+        "result_cache": result_cache.stats(),
+        "insights_cache": query.analysis_service.insights_cache.stats(),
+    }
+
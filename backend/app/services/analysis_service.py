@@ -1,6 +1,25 @@
 """Analysis service: Generate textual insights"""
-from typing import Dict, Any, List
-from app.core.llm import LLMClient
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from app.config import settings
+from app.core.llm import LLMClient, parse_json_response
+from app.utils.cache import SQLiteCache, TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+# Rows of sample data shown to the LLM
+INSIGHTS_PREVIEW_ROWS = 5
+
+
+def insights_cache_key(model: str, messages: List[Dict[str, str]]) -> str:
+    """Content address of an insights request: digest of the model and full prompt"""
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 class AnalysisService:
@@ -8,31 +27,157 @@ class AnalysisService:
     
     def __init__(self):
         self.llm = LLMClient()
+        # Identical prompts (same question, results summary and visualizations)
+        # reuse the previous narrative; optionally persisted across restarts
+        self.insights_cache = TTLCache(
+            max_entries=settings.insights_cache_max_entries,
+            ttl_seconds=settings.insights_cache_ttl_seconds,
+        )
+        self.insights_store: Optional[SQLiteCache] = None
+        if settings.insights_cache_path:
+            self.insights_store = SQLiteCache(
+                settings.insights_cache_path,
+                max_entries=settings.insights_cache_max_entries,
+                ttl_seconds=settings.insights_cache_ttl_seconds,
+            )
     
     async def generate_insights(
         self,
         user_query: str,
         query_results: List[Dict[str, Any]],
-        sql: str,
+        sql: Optional[str],
         data_structure: Dict[str, Any],
         visualization: Dict[str, Any],
         extra_visualizations: List[Dict[str, Any]] | None = None,
+        total_rows: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Generate textual analysis of query results
         
         Args:
             user_query: Original user query
-            query_results: Query results
+            query_results: Query results (only the first
+                ``INSIGHTS_PREVIEW_ROWS`` are shown to the LLM)
             sql: Executed SQL query
             data_structure: Data structure analysis
+            total_rows: Row count of the full results, when ``query_results``
+                is only a preview (defaults to its length)
             
         Returns:
             Textual analysis with summary, findings, and insights
         """
+        if total_rows is None:
+            total_rows = len(query_results)
+        messages = self._build_messages(
+            user_query,
+            query_results,
+            total_rows,
+            data_structure,
+            visualization,
+            extra_visualizations,
+        )
+        key = insights_cache_key(self.llm.model, messages)
+        cached = await self._get_cached_insights(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            response = await self.llm.generate_json(messages, temperature=0.5)
+            analysis = self._format_insights(response)
+            await self._cache_insights(key, analysis)
+            return analysis
+        except Exception as e:
+            # Fallback to basic analysis if LLM fails
+            return self._generate_fallback_analysis(total_rows, data_structure)
+    
+    async def stream_insights(
+        self,
+        user_query: str,
+        query_results: List[Dict[str, Any]],
+        sql: Optional[str],
+        data_structure: Dict[str, Any],
+        visualization: Dict[str, Any],
+        extra_visualizations: List[Dict[str, Any]] | None = None,
+        total_rows: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate the same analysis as ``generate_insights``, streaming the text
+        
+        Args:
+            Same as ``generate_insights``
+            
+        Yields:
+            ``("token", text)`` for each piece of the model's response, then
+            ``("insights", analysis)`` with the parsed analysis (or the
+            fallback analysis if the LLM fails). A cached analysis is yielded
+            directly, without tokens.
+        """
+        if total_rows is None:
+            total_rows = len(query_results)
+        messages = self._build_messages(
+            user_query,
+            query_results,
+            total_rows,
+            data_structure,
+            visualization,
+            extra_visualizations,
+        )
+        key = insights_cache_key(self.llm.model, messages)
+        cached = await self._get_cached_insights(key)
+        if cached is not None:
+            yield "insights", cached
+            return
+        
+        try:
+            chunks: List[str] = []
+            async for delta in self.llm.stream_chat_completion(
+                messages,
+                temperature=0.5,
+                response_format={"type": "json_object"},
+            ):
+                chunks.append(delta)
+                yield "token", delta
+            analysis = self._format_insights(parse_json_response("".join(chunks)))
+            await self._cache_insights(key, analysis)
+        except Exception as e:
+            analysis = self._generate_fallback_analysis(total_rows, data_structure)
+        yield "insights", analysis
+    
+    async def _get_cached_insights(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an analysis in memory, then in the persistent store"""
+        cached = self.insights_cache.get(key)
+        if cached is None and self.insights_store is not None:
+            try:
+                cached = await asyncio.to_thread(self.insights_store.get, key)
+            except Exception as e:
+                logger.warning(f"Insights cache read failed: {str(e)}")
+            if cached is not None:
+                self.insights_cache.set(key, cached)
+        return copy.deepcopy(cached) if cached is not None else None
+    
+    async def _cache_insights(self, key: str, analysis: Dict[str, Any]):
+        """Remember an LLM-generated analysis (fallback analyses are never cached)"""
+        self.insights_cache.set(key, copy.deepcopy(analysis))
+        if self.insights_store is not None:
+            try:
+                await asyncio.to_thread(self.insights_store.set, key, analysis)
+            except Exception as e:
+                logger.warning(f"Insights cache write failed: {str(e)}")
+    
+    def _build_messages(
+        self,
+        user_query: str,
+        query_results: List[Dict[str, Any]],
+        total_rows: int,
+        data_structure: Dict[str, Any],
+        visualization: Dict[str, Any],
+        extra_visualizations: List[Dict[str, Any]] | None,
+    ) -> List[Dict[str, str]]:
+        """Build the insights prompt"""
         # Prepare results + visualization summary for LLM
         results_summary = self._prepare_results_summary(
             query_results,
+            total_rows,
             data_structure,
             visualization,
             extra_visualizations or [],
@@ -89,47 +234,45 @@ Return JSON format only:
                 "content": prompt
             }
         ]
-        
-        try:
-            response = await self.llm.generate_json(messages, temperature=0.5)
+        return messages
+    
+    def _format_insights(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape the model's JSON into the analysis payload"""
+        raw_follow_ups = response.get("follow_ups") or []
+        follow_ups: List[str] = [
+            q for q in raw_follow_ups if isinstance(q, str) and q.strip()
+        ]
 
-            raw_follow_ups = response.get("follow_ups") or []
-            follow_ups: List[str] = [
-                q for q in raw_follow_ups if isinstance(q, str) and q.strip()
+        if not follow_ups:
+            follow_ups = [
+                "Give me a high-level overview of this dataset, including numeric ranges and missing values.",
+                "Show which numeric features are most related to the main outcome or target in this dataset.",
+                "Show the distribution of an important numeric feature in this dataset (for example, glucose, BMI, or age).",
+                "Compare two important groups in this dataset on a key metric, such as outcome rate or row count.",
             ]
 
-            if not follow_ups:
-                follow_ups = [
-                    "Give me a high-level overview of this dataset, including numeric ranges and missing values.",
-                    "Show which numeric features are most related to the main outcome or target in this dataset.",
-                    "Show the distribution of an important numeric feature in this dataset (for example, glucose, BMI, or age).",
-                    "Compare two important groups in this dataset on a key metric, such as outcome rate or row count.",
-                ]
-
-            return {
-                "summary": response.get("summary", ""),
-                "key_findings": response.get("key_findings", []),
-                "patterns": response.get("patterns", []),
-                "recommendations": response.get("recommendations", []),
-                "follow_ups": follow_ups,
-            }
-        except Exception as e:
-            # Fallback to basic analysis if LLM fails
-            return self._generate_fallback_analysis(query_results, data_structure)
+        return {
+            "summary": response.get("summary", ""),
+            "key_findings": response.get("key_findings", []),
+            "patterns": response.get("patterns", []),
+            "recommendations": response.get("recommendations", []),
+            "follow_ups": follow_ups,
+        }
     
     def _prepare_results_summary(
         self,
         results: List[Dict[str, Any]],
+        total_rows: int,
         data_structure: Dict[str, Any],
         visualization: Dict[str, Any],
         extra_visualizations: List[Dict[str, Any]],
     ) -> str:
         """Prepare a summary of results + visualizations for LLM"""
-        if not results:
+        if not total_rows:
             return "No results returned from query."
 
         summary_parts: List[str] = [
-            f"Total rows: {len(results)}",
+            f"Total rows: {total_rows}",
             f"Columns: {', '.join(data_structure.get('columns', {}).keys())}",
         ]
 
@@ -155,7 +298,7 @@ Return JSON format only:
 
         # Add sample data
         summary_parts.append("\nSample data (first 5 rows):")
-        for i, row in enumerate(results[:5], 1):
+        for i, row in enumerate(results[:INSIGHTS_PREVIEW_ROWS], 1):
             summary_parts.append(f"Row {i}: {row}")
 
         # Add statistics for numeric columns
@@ -213,11 +356,10 @@ Return JSON format only:
     
     def _generate_fallback_analysis(
         self,
-        results: List[Dict[str, Any]],
+        row_count: int,
         data_structure: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Generate basic analysis without LLM"""
-        row_count = len(results)
         
         summary = f"Query returned {row_count} result{'s' if row_count != 1 else ''}."
         
@@ -1,7 +1,9 @@
 """Data analysis service: Analyze query result structure"""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 import pandas as pd
 from datetime import datetime
+from app.utils.column_scan import scan_columns
+from app.utils.sqlite_types import is_numeric_type
 
 
 class DataAnalysisService:
@@ -60,17 +62,21 @@ class DataAnalysisService:
         
         return "text"
     
-    def analyze_structure(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_structure(
+        self,
+        results: Union[List[Dict[str, Any]], pd.DataFrame]
+    ) -> Dict[str, Any]:
         """
         Analyze query result structure
         
         Args:
-            results: List of result rows as dictionaries
+            results: List of result rows as dictionaries, or an already
+                fetched DataFrame
             
         Returns:
             Data structure analysis
         """
-        if not results:
+        if len(results) == 0:
             return {
                 "row_count": 0,
                 "column_count": 0,
@@ -84,7 +90,7 @@ class DataAnalysisService:
             }
         
         # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(results)
+        df = results if isinstance(results, pd.DataFrame) else pd.DataFrame(results)
         
         analysis = {
             "row_count": len(df),
@@ -98,41 +104,150 @@ class DataAnalysisService:
             "cardinality": {}
         }
         
+        # Counts and numeric statistics for every column, shared with the
+        # playbooks that run on the same frame
+        summaries = scan_columns(df)
+        
         # Analyze each column
         for col in df.columns:
+            summary = summaries[col]
             sample_data = df[col].dropna().head(20).tolist()
             col_type = self.infer_column_type(col, sample_data)
             
             analysis["columns"][col] = {
                 "type": col_type,
-                # Convert to native bool to avoid numpy.bool_ serialization issues
-                "nullable": bool(df[col].isna().any())
+                "nullable": summary["null_count"] > 0
             }
             
             # Calculate cardinality
-            unique_count = df[col].nunique()
-            analysis["cardinality"][col] = unique_count
+            analysis["cardinality"][col] = summary["nunique"]
             
             # Categorize columns
             if col_type == "numeric":
                 analysis["numeric_columns"].append(col)
                 # Add statistics
-                numeric_values = pd.to_numeric(df[col], errors='coerce').dropna()
-                if len(numeric_values) > 0:
+                if summary["is_numeric"]:
+                    if summary["count"] > 0:
+                        analysis["columns"][col]["statistics"] = {
+                            "min": summary["min"],
+                            "max": summary["max"],
+                            "mean": summary["mean"],
+                            "median": summary["median"]
+                        }
+                else:
+                    # Numbers stored as text
+                    numeric_values = pd.to_numeric(df[col], errors='coerce').dropna()
+                    if len(numeric_values) > 0:
+                        analysis["columns"][col]["statistics"] = {
+                            "min": float(numeric_values.min()),
+                            "max": float(numeric_values.max()),
+                            "mean": float(numeric_values.mean()),
+                            "median": float(numeric_values.median())
+                        }
+            elif col_type == "categorical":
+                analysis["categorical_columns"].append(col)
+            elif col_type == "datetime":
+                analysis["datetime_columns"].append(col)
+                # Ensure we store a native Python bool, not numpy.bool_
+                analysis["has_time_series"] = True
+            else:
+                analysis["text_columns"].append(col)
+        
+        return analysis
+    
+    def analyze_column_stats(self, column_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the analyze_structure result for a whole table from the column
+        statistics stored at import time, without touching the rows
+        
+        Args:
+            column_stats: Per-column statistics from DatabaseManager.get_column_stats
+            
+        Returns:
+            Data structure analysis (same shape as analyze_structure)
+        """
+        analysis = self.analyze_structure([])
+        row_count = column_stats[0]["row_count"] if column_stats else 0
+        if row_count == 0:
+            return analysis
+        
+        analysis["row_count"] = row_count
+        analysis["column_count"] = len(column_stats)
+        
+        for stats in column_stats:
+            col = stats["column_name"]
+            col_type = self.infer_column_type(col, stats["sample"])
+            
+            analysis["columns"][col] = {
+                "type": col_type,
+                "nullable": stats["null_count"] > 0
+            }
+            analysis["cardinality"][col] = stats["distinct_estimate"]
+            
+            if col_type == "numeric":
+                analysis["numeric_columns"].append(col)
+                if stats["numeric_count"]:
                     analysis["columns"][col]["statistics"] = {
-                        "min": float(numeric_values.min()),
-                        "max": float(numeric_values.max()),
-                        "mean": float(numeric_values.mean()),
-                        "median": float(numeric_values.median())
+                        "min": float(stats["min"]),
+                        "max": float(stats["max"]),
+                        "mean": float(stats["mean"]),
+                        "median": float(stats["median"])
                     }
             elif col_type == "categorical":
                 analysis["categorical_columns"].append(col)
             elif col_type == "datetime":
                 analysis["datetime_columns"].append(col)
-                # Ensure we store a native Python bool, not numpy.bool_
                 analysis["has_time_series"] = True
             else:
                 analysis["text_columns"].append(col)
         
         return analysis
-
+    
+    def analyze_schema(self, table: Dict[str, Any], row_count: int) -> Dict[str, Any]:
+        """
+        Build the analyze_structure result for a whole table from its schema,
+        for datasets without stored column statistics
+        
+        Column types come from the declared types and the schema's sample
+        rows; per-column statistics and cardinality are not available.
+        
+        Args:
+            table: Table entry from DatabaseManager.get_schema
+            row_count: Number of rows in the table
+            
+        Returns:
+            Data structure analysis (same shape as analyze_structure)
+        """
+        analysis = self.analyze_structure([])
+        if row_count == 0:
+            return analysis
+        
+        columns = table.get("columns", [])
+        sample_rows = table.get("sample_rows") or []
+        analysis["row_count"] = row_count
+        analysis["column_count"] = len(columns)
+        
+        for column in columns:
+            col = column["name"]
+            if is_numeric_type(column.get("type")):
+                col_type = "numeric"
+            else:
+                sample_data = [row.get(col) for row in sample_rows if row.get(col) is not None]
+                col_type = self.infer_column_type(col, sample_data)
+            
+            analysis["columns"][col] = {
+                "type": col_type,
+                "nullable": column.get("nullable", True)
+            }
+            
+            if col_type == "numeric":
+                analysis["numeric_columns"].append(col)
+            elif col_type == "categorical":
+                analysis["categorical_columns"].append(col)
+            elif col_type == "datetime":
+                analysis["datetime_columns"].append(col)
+                analysis["has_time_series"] = True
+            else:
+                analysis["text_columns"].append(col)
+        
+        return analysis
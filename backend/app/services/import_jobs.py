@@ -0,0 +1,175 @@
+"""Background CSV import jobs with progress tracking"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+from app.config import settings
+from app.core.database import db_manager
+from app.services.result_cache import invalidate_dataset_results
+from app.utils.csv_importer import CSVImporter
+
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJob:
+    """Progress and outcome of one background CSV import"""
+
+    def __init__(
+        self,
+        user_id: str,
+        dataset_id: str,
+        table_name: Optional[str],
+        total_bytes: Optional[int] = None,
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.dataset_id = dataset_id
+        self.table_name = table_name
+        self.total_bytes = total_bytes
+        self.status = "queued"
+        self.rows_parsed = 0
+        self.rows_inserted = 0
+        self.bytes_read = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    def update(self, rows_parsed: int, rows_inserted: int, bytes_read: int):
+        """Progress callback for CSVImporter.import_csv_stream"""
+        self.rows_parsed = rows_parsed
+        self.rows_inserted = rows_inserted
+        self.bytes_read = bytes_read
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize job state, including throughput and ETA"""
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+
+        rows_per_second = self.rows_inserted / elapsed if elapsed > 0 else None
+        bytes_per_second = self.bytes_read / elapsed if elapsed > 0 else None
+
+        eta_seconds: Optional[float] = None
+        if self.status == "running" and self.total_bytes and bytes_per_second:
+            remaining = max(self.total_bytes - self.bytes_read, 0)
+            eta_seconds = round(remaining / bytes_per_second, 1)
+        elif self.status in ("succeeded", "failed"):
+            eta_seconds = 0.0
+
+        return {
+            "job_id": self.job_id,
+            "user_id": self.user_id,
+            "dataset_id": self.dataset_id,
+            "table_name": self.table_name,
+            "status": self.status,
+            "rows_parsed": self.rows_parsed,
+            "rows_inserted": self.rows_inserted,
+            "bytes_read": self.bytes_read,
+            "total_bytes": self.total_bytes,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(rows_per_second, 1) if rows_per_second is not None else None,
+            "bytes_per_second": round(bytes_per_second, 1) if bytes_per_second is not None else None,
+            "eta_seconds": eta_seconds,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class ImportJobManager:
+    """Runs CSV imports as asyncio tasks so upload requests return immediately"""
+
+    def __init__(self):
+        self.jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.semaphore = asyncio.Semaphore(settings.import_max_concurrent_jobs)
+        self.max_jobs = settings.import_max_tracked_jobs
+
+    def submit(
+        self,
+        user_id: str,
+        dataset_id: str,
+        csv_path: Path,
+        table_name: Optional[str],
+        total_bytes: Optional[int] = None,
+        encoding: str = "utf-8",
+        mode: str = "replace",
+    ) -> ImportJob:
+        """
+        Queue an import of a CSV file already saved to disk
+
+        The file is deleted once the job finishes, whatever the outcome.
+
+        Args:
+            user_id: User identifier
+            dataset_id: Dataset identifier
+            csv_path: Path to the uploaded CSV
+            table_name: Optional table name
+            total_bytes: File size, used for the ETA
+            encoding: File encoding
+            mode: ``replace`` or ``append``
+
+        Returns:
+            The queued job
+        """
+        job = ImportJob(user_id, dataset_id, table_name, total_bytes)
+        self.jobs[job.job_id] = job
+        self._trim()
+
+        task = asyncio.create_task(self._run(job, csv_path, encoding, mode))
+        self.tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(job.job_id, None))
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """Look up a job by id"""
+        return self.jobs.get(job_id)
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the tracking limit"""
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id].status in ("succeeded", "failed"):
+                del self.jobs[job_id]
+
+    async def _run(self, job: ImportJob, csv_path: Path, encoding: str, mode: str):
+        """Run one import, recording progress and the final result"""
+        try:
+            async with self.semaphore:
+                job.status = "running"
+                job.started_at = time.time()
+
+                await db_manager.create_database(job.user_id, job.dataset_id)
+                engine = await db_manager.get_writer_engine(job.user_id, job.dataset_id)
+
+                with open(csv_path, "rb") as source:
+                    job.result = await CSVImporter.import_csv_stream(
+                        engine,
+                        source,
+                        table_name=job.table_name,
+                        encoding=encoding,
+                        progress=job.update,
+                        mode=mode,
+                    )
+                invalidate_dataset_results(job.user_id, job.dataset_id)
+                job.table_name = job.result["table_name"]
+                job.status = "succeeded"
+        except Exception as e:
+            logger.error(f"Import job {job.job_id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            try:
+                csv_path.unlink()
+            except OSError:
+                pass
+
+
+# Global import job manager instance
+import_jobs = ImportJobManager()
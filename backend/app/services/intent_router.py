@@ -0,0 +1,250 @@
+"""Deterministic intent router: plans common questions without the LLM.
+
+Recognizes a handful of common phrasings ("overview", "distribution of X",
+"X vs Y", "compare by Z", "top N drivers of T") against the schema columns
+and returns a fully-formed analysis request. Anything ambiguous, filtered,
+unrecognized, naming columns of the wrong type (a text target for drivers,
+a continuous segment column) or mentioning numeric columns the plan would
+ignore returns None so the LLM planner handles it.
+"""
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from app.utils.sqlite_types import is_numeric_type
+
+
+# Column names that look like an outcome/target label
+OUTCOME_NAMES = {"outcome", "target", "label", "y", "class"}
+
+# Phrases that restrict the analysis to a segment or range; slot-filling
+# those (filter_segment / focus_range) is left to the LLM.
+FILTER_CUES = re.compile(
+    r"\b(?:only|where|between\s+-?\d|greater|less|more than|fewer than|above|below|"
+    r"over|under|older|younger|excluding|except|when|if|without)\b|[<>=]"
+)
+
+# Qualifiers left over outside the recognized phrase ("distribution of age
+# for diabetics") restrict the question in ways the router can't express
+QUALIFIER_CUES = re.compile(r"\b(?:for|among|amongst|with|within|in|where|who|whose|having)\b")
+
+DEEP_CUES = re.compile(r"\b(?:in[- ]depth|detailed|deep|thorough)\b")
+TOP_N = re.compile(r"\btop\s+(\d+)\b")
+BINS = re.compile(r"\b(?:(?:with|in|into|using)\s+)?(\d+)\s+(?:bins|buckets|ranges)\b")
+
+# Plan slots that hold columns
+COLUMN_SLOTS = ("target", "feature", "segment_column", "feature_x", "feature_y")
+
+# {n} is the placeholder for the n-th mentioned column
+COL = r"\{(\d+)\}"
+
+OVERVIEW_PATTERNS = [
+    re.compile(r"\b(?:overview|summary|summari[sz]e|describe)\b"),
+    re.compile(r"\b(?:what(?:'s| is) in|tell me about) (?:the|this|my) (?:data|dataset)\b"),
+]
+RELATIONSHIP_PATTERNS = [
+    re.compile(COL + r"\s+(?:vs\.?|versus|against)\s+" + COL),
+    re.compile(
+        r"\b(?:relationship|relation|correlation|association|link)\s+between\s+"
+        + COL + r"\s+and\s+" + COL
+    ),
+    re.compile(r"\bhow (?:does|do|is|are) " + COL + r"\s+(?:relate|related|vary|change) (?:to|with) " + COL),
+]
+DISTRIBUTION_PATTERNS = [
+    re.compile(r"\b(?:distribution|histogram|spread|range|outliers?)\s+(?:of|for|in)\s+" + COL),
+    re.compile(COL + r"\s+(?:distribution|histogram)\b"),
+    re.compile(r"\bhow is " + COL + r"\s+distributed\b"),
+]
+COMPARE_PATTERNS = [
+    re.compile(r"\b(?:compare|comparing|comparison|break\s*down|split|group)\b.*?\b(?:by|across|between)\s+" + COL),
+    re.compile(COL + r"\s+(?:by|across|per)\s+" + COL),
+]
+DRIVERS_PATTERNS = [
+    re.compile(
+        r"\b(?:drivers?|predictors?|factors?|features?|variables?|columns?)\s+"
+        r"(?:of|for|behind|(?:that|which)\s+(?:affect|drive|predict|influence|impact)s?)\s+" + COL
+    ),
+    re.compile(r"\bwhat\s+(?:drives|affects|predicts|influences|impacts|explains)\s+" + COL),
+    re.compile(r"\b(?:most\s+)?(?:related|correlated|associated)\s+(?:to|with)\s+" + COL),
+]
+OUTCOME_BREAKDOWN_PATTERNS = [
+    re.compile(r"\b(?:class balance|base rate|class distribution)\b"),
+    re.compile(r"\b(?:breakdown|balance|counts?|frequency)\s+of\s+" + COL),
+]
+
+
+def _column_aliases(name: str) -> List[str]:
+    """Lowercase spellings of a column name a user might type"""
+    spaced = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", name).replace("_", " ").lower()
+    return list({name.lower(), spaced, spaced.replace(" ", "")})
+
+
+def find_column_mentions(text: str, columns: List[str]) -> Tuple[str, List[str]]:
+    """
+    Find schema columns mentioned in a (lowercased) question
+
+    Returns:
+        The text with each mention replaced by a ``{n}`` placeholder, and the
+        mentioned column names in order of appearance
+    """
+    candidates = sorted(
+        ((alias, column) for column in columns for alias in _column_aliases(column)),
+        key=lambda item: len(item[0]),
+        reverse=True,
+    )
+    spans: List[Tuple[int, int, str]] = []
+    for alias, column in candidates:
+        pattern = r"(?<![a-z0-9_])" + re.escape(alias) + r"(?![a-z0-9_])"
+        for match in re.finditer(pattern, text):
+            start, end = match.span()
+            if all(end <= s or start >= e for s, e, _ in spans):
+                spans.append((start, end, column))
+
+    spans.sort()
+    mentions: List[str] = []
+    parts: List[str] = []
+    position = 0
+    for start, end, column in spans:
+        parts.append(text[position:start])
+        parts.append("{%d}" % len(mentions))
+        mentions.append(column)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts), mentions
+
+
+def _plan(intent: str, playbook: str, **slots: Any) -> Dict[str, Any]:
+    """Analysis request in the same shape as QueryService.select_analysis"""
+    plan = {
+        "intent": intent,
+        "playbook": playbook,
+        "target": None,
+        "feature": None,
+        "segment_column": None,
+        "feature_x": None,
+        "feature_y": None,
+        "top_n": None,
+        "bins": None,
+        "filter_segment": None,
+        "focus_range": None,
+        "secondary_playbooks": [],
+        "mode": "quick",
+    }
+    plan.update(slots)
+    return plan
+
+
+def _search(patterns: List[re.Pattern], text: str) -> Optional[re.Match]:
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match
+    return None
+
+
+def route_question(user_query: str, schema_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Plan a question with rules only
+
+    Args:
+        user_query: The user's question
+        schema_info: Schema information from the database
+
+    Returns:
+        A fully-formed analysis request, or None when the question isn't
+        confidently recognized (the caller then asks the LLM)
+    """
+    columns = [
+        col
+        for table in schema_info.get("tables", [])
+        for col in table.get("columns", [])
+    ]
+    if not columns:
+        return None
+    numeric = {col["name"] for col in columns if is_numeric_type(col.get("type"))}
+
+    text = re.sub(r"\s+", " ", user_query.strip().lower())
+    template, mentions = find_column_mentions(text, [col["name"] for col in columns])
+    if FILTER_CUES.search(template):
+        return None
+
+    def mentioned(match: re.Match, group: int) -> str:
+        return mentions[int(match.group(group))]
+
+    outcome_columns = [col["name"] for col in columns if col["name"].lower() in OUTCOME_NAMES]
+    default_outcome = outcome_columns[0] if outcome_columns else None
+
+    # Each candidate plan with the match that recognized it
+    plans: List[Tuple[re.Match, Dict[str, Any]]] = []
+
+    match = _search(RELATIONSHIP_PATTERNS, template)
+    if match:
+        x, y = mentioned(match, 1), mentioned(match, 2)
+        if x in numeric and y in numeric and x != y:
+            plans.append((match, _plan("relationship", "relationship", feature_x=x, feature_y=y)))
+
+    match = _search(DISTRIBUTION_PATTERNS, template)
+    if match and mentioned(match, 1) in numeric:
+        bins = BINS.search(template)
+        plans.append((match, _plan(
+            "distribution",
+            "distribution",
+            feature=mentioned(match, 1),
+            bins=max(5, min(int(bins.group(1)), 50)) if bins else None,
+        )))
+
+    match = _search(COMPARE_PATTERNS, template)
+    if match:
+        segment = mentioned(match, match.lastindex)
+        # Segments must be categories; the schema has no cardinality, so the
+        # only numeric column trusted as one is an outcome label
+        if segment in numeric and segment not in outcome_columns:
+            return None
+        measures = [c for c in mentions if c != segment and c in numeric]
+        plans.append((match, _plan(
+            "compare_groups",
+            "segment_comparison",
+            segment_column=segment,
+            target=measures[0] if measures else None,
+        )))
+
+    match = _search(DRIVERS_PATTERNS, template)
+    if match:
+        # Correlations need a numeric target
+        if mentioned(match, 1) not in numeric:
+            return None
+        top_n = TOP_N.search(template)
+        plans.append((match, _plan(
+            "drivers",
+            "correlation",
+            target=mentioned(match, 1),
+            top_n=max(3, min(int(top_n.group(1)), 50)) if top_n else None,
+        )))
+
+    match = _search(OUTCOME_BREAKDOWN_PATTERNS, template)
+    if match:
+        target = mentioned(match, 1) if match.lastindex else default_outcome
+        if target:
+            plans.append((match, _plan("outcome_breakdown", "outcome_breakdown", target=target)))
+
+    match = _search(OVERVIEW_PATTERNS, template)
+    if match and not mentions:
+        plans.append((match, _plan("overview", "overview")))
+
+    # Exactly one confident match; otherwise let the LLM decide
+    if len(plans) != 1:
+        return None
+
+    match, plan = plans[0]
+
+    # Every numeric column the question names must be used by the plan
+    used = {plan[slot] for slot in COLUMN_SLOTS if plan[slot]}
+    if any(column in numeric and column not in used for column in mentions):
+        return None
+
+    # So must every qualifier outside the recognized phrase
+    rest = template[:match.start()] + " " + template[match.end():]
+    if QUALIFIER_CUES.search(TOP_N.sub(" ", BINS.sub(" ", rest))):
+        return None
+
+    if DEEP_CUES.search(text):
+        plan["mode"] = "deep"
+    return plan
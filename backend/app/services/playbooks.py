@@ -2,6 +2,16 @@
 from typing import Dict, Any, List, Optional
 import pandas as pd
 import numpy as np
+from app.utils.column_scan import scan_columns
+from app.utils.column_stats import CrossMoments
+from app.utils.correlation import correlation_matrix, target_correlations
+
+
+# Default cap on points sent for a scatter plot
+SCATTER_MAX_POINTS = 2000
+
+# Complete (feature, outcome) pairs needed before a correlation is reported
+CORRELATION_MIN_PAIRS = 5
 
 
 def overview_playbook(df: pd.DataFrame) -> Dict[str, Any]:
@@ -13,28 +23,67 @@ def overview_playbook(df: pd.DataFrame) -> Dict[str, Any]:
     row_count = len(df)
     col_count = df.shape[1]
 
-    numeric_df = df.select_dtypes(include="number")
+    numeric_columns = df.select_dtypes(include="number").columns.tolist()
+    summaries = scan_columns(df)
     rows = []
 
-    if not numeric_df.empty:
-        for col in numeric_df.columns:
-            series = pd.to_numeric(numeric_df[col], errors="coerce")
-            desc = series.describe()
-            missing_pct = (
-                100.0 * (1.0 - float(series.count()) / row_count) if row_count > 0 else 0.0
-            )
-
-            rows.append(
-                {
-                    "Feature": col,
-                    "Min": round(float(desc.get("min", 0.0)), 2) if "min" in desc else None,
-                    "Max": round(float(desc.get("max", 0.0)), 2) if "max" in desc else None,
-                    "Mean": round(float(desc.get("mean", 0.0)), 2) if "mean" in desc else None,
-                    "Std": round(float(desc.get("std", 0.0)), 2) if "std" in desc else None,
-                    "Missing %": round(missing_pct, 1),
-                }
-            )
+    for col in numeric_columns:
+        summary = summaries[col]
+        missing_pct = (
+            100.0 * (1.0 - float(summary["count"]) / row_count) if row_count > 0 else 0.0
+        )
 
+        rows.append(
+            {
+                "Feature": col,
+                "Min": round(summary["min"], 2),
+                "Max": round(summary["max"], 2),
+                "Mean": round(summary["mean"], 2),
+                "Std": round(summary["std"], 2),
+                "Missing %": round(missing_pct, 1),
+            }
+        )
+
+    return _overview_result(rows, row_count, col_count, numeric_columns)
+
+
+def overview_from_stats(column_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Same overview as overview_playbook, built from the column statistics
+    stored at import time instead of the raw rows (O(columns), not O(rows)).
+    """
+    row_count = column_stats[0]["row_count"] if column_stats else 0
+    numeric_stats = [stats for stats in column_stats if stats["is_numeric"]]
+
+    def rounded(value: Optional[float], digits: int = 2) -> Optional[float]:
+        return round(float(value), digits) if value is not None else None
+
+    rows = [
+        {
+            "Feature": stats["column_name"],
+            "Min": rounded(stats["min"]),
+            "Max": rounded(stats["max"]),
+            "Mean": rounded(stats["mean"]),
+            "Std": rounded(stats["std"]),
+            "Missing %": round(stats["missing_pct"], 1),
+        }
+        for stats in numeric_stats
+    ]
+
+    return _overview_result(
+        rows,
+        row_count,
+        len(column_stats),
+        [stats["column_name"] for stats in numeric_stats],
+    )
+
+
+def _overview_result(
+    rows: List[Dict[str, Any]],
+    row_count: int,
+    col_count: int,
+    numeric_features: List[str],
+) -> Dict[str, Any]:
     visualization = {
         "type": "table",
         "data": {
@@ -50,7 +99,7 @@ def overview_playbook(df: pd.DataFrame) -> Dict[str, Any]:
         "kind": "overview",
         "row_count": row_count,
         "column_count": col_count,
-        "numeric_features": list(numeric_df.columns),
+        "numeric_features": numeric_features,
     }
 
     return {
@@ -59,24 +108,100 @@ def overview_playbook(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
+def matching_moments(
+    moments: Optional[CrossMoments],
+    df: pd.DataFrame,
+    columns: List[str],
+) -> Optional[CrossMoments]:
+    """
+    Return `moments` if they were computed over `df`'s rows and cover `columns`.
+
+    Stored moments describe the whole table, so they don't apply to a
+    filtered or truncated frame.
+    """
+    if moments is None or moments.row_count != len(df):
+        return None
+    if not set(columns) <= set(moments.columns):
+        return None
+    return moments
+
+
+def matching_column_stats(
+    column_stats: Optional[List[Dict[str, Any]]],
+    df: pd.DataFrame,
+    columns: List[str],
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Stored column statistics by column name, if they were computed over
+    `df`'s rows and cover `columns`.
+
+    Like ``matching_moments``, statistics of the whole table don't apply to
+    a filtered or truncated frame.
+    """
+    if not column_stats or column_stats[0]["row_count"] != len(df):
+        return None
+    by_name = {stats["column_name"]: stats for stats in column_stats}
+    if not set(columns) <= set(by_name):
+        return None
+    return by_name
+
+
+def _pick_segment_column(
+    df: pd.DataFrame,
+    column_stats: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[str]:
+    """
+    First low-cardinality (2-6 distinct values) column of `df`
+
+    Distinct counts come from the stored statistics when they describe
+    `df`; otherwise columns are scanned one at a time until one qualifies.
+    """
+    stored = matching_column_stats(column_stats, df, list(df.columns))
+    for col in df.columns:
+        if stored is not None:
+            unique_vals = stored[col]["distinct_estimate"] or 0
+        else:
+            unique_vals = scan_columns(df, [col])[col]["nunique"]
+        if 2 <= unique_vals <= 6:
+            return col
+    return None
+
+
 def correlation_playbook(
     df: pd.DataFrame,
     outcome: str = "Outcome",
     top_n: int = 5,
+    include_matrix: bool = False,
+    moments: Optional[CrossMoments] = None,
 ) -> Dict[str, Any]:
     """
     Analyze which numeric features are most related to the outcome.
 
-    Returns a bar chart of top |correlation| with outcome, and embeds the full
-    correlation matrix in metadata for optional advanced views.
+    Returns a bar chart of top |correlation| with outcome. Each feature is
+    correlated over the rows where it and the outcome are both present
+    (missing values elsewhere don't drop the row). Only the outcome's
+    correlations are computed for the ranking; the full correlation matrix is
+    embedded in metadata for advanced views when `include_matrix` is set.
+    Correlations come from the table's stored `moments` without reading rows
+    when they cover `df`.
     """
-    num_df = df.select_dtypes(include="number").dropna()
-    if outcome not in num_df.columns or num_df.shape[0] < 5:
+    numeric_columns = df.select_dtypes(include="number").columns.tolist()
+    moments = matching_moments(moments, df, numeric_columns)
+    if moments is not None:
+        moments = moments.subset(numeric_columns)
+
+    outcome_count = 0
+    if outcome in numeric_columns:
+        outcome_count = (
+            moments.present_count(outcome) if moments is not None
+            else int(df[outcome].notna().sum())
+        )
+    if outcome_count < CORRELATION_MIN_PAIRS:
         return {
             "visualization": {
                 "type": "table",
                 "data": {
-                    "columns": num_df.columns.tolist(),
+                    "columns": numeric_columns,
                     "rows": [],
                 },
                 "config": {
@@ -89,12 +214,16 @@ def correlation_playbook(
             },
         }
 
-    corrs = num_df.corr()[outcome].drop(labels=[outcome]).dropna()
+    if moments is not None:
+        corrs = moments.target_correlations(outcome, CORRELATION_MIN_PAIRS)
+    else:
+        corrs = target_correlations(df, outcome, numeric_columns, CORRELATION_MIN_PAIRS)
+    corrs = corrs.dropna()
     if corrs.empty:
         return {
             "visualization": {
                 "type": "table",
-                "data": {"columns": num_df.columns.tolist(), "rows": []},
+                "data": {"columns": numeric_columns, "rows": []},
                 "config": {"title": "No meaningful correlations found"},
             },
             "analysis_context": {
@@ -110,11 +239,6 @@ def correlation_playbook(
     labels = top.index.tolist()
     values = [round(float(v), 2) for v in top.values]
 
-    # Full matrix for advanced/optional use
-    corr_matrix = num_df.corr().fillna(0.0)
-    matrix_labels = corr_matrix.columns.tolist()
-    matrix = corr_matrix.values.tolist()
-
     visualization = {
         "type": "bar",
         "data": {
@@ -129,13 +253,19 @@ def correlation_playbook(
             "xField": "Feature",
             "yField": "Correlation",
         },
-        "metadata": {
+    }
+    if include_matrix:
+        # Full matrix for advanced/optional use
+        if moments is not None:
+            matrix = moments.correlation_matrix()
+        else:
+            matrix = correlation_matrix(df, numeric_columns)
+        visualization["metadata"] = {
             "correlation_matrix": {
-                "labels": matrix_labels,
-                "matrix": matrix,
+                "labels": numeric_columns,
+                "matrix": np.nan_to_num(matrix, nan=0.0).tolist(),
             }
-        },
-    }
+        }
 
     analysis_context = {
         "kind": "correlation",
@@ -153,9 +283,13 @@ def distribution_playbook(
     df: pd.DataFrame,
     feature: Optional[str] = None,
     bins: int = 10,
+    column_stats: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Explore the distribution of a single numeric feature with a histogram.
+
+    The summary figures come from the table's stored column statistics when
+    they still describe ``df``, else from a scan of the feature alone.
     """
     numeric_df = df.select_dtypes(include="number")
     if numeric_df.empty:
@@ -220,14 +354,19 @@ def distribution_playbook(
         },
     }
 
+    stored = matching_column_stats(column_stats, df, [feature])
+    if stored is not None and stored[feature]["numeric_count"]:
+        summary = {**stored[feature], "count": stored[feature]["numeric_count"]}
+    else:
+        summary = scan_columns(df, [feature])[feature]
     analysis_context = {
         "kind": "distribution",
         "feature": feature,
-        "row_count": int(series.shape[0]),
-        "min": round(float(series.min()), 2),
-        "max": round(float(series.max()), 2),
-        "mean": round(float(series.mean()), 2),
-        "median": round(float(series.median()), 2),
+        "row_count": summary["count"],
+        "min": round(summary["min"], 2),
+        "max": round(summary["max"], 2),
+        "mean": round(summary["mean"], 2),
+        "median": round(summary["median"], 2),
     }
 
     return {
@@ -301,6 +440,7 @@ def segment_comparison_playbook(
     df: pd.DataFrame,
     segment_column: Optional[str] = None,
     outcome: Optional[str] = None,
+    column_stats: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Compare two cohorts on a key metric (ideally the outcome rate).
@@ -310,11 +450,7 @@ def segment_comparison_playbook(
     """
     if segment_column is None or segment_column not in df.columns:
         # Fallback: pick first low-cardinality categorical-like column
-        for col in df.columns:
-            unique_vals = df[col].nunique(dropna=True)
-            if 2 <= unique_vals <= 6:
-                segment_column = col
-                break
+        segment_column = _pick_segment_column(df, column_stats)
 
     if segment_column is None or segment_column not in df.columns:
         return {
@@ -560,13 +696,63 @@ def feature_outcome_profile_playbook(
     }
 
 
+def scatter_sample_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Choose at most `max_points` points of a scatter plot that keep its shape
+
+    Half the budget goes to a 2D grid over the data range: one point from
+    every occupied cell, so sparse regions and outliers stay visible. The
+    rest is a uniform random sample of the remaining points, so dense
+    regions still look dense.
+
+    Returns:
+        Sorted positions of the chosen points
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+
+    rng = np.random.default_rng(seed)
+    grid = max(1, int(np.sqrt(max_points / 2)))
+
+    def cell(values: np.ndarray) -> np.ndarray:
+        lo, hi = values.min(), values.max()
+        if hi <= lo:
+            return np.zeros(len(values), dtype=np.int64)
+        return np.minimum(((values - lo) / (hi - lo) * grid).astype(np.int64), grid - 1)
+
+    order = rng.permutation(n)
+    cells = (cell(x) * grid + cell(y))[order]
+    _, first = np.unique(cells, return_index=True)
+    chosen = order[first]
+
+    remaining = max_points - len(chosen)
+    if remaining > 0:
+        available = np.ones(n, dtype=bool)
+        available[chosen] = False
+        rest = np.flatnonzero(available)
+        chosen = np.concatenate([chosen, rng.choice(rest, size=remaining, replace=False)])
+    return np.sort(chosen)
+
+
 def relationship_playbook(
     df: pd.DataFrame,
     feature_x: Optional[str] = None,
     feature_y: Optional[str] = None,
+    max_points: int = SCATTER_MAX_POINTS,
+    moments: Optional[CrossMoments] = None,
 ) -> Dict[str, Any]:
     """
     Show the relationship between two numeric features using a scatter plot.
+
+    The correlation uses every valid pair (read from the table's stored
+    `moments` when they cover `df`); the plotted points are reduced to at
+    most `max_points` with `scatter_sample_indices`.
     """
     num_df = df.select_dtypes(include="number")
     if num_df.shape[1] < 2:
@@ -589,8 +775,8 @@ def relationship_playbook(
     x_series = pd.to_numeric(df[feature_x], errors="coerce")
     y_series = pd.to_numeric(df[feature_y], errors="coerce")
     mask = x_series.notna() & y_series.notna()
-    x_values = x_series[mask].tolist()
-    y_values = y_series[mask].tolist()
+    x_values = x_series[mask].to_numpy(dtype=np.float64)
+    y_values = y_series[mask].to_numpy(dtype=np.float64)
 
     if len(x_values) < 5:
         return {
@@ -607,17 +793,25 @@ def relationship_playbook(
             },
         }
 
-    # Simple Pearson correlation as a numeric summary
-    try:
-        corr = float(pd.Series(x_values).corr(pd.Series(y_values)))
-    except Exception:
-        corr = None
+    # Simple Pearson correlation as a numeric summary (on all points)
+    moments = matching_moments(moments, df, [feature_x, feature_y])
+    if moments is not None:
+        corr = moments.correlation(feature_x, feature_y)
+    else:
+        try:
+            corr = float(pd.Series(x_values).corr(pd.Series(y_values)))
+        except Exception:
+            corr = None
+        if corr is not None and np.isnan(corr):
+            corr = None
+
+    shown = scatter_sample_indices(x_values, y_values, max_points)
 
     visualization = {
         "type": "scatter",
         "data": {
-            "x": x_values,
-            "y": y_values,
+            "x": x_values[shown].tolist(),
+            "y": y_values[shown].tolist(),
         },
         "config": {
             "title": f"{feature_y} vs {feature_x}",
@@ -635,6 +829,7 @@ def relationship_playbook(
         "feature_y": feature_y,
         "correlation": round(corr, 3) if corr is not None else None,
         "point_count": len(x_values),
+        "plotted_points": len(shown),
     }
 
     return {
@@ -647,6 +842,7 @@ def segmented_distribution_playbook(
     df: pd.DataFrame,
     feature: Optional[str] = None,
     segment_column: Optional[str] = None,
+    column_stats: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Show how the distribution/average of a numeric feature differs across segments.
@@ -687,11 +883,7 @@ def segmented_distribution_playbook(
 
     # Infer segment column if needed
     if segment_column is None or segment_column not in df.columns:
-        for col in df.columns:
-            unique_vals = df[col].nunique(dropna=True)
-            if 2 <= unique_vals <= 6:
-                segment_column = col
-                break
+        segment_column = _pick_segment_column(df, column_stats)
 
     if segment_column is None or segment_column not in df.columns:
         return {
@@ -707,8 +899,9 @@ def segmented_distribution_playbook(
             },
         }
 
-    grouped = df.groupby(segment_column)[feature]
-    means = grouped.mean().dropna()
+    # Every per-segment statistic in one grouped pass
+    segment_stats = df.groupby(segment_column)[feature].agg(["count", "mean", "median", "min", "max"])
+    means = segment_stats["mean"].dropna()
     if means.empty:
         return {
             "visualization": {
@@ -744,21 +937,17 @@ def segmented_distribution_playbook(
     }
 
     # Basic per-segment summary stats
-    summaries: List[Dict[str, Any]] = []
-    for seg, series in grouped:
-        s = pd.to_numeric(series, errors="coerce").dropna()
-        if s.empty:
-            continue
-        summaries.append(
-            {
-                "segment": str(seg),
-                "count": int(s.shape[0]),
-                "mean": round(float(s.mean()), 2),
-                "median": round(float(s.median()), 2),
-                "min": round(float(s.min()), 2),
-                "max": round(float(s.max()), 2),
-            }
-        )
+    summaries: List[Dict[str, Any]] = [
+        {
+            "segment": str(seg),
+            "count": int(row["count"]),
+            "mean": round(float(row["mean"]), 2),
+            "median": round(float(row["median"]), 2),
+            "min": round(float(row["min"]), 2),
+            "max": round(float(row["max"]), 2),
+        }
+        for seg, row in segment_stats[segment_stats["count"] > 0].iterrows()
+    ]
 
     analysis_context = {
         "kind": "segmented_distribution",
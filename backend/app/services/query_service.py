@@ -1,16 +1,40 @@
 """Query service: analysis planning via playbooks (no SQL generation)."""
+import copy
+import hashlib
 import logging
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Tuple
+from app.config import settings
 from app.core.llm import LLMClient
+from app.services.intent_router import route_question
+from app.utils.cache import TTLCache
 from app.utils.schema_parser import build_schema_context
 
 
+def normalize_question(user_query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    normalized = re.sub(r"\s+", " ", user_query.strip().lower())
+    return normalized.rstrip("?!. ")
+
+
+def plan_cache_key(user_query: str, schema_context: str) -> Tuple[str, str]:
+    """Cache key for a plan: normalized question + schema fingerprint"""
+    fingerprint = hashlib.sha256(schema_context.encode("utf-8")).hexdigest()
+    return normalize_question(user_query), fingerprint
+
+
 class QueryService:
     """Service for planning which analysis playbook to run."""
 
     def __init__(self):
         self.llm = LLMClient()
         self.logger = logging.getLogger(__name__)
+        # Validated plans, so repeated questions skip the LLM round trip
+        self.plan_cache = TTLCache(
+            max_entries=settings.planner_cache_max_entries,
+            ttl_seconds=settings.planner_cache_ttl_seconds,
+        )
+        self.router_metrics = {"routed": 0, "fallbacks": 0}
 
     async def select_analysis(
         self,
@@ -21,9 +45,43 @@ class QueryService:
         Use the LLM to select an analysis playbook and fill in high-level slots.
 
         The LLM does NOT write SQL. It only chooses which playbook to use and
-        which columns (target/measures) to focus on.
+        which columns (target/measures) to focus on. Common phrasings are
+        planned by the deterministic intent router without calling the LLM,
+        and validated LLM plans are cached by normalized question and schema
+        fingerprint.
         """
+        if settings.intent_router_enabled:
+            routed = route_question(user_query, schema_info)
+            if routed is not None:
+                self.router_metrics["routed"] += 1
+                return routed
+            self.router_metrics["fallbacks"] += 1
+
         schema_context = build_schema_context(schema_info)
+        key = plan_cache_key(user_query, schema_context)
+
+        cached = self.plan_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        plan, cacheable = await self._plan_with_llm(user_query, schema_info, schema_context)
+        if cacheable:
+            self.plan_cache.set(key, copy.deepcopy(plan))
+        return plan
+
+    async def _plan_with_llm(
+        self,
+        user_query: str,
+        schema_info: Dict[str, Any],
+        schema_context: str
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Ask the LLM for a plan and validate it
+
+        Returns:
+            The validated plan, and whether it may be cached (fallback plans
+            for malformed LLM output are not)
+        """
         lower_query = user_query.lower()
 
         playbook_descriptions = """
@@ -123,7 +181,7 @@ Rules:
                 "playbook": "overview",
                 "target": None,
                 "mode": "quick",
-            }
+            }, False
 
         intent = response.get("intent", "overview")
         playbook = response.get("playbook")  # may be None; we'll map from intent if needed
@@ -263,5 +321,5 @@ Rules:
             "focus_range": focus_range,
             "secondary_playbooks": secondary_playbooks,
             "mode": mode,
-        }
+        }, True
 
@@ -0,0 +1,59 @@
+"""Cache of computed query results, keyed by dataset version and plan"""
+import json
+from typing import Any, Dict, Hashable, List, Tuple
+from app.config import settings
+from app.utils.cache import SizedLRUCache
+
+
+# Planner slots that change what the playbooks compute
+PLAN_SLOTS = (
+    "target",
+    "feature",
+    "segment_column",
+    "feature_x",
+    "feature_y",
+    "top_n",
+    "bins",
+    "filter_segment",
+    "focus_range",
+)
+
+
+def result_cache_key(
+    user_id: str,
+    dataset_id: str,
+    data_version: Tuple[int, ...],
+    playbook_name: str,
+    analysis_request: Dict[str, Any],
+    secondary_playbooks: List[str],
+    include_correlation_matrix: bool = False,
+) -> Hashable:
+    """
+    Key for one plan's results on one version of a dataset
+
+    Slots are normalized to canonical JSON so equivalent plans (key order,
+    missing vs null slots) share an entry.
+    """
+    slots = {
+        slot: analysis_request.get(slot)
+        for slot in PLAN_SLOTS
+        if analysis_request.get(slot) is not None
+    }
+    return (
+        user_id,
+        dataset_id,
+        data_version,
+        playbook_name,
+        json.dumps(slots, sort_keys=True, default=str),
+        tuple(secondary_playbooks),
+        include_correlation_matrix,
+    )
+
+
+def invalidate_dataset_results(user_id: str, dataset_id: str) -> int:
+    """Drop every cached result for a dataset (after upload or delete)"""
+    return result_cache.invalidate(lambda key: key[0] == user_id and key[1] == dataset_id)
+
+
+# Global result cache instance
+result_cache = SizedLRUCache(settings.result_cache_max_bytes)
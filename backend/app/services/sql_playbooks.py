@@ -0,0 +1,563 @@
+"""SQL-compiled versions of the aggregate-only analysis playbooks.
+
+These mirror the pandas playbooks in ``playbooks.py`` but push the heavy
+lifting (bucketing, grouping, counting, averaging) down into SQLite so only
+the aggregated rows leave the database. The returned dicts have the same
+``visualization`` / ``analysis_context`` shape as the pandas versions, plus
+the ``sql`` and ``rows`` of the main aggregate statement.
+"""
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+import numpy as np
+from app.utils.sqlite_types import is_numeric_type
+
+
+# Playbooks that can be answered from aggregates alone
+SQL_PLAYBOOKS = {
+    "distribution",
+    "outcome_breakdown",
+    "segment_comparison",
+    "segmented_distribution",
+}
+
+Fetch = Callable[[str, Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]
+
+
+def quote_identifier(name: str) -> str:
+    """Quote an SQLite identifier (table or column name)"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _numeric_value(column: str) -> str:
+    """SQL predicate keeping only real numeric values (mirrors to_numeric(errors='coerce'))"""
+    return f"typeof({column}) IN ('integer', 'real')"
+
+
+def build_where_clause(
+    columns: List[Dict[str, Any]],
+    filter_segment: Optional[Dict[str, Any]] = None,
+    focus_range: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Translate the planner's filters into SQL predicates.
+
+    Args:
+        columns: Column info from the schema (``name``/``type`` dicts)
+        filter_segment: Optional equality filter ``{"column", "value"}``
+        focus_range: Optional numeric range ``{"feature", "min", "max"}``
+
+    Returns:
+        Tuple of (list of predicates, bound parameters)
+    """
+    names = {col["name"] for col in columns}
+    predicates: List[str] = []
+    params: Dict[str, Any] = {}
+
+    if isinstance(filter_segment, dict):
+        col = filter_segment.get("column")
+        value = filter_segment.get("value")
+        if col in names and isinstance(value, (str, int, float, bool)):
+            predicates.append(f"{quote_identifier(col)} = :filter_value")
+            params["filter_value"] = value
+
+    if isinstance(focus_range, dict):
+        fr_feature = focus_range.get("feature")
+        fr_min = focus_range.get("min")
+        fr_max = focus_range.get("max")
+        if (
+            fr_feature in names
+            and isinstance(fr_min, (int, float))
+            and isinstance(fr_max, (int, float))
+        ):
+            col = quote_identifier(fr_feature)
+            predicates.append(f"{_numeric_value(col)} AND {col} BETWEEN :focus_min AND :focus_max")
+            params["focus_min"] = fr_min
+            params["focus_max"] = fr_max
+
+    return predicates, params
+
+
+class SQLPlaybookRunner:
+    """Runs aggregate playbooks as SQL against a single table"""
+
+    def __init__(
+        self,
+        fetch: Fetch,
+        table_name: str,
+        columns: List[Dict[str, Any]],
+        filter_segment: Optional[Dict[str, Any]] = None,
+        focus_range: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            fetch: Coroutine ``(sql, params) -> rows`` executing a read query
+            table_name: Table to aggregate over
+            columns: Column info from the schema, in table order
+            filter_segment: Optional planner equality filter
+            focus_range: Optional planner numeric range filter
+        """
+        self.fetch = fetch
+        self.table = quote_identifier(table_name)
+        self.columns = columns
+        self.column_names = [col["name"] for col in columns]
+        self.numeric_columns = [
+            col["name"] for col in columns if is_numeric_type(col.get("type"))
+        ]
+        self.predicates, self.params = build_where_clause(columns, filter_segment, focus_range)
+
+    def _where(self, *extra: str) -> str:
+        """Build a WHERE clause from the planner filters plus extra predicates"""
+        predicates = [f"({p})" for p in [*self.predicates, *extra]]
+        return f" WHERE {' AND '.join(predicates)}" if predicates else ""
+
+    async def _query(self, sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return await self.fetch(sql, {**self.params, **(params or {})})
+
+    async def run(self, playbook_name: str, **slots: Any) -> Dict[str, Any]:
+        """
+        Dispatch to the SQL version of a playbook.
+
+        Args:
+            playbook_name: One of ``SQL_PLAYBOOKS``
+            **slots: Planner slots (feature, bins, outcome, segment_column)
+
+        Returns:
+            Playbook result dict with ``sql`` and ``rows`` of the main aggregate
+        """
+        if playbook_name == "distribution":
+            return await self.distribution(feature=slots.get("feature"), bins=slots.get("bins") or 10)
+        if playbook_name == "outcome_breakdown":
+            return await self.outcome_breakdown(outcome=slots.get("outcome"))
+        if playbook_name == "segment_comparison":
+            return await self.segment_comparison(
+                segment_column=slots.get("segment_column"),
+                outcome=slots.get("outcome"),
+            )
+        if playbook_name == "segmented_distribution":
+            return await self.segmented_distribution(
+                feature=slots.get("feature"),
+                segment_column=slots.get("segment_column"),
+            )
+        raise ValueError(f"Playbook '{playbook_name}' has no SQL implementation")
+
+    def _pick_feature(self, feature: Optional[str], preferred: set) -> str:
+        """Mirror the pandas playbooks' numeric feature fallback"""
+        if feature and feature in self.numeric_columns:
+            return feature
+        for col in self.numeric_columns:
+            if col.lower() in preferred:
+                return col
+        return self.numeric_columns[0]
+
+    async def _pick_segment_column(self, segment_column: Optional[str]) -> Optional[str]:
+        """Pick the first low-cardinality column, with one COUNT(DISTINCT) scan for all columns"""
+        if segment_column in self.column_names:
+            return segment_column
+        if not self.column_names:
+            return None
+
+        distinct_exprs = ", ".join(
+            f"COUNT(DISTINCT {quote_identifier(col)}) AS c{i}"
+            for i, col in enumerate(self.column_names)
+        )
+        rows = await self._query(f"SELECT {distinct_exprs} FROM {self.table}{self._where()}")
+        if not rows:
+            return None
+        for i, col in enumerate(self.column_names):
+            if 2 <= int(rows[0][f"c{i}"] or 0) <= 6:
+                return col
+        return None
+
+    async def _median(self, value_col: str, group_col: Optional[str] = None) -> Dict[Any, float]:
+        """Compute (per-group) medians with a window function instead of fetching values"""
+        partition = f"PARTITION BY {group_col} " if group_col else ""
+        group_select = f"{group_col} AS grp" if group_col else "NULL AS grp"
+        extra = [_numeric_value(value_col)]
+        if group_col:
+            extra.append(f"{group_col} IS NOT NULL")
+        sql = (
+            f"SELECT grp, AVG(v) AS median FROM ("
+            f"SELECT {group_select}, {value_col} AS v, "
+            f"ROW_NUMBER() OVER ({partition}ORDER BY {value_col}) AS rn, "
+            f"COUNT(*) OVER ({partition.strip()}) AS cnt "
+            f"FROM {self.table}{self._where(*extra)}"
+            f") WHERE rn IN ((cnt + 1) / 2, (cnt + 2) / 2) GROUP BY grp"
+        )
+        rows = await self._query(sql)
+        return {row["grp"]: float(row["median"]) for row in rows if row["median"] is not None}
+
+    async def distribution(self, feature: Optional[str] = None, bins: int = 10) -> Dict[str, Any]:
+        """Histogram of a numeric feature using SQL bucket expressions"""
+        if not self.numeric_columns:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [], "rows": []},
+                    "config": {"title": "No numeric columns available for distribution"},
+                },
+                "analysis_context": {"kind": "distribution", "reason": "no_numeric_columns"},
+            }
+
+        feature = self._pick_feature(feature, {"age", "score", "amount", "value", "glucose", "bmi"})
+        col = quote_identifier(feature)
+
+        summary = await self._query(
+            f"SELECT COUNT({col}) AS n, MIN({col}) AS min, MAX({col}) AS max, AVG({col}) AS mean "
+            f"FROM {self.table}{self._where(_numeric_value(col))}"
+        )
+        n = int(summary[0]["n"] or 0) if summary else 0
+        if n == 0:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [feature], "rows": []},
+                    "config": {"title": f"No valid values for {feature}"},
+                },
+                "analysis_context": {
+                    "kind": "distribution",
+                    "feature": feature,
+                    "reason": "no_valid_values",
+                },
+            }
+
+        min_val = float(summary[0]["min"])
+        max_val = float(summary[0]["max"])
+        mean_val = float(summary[0]["mean"])
+
+        # Same bin edges as np.histogram(series, bins=bins)
+        lo, hi = min_val, max_val
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        bin_edges = np.linspace(lo, hi, bins + 1, endpoint=True)
+
+        sql = (
+            f"SELECT MIN(CAST(({col} - :bin_lo) * :bin_norm AS INTEGER), :bin_last) AS bucket, "
+            f"COUNT(*) AS count "
+            f"FROM {self.table}{self._where(_numeric_value(col))} "
+            f"GROUP BY bucket ORDER BY bucket"
+        )
+        rows = await self._query(
+            sql,
+            {"bin_lo": lo, "bin_norm": bins / (hi - lo), "bin_last": bins - 1},
+        )
+
+        counts = [0] * bins
+        for row in rows:
+            bucket = int(row["bucket"])
+            if 0 <= bucket < bins:
+                counts[bucket] += int(row["count"])
+
+        labels: List[str] = []
+        for i in range(len(bin_edges) - 1):
+            left = round(float(bin_edges[i]), 2)
+            right = round(float(bin_edges[i + 1]), 2)
+            labels.append(f"{left}–{right}")
+
+        median = (await self._median(col)).get(None, mean_val)
+
+        visualization = {
+            "type": "histogram",
+            "data": {
+                "labels": labels,
+                "values": counts,
+            },
+            "config": {
+                "title": f"Distribution of {feature}",
+                "xLabel": feature,
+                "yLabel": "Count of rows",
+                "mark": "bar",
+                "bins": bins,
+                "xField": feature,
+                "yField": "count",
+            },
+        }
+
+        analysis_context = {
+            "kind": "distribution",
+            "feature": feature,
+            "row_count": n,
+            "min": round(min_val, 2),
+            "max": round(max_val, 2),
+            "mean": round(mean_val, 2),
+            "median": round(median, 2),
+        }
+
+        return {
+            "visualization": visualization,
+            "analysis_context": analysis_context,
+            "sql": sql,
+            "rows": rows,
+        }
+
+    async def outcome_breakdown(self, outcome: Optional[str] = None) -> Dict[str, Any]:
+        """Class balance of an outcome column via GROUP BY / COUNT"""
+        if not outcome or outcome not in self.column_names:
+            candidate_names = {"outcome", "target", "label", "y"}
+            for col in self.column_names:
+                if col.lower() in candidate_names:
+                    outcome = col
+                    break
+
+        if not outcome or outcome not in self.column_names:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [], "rows": []},
+                    "config": {"title": "No outcome/target column found for breakdown"},
+                },
+                "analysis_context": {"kind": "outcome_breakdown", "reason": "no_outcome"},
+            }
+
+        col = quote_identifier(outcome)
+        sql = (
+            f"SELECT {col} AS value, COUNT(*) AS count "
+            f"FROM {self.table}{self._where(f'{col} IS NOT NULL')} "
+            f"GROUP BY {col} ORDER BY {col}"
+        )
+        rows = await self._query(sql)
+
+        labels = [str(row["value"]) for row in rows]
+        values = [int(row["count"]) for row in rows]
+        total = sum(values)
+
+        visualization = {
+            "type": "pie",
+            "data": {
+                "labels": labels,
+                "values": values,
+            },
+            "config": {
+                "title": f"Outcome breakdown for {outcome}",
+            },
+        }
+
+        percentages = {
+            label: round(float(v) * 100.0 / float(total), 1) if total else 0.0
+            for label, v in zip(labels, values)
+        }
+
+        analysis_context = {
+            "kind": "outcome_breakdown",
+            "outcome": outcome,
+            "counts": dict(zip(labels, values)),
+            "percentages": percentages,
+        }
+
+        return {
+            "visualization": visualization,
+            "analysis_context": analysis_context,
+            "sql": sql,
+            "rows": rows,
+        }
+
+    async def segment_comparison(
+        self,
+        segment_column: Optional[str] = None,
+        outcome: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Compare the two largest segments on mean outcome (or row count)"""
+        segment_column = await self._pick_segment_column(segment_column)
+        if segment_column is None:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [], "rows": []},
+                    "config": {"title": "No suitable segment column found to compare cohorts"},
+                },
+                "analysis_context": {
+                    "kind": "segment_comparison",
+                    "reason": "no_segment_column",
+                },
+            }
+
+        seg = quote_identifier(segment_column)
+        use_outcome = bool(outcome) and outcome in self.numeric_columns
+        mean_expr = f", AVG({quote_identifier(outcome)}) AS mean" if use_outcome else ""
+        sql = (
+            f"SELECT {seg} AS segment, COUNT(*) AS count{mean_expr} "
+            f"FROM {self.table}{self._where(f'{seg} IS NOT NULL')} "
+            f"GROUP BY {seg} ORDER BY count DESC, {seg} LIMIT 2"
+        )
+        rows = await self._query(sql)
+
+        if len(rows) < 2:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [segment_column], "rows": []},
+                    "config": {"title": "Not enough segments to compare"},
+                },
+                "analysis_context": {
+                    "kind": "segment_comparison",
+                    "segment_column": segment_column,
+                    "reason": "single_segment_only",
+                },
+            }
+
+        metric_name = "Row count"
+        segment_values: List[float]
+        if use_outcome:
+            metric_name = f"Average {outcome}"
+            segment_values = [
+                round(float(row["mean"]), 3) if row["mean"] is not None else 0.0 for row in rows
+            ]
+        else:
+            segment_values = [int(row["count"]) for row in rows]
+
+        labels = [str(row["segment"]) for row in rows]
+
+        visualization = {
+            "type": "bar",
+            "data": {
+                "labels": labels,
+                "values": segment_values,
+            },
+            "config": {
+                "title": f"{metric_name} by {segment_column}",
+                "xLabel": segment_column,
+                "yLabel": metric_name,
+            },
+        }
+
+        a, b = segment_values[0], segment_values[1]
+        diff = float(a) - float(b)
+        pct_diff = float(diff) / float(b) if b not in (0, None) else None
+        effect_size = {
+            "segment_a": labels[0],
+            "segment_b": labels[1],
+            "absolute_difference": round(diff, 3),
+            "relative_difference": round(pct_diff, 3) if pct_diff is not None else None,
+        }
+
+        analysis_context = {
+            "kind": "segment_comparison",
+            "segment_column": segment_column,
+            "segments": labels,
+            "metric": metric_name,
+            "values": segment_values,
+            "effect_size": effect_size,
+        }
+
+        return {
+            "visualization": visualization,
+            "analysis_context": analysis_context,
+            "sql": sql,
+            "rows": rows,
+        }
+
+    async def segmented_distribution(
+        self,
+        feature: Optional[str] = None,
+        segment_column: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Per-segment mean/median/min/max of a numeric feature via GROUP BY"""
+        total = await self._query(f"SELECT COUNT(*) AS n FROM {self.table}{self._where()}")
+        if not total or not int(total[0]["n"] or 0):
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [], "rows": []},
+                    "config": {"title": "No data available for segmented distribution"},
+                },
+                "analysis_context": {"kind": "segmented_distribution", "reason": "empty_dataframe"},
+            }
+
+        if not self.numeric_columns:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [], "rows": []},
+                    "config": {"title": "No numeric columns available for segmented distribution"},
+                },
+                "analysis_context": {"kind": "segmented_distribution", "reason": "no_numeric_columns"},
+            }
+
+        feature = self._pick_feature(feature, {"age", "glucose", "bmi", "insulin"})
+        segment_column = await self._pick_segment_column(segment_column)
+
+        if segment_column is None:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [], "rows": []},
+                    "config": {"title": "No suitable segment column found for segmented distribution"},
+                },
+                "analysis_context": {
+                    "kind": "segmented_distribution",
+                    "feature": feature,
+                    "reason": "no_segment_column",
+                },
+            }
+
+        seg = quote_identifier(segment_column)
+        col = quote_identifier(feature)
+        sql = (
+            f"SELECT {seg} AS segment, COUNT({col}) AS count, AVG({col}) AS mean, "
+            f"MIN({col}) AS min, MAX({col}) AS max "
+            f"FROM {self.table}{self._where(f'{seg} IS NOT NULL', _numeric_value(col))} "
+            f"GROUP BY {seg} ORDER BY {seg}"
+        )
+        rows = [row for row in await self._query(sql) if row["mean"] is not None]
+
+        if not rows:
+            return {
+                "visualization": {
+                    "type": "table",
+                    "data": {"columns": [segment_column, feature], "rows": []},
+                    "config": {"title": f"No valid {feature} values for segmented distribution"},
+                },
+                "analysis_context": {
+                    "kind": "segmented_distribution",
+                    "feature": feature,
+                    "segment_column": segment_column,
+                    "reason": "no_valid_values",
+                },
+            }
+
+        medians = await self._median(col, group_col=seg)
+
+        labels = [str(row["segment"]) for row in rows]
+        values = [round(float(row["mean"]), 2) for row in rows]
+
+        visualization = {
+            "type": "bar",
+            "data": {
+                "labels": labels,
+                "values": values,
+            },
+            "config": {
+                "title": f"Average {feature} by {segment_column}",
+                "xLabel": segment_column,
+                "yLabel": f"Average {feature}",
+                "mark": "bar",
+                "xField": segment_column,
+                "yField": f"avg_{feature}",
+            },
+        }
+
+        summaries: List[Dict[str, Any]] = [
+            {
+                "segment": str(row["segment"]),
+                "count": int(row["count"]),
+                "mean": round(float(row["mean"]), 2),
+                "median": round(medians.get(row["segment"], float(row["mean"])), 2),
+                "min": round(float(row["min"]), 2),
+                "max": round(float(row["max"]), 2),
+            }
+            for row in rows
+        ]
+
+        analysis_context = {
+            "kind": "segmented_distribution",
+            "feature": feature,
+            "segment_column": segment_column,
+            "segments": labels,
+            "segment_means": dict(zip(labels, values)),
+            "segment_summaries": summaries,
+        }
+
+        return {
+            "visualization": visualization,
+            "analysis_context": analysis_context,
+            "sql": sql,
+            "rows": rows,
+        }
@@ -1,6 +1,8 @@
 """Visualization service: Chart type selection and configuration"""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import numpy as np
 import pandas as pd
+from app.utils.correlation import correlation_matrix
 
 
 class VisualizationService:
@@ -252,13 +254,10 @@ class VisualizationService:
             if len(informative_cols) < 2:
                 return {"labels": informative_cols, "matrix": []}
 
-            num_df = num_df[informative_cols]
-            corr = num_df.corr().fillna(0.0)
-            labels = list(corr.columns)
-            matrix = corr.values.tolist()
+            matrix = correlation_matrix(num_df, informative_cols)
             return {
-                "labels": labels,
-                "matrix": matrix,
+                "labels": informative_cols,
+                "matrix": np.nan_to_num(matrix, nan=0.0).tolist(),
             }
 
         else:  # table
@@ -0,0 +1,227 @@
+"""In-process and on-disk caches"""
+import json
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire a fixed time after being stored
+
+    Not thread-safe; meant to be used from the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.metrics["misses"] += 1
+            return None
+
+        stored_at, value = entry
+        if self.clock() - stored_at > self.ttl_seconds:
+            del self.entries[key]
+            self.metrics["expirations"] += 1
+            self.metrics["misses"] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.metrics["hits"] += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries beyond the limit"""
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = (self.clock(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry"""
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and the current size"""
+        return {**self.metrics, "entries": len(self.entries)}
+
+
+def approximate_size(value: Any, sample: int = 64) -> int:
+    """
+    Rough deep size in bytes of a JSON-like value
+
+    Long lists and dicts are estimated from an even sample of their items,
+    so sizing a large result set stays cheap.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.items())
+        step = max(1, len(items) // sample)
+        picked = items[::step]
+        if picked:
+            per_item = sum(approximate_size(k) + approximate_size(v) for k, v in picked) / len(picked)
+            size += int(per_item * len(items))
+    elif isinstance(value, (list, tuple)):
+        step = max(1, len(value) // sample)
+        picked = value[::step]
+        if picked:
+            size += int(sum(approximate_size(v) for v in picked) / len(picked) * len(value))
+    return size
+
+
+class SizedLRUCache:
+    """
+    LRU cache bounded by the approximate total size of its values
+
+    Values larger than the whole budget are not stored. Not thread-safe;
+    meant to be used from the event loop.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = approximate_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self.entries: "OrderedDict[Hashable, tuple[int, Any]]" = OrderedDict()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "rejected": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.metrics["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.metrics["hits"] += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries to stay within budget"""
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            self.metrics["rejected"] += 1
+            return
+        self._remove(key)
+        self.entries[key] = (size, value)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (evicted_size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            self.metrics["evictions"] += 1
+
+    def invalidate(self, match: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches; returns how many were dropped"""
+        keys = [key for key in self.entries if match(key)]
+        for key in keys:
+            self._remove(key)
+        self.metrics["invalidations"] += len(keys)
+        return len(keys)
+
+    def clear(self):
+        """Drop every entry"""
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters, the current size and the byte budget"""
+        return {
+            **self.metrics,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class SQLiteCache:
+    """
+    Key/value cache persisted to a local SQLite file, so entries survive restarts
+
+    Values are stored as JSON. Entries expire ``ttl_seconds`` after being
+    stored and only the newest ``max_entries`` are kept. Each call opens its
+    own connection, so it is safe to use from worker threads; the calls are
+    blocking and should be kept off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value, or None if missing or expired"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.clock() - row[1] > self.ttl_seconds:
+                with conn:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def set(self, key: str, value: Any):
+        """Store a value, dropping the oldest entries beyond the limit"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), self.clock()),
+                )
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Drop every entry"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM cache")
+        finally:
+            conn.close()
@@ -0,0 +1,167 @@
+"""Single-pass column statistics, memoized per DataFrame
+
+Overview, structure analysis and several playbooks all need per-column
+counts, distinct counts and min/max/mean/std/median. ``scan_columns``
+computes every one of them for the requested columns at once and keeps the
+result for as long as the DataFrame lives, so all the steps of a request
+that share a frame share one scan of each column instead of each touching
+the columns again.
+
+Numeric columns are copied into column-major float64 batches and sorted
+in place: min, max, median and the distinct count then come from the
+sorted values, and count, sum and std from two vectorized reductions.
+Frames must not be modified after they are scanned.
+"""
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+
+# Bytes of numeric values sorted per batch (bounds the scan's temporaries)
+SCAN_BATCH_BYTES = 64 * 1024 * 1024
+
+ColumnSummary = Dict[str, Any]
+
+
+def _scan_numeric(df: pd.DataFrame, columns: List[str]) -> Dict[str, ColumnSummary]:
+    """Summaries of numeric columns, a batch of columns per sort"""
+    rows = len(df)
+    if rows == 0:
+        empty = {"min": np.nan, "max": np.nan, "sum": 0.0, "mean": np.nan, "std": np.nan, "median": np.nan}
+        return {name: {**_scan_other(df[name]), "is_numeric": True, **empty} for name in columns}
+    batch_columns = max(1, SCAN_BATCH_BYTES // max(rows * 8, 1))
+    summaries: Dict[str, ColumnSummary] = {}
+    for start in range(0, len(columns), batch_columns):
+        names = columns[start:start + batch_columns]
+        values = np.empty((rows, len(names)), dtype=np.float64, order="F")
+        for index, name in enumerate(names):
+            values[:, index] = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Each column is contiguous, so this sorts column by column; NaNs go last
+        values.sort(axis=0)
+
+        count = rows - np.isnan(values).sum(axis=0)
+        total = np.nansum(values, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+            squares = np.nansum(np.square(values - mean), axis=0)
+            std = np.where(count > 1, np.sqrt(squares / (count - 1)), np.nan)
+        last = np.maximum(count - 1, 0)
+        cols = np.arange(len(names))
+        low, high = values[last // 2, cols], values[np.minimum(count // 2, last), cols]
+        changes = (values[1:] != values[:-1]) & (np.arange(rows - 1)[:, None] < last[None, :])
+        nunique = changes.sum(axis=0) + (count > 0)
+
+        for index, name in enumerate(names):
+            present = count[index] > 0
+            summaries[name] = {
+                "is_numeric": True,
+                "count": int(count[index]),
+                "null_count": int(rows - count[index]),
+                "nunique": int(nunique[index]),
+                "min": float(values[0, index]) if present else np.nan,
+                "max": float(values[last[index], index]) if present else np.nan,
+                "sum": float(total[index]),
+                "mean": float(mean[index]),
+                "std": float(std[index]),
+                "median": float((low[index] + high[index]) / 2) if present else np.nan,
+            }
+    return summaries
+
+
+def _scan_other(series: pd.Series) -> ColumnSummary:
+    """Summary of a non-numeric column (counts only)"""
+    count = int(series.count())
+    return {
+        "is_numeric": False,
+        "count": count,
+        "null_count": len(series) - count,
+        "nunique": int(series.nunique(dropna=True)),
+        "min": None,
+        "max": None,
+        "sum": None,
+        "mean": None,
+        "std": None,
+        "median": None,
+    }
+
+
+def compute_column_summaries(
+    df: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+) -> Dict[str, ColumnSummary]:
+    """
+    Statistics of columns of a DataFrame, without memoization
+
+    Args:
+        df: Frame holding the columns
+        columns: Columns to summarize (default: every column of `df`)
+
+    Returns:
+        Per column name, in `columns` order: ``count`` and ``null_count``,
+        ``nunique`` (missing values excluded) and, for numeric columns,
+        ``min``, ``max``, ``sum``, ``mean``, ``std`` (ddof=1) and ``median``
+        (NaN when undefined; None for other columns)
+    """
+    names = list(df.columns) if columns is None else list(columns)
+    subset = df if columns is None else df[names]
+    numeric = subset.select_dtypes(include="number").columns.tolist()
+    summaries = _scan_numeric(subset, numeric) if numeric else {}
+    for name in names:
+        if name not in summaries:
+            summaries[name] = _scan_other(subset[name])
+    return {name: summaries[name] for name in names}
+
+
+class _ScanEntry:
+    """Memoized scan of one live DataFrame, filled in column by column"""
+
+    def __init__(self, df: pd.DataFrame, key: int):
+        self.frame = weakref.ref(df, lambda _, key=key: _scans.pop(key, None))
+        self.shape = (len(df), list(df.columns))
+        self.lock = threading.Lock()
+        self.summaries: Dict[str, ColumnSummary] = {}
+
+
+_scans: Dict[int, _ScanEntry] = {}
+_scans_lock = threading.Lock()
+
+
+def scan_columns(
+    df: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+) -> Dict[str, ColumnSummary]:
+    """
+    Statistics of columns of `df`, each computed once per DataFrame
+
+    Only columns not scanned by an earlier call are computed, so a playbook
+    asking for one feature doesn't pay for the whole frame. Concurrent
+    callers with the same frame (e.g. playbooks on worker threads) wait
+    for one scan rather than each running their own. The entry is dropped
+    when the frame is garbage collected.
+
+    Args:
+        df: Frame holding the columns
+        columns: Columns needed (default: every column of `df`)
+
+    Returns:
+        See ``compute_column_summaries``; callers must not modify it
+    """
+    key = id(df)
+    with _scans_lock:
+        entry = _scans.get(key)
+        if entry is None or entry.frame() is not df or entry.shape != (len(df), list(df.columns)):
+            entry = _ScanEntry(df, key)
+            _scans[key] = entry
+
+    names = list(df.columns) if columns is None else list(columns)
+    with entry.lock:
+        missing = [name for name in names if name not in entry.summaries]
+        if missing:
+            scanned = {**entry.summaries, **compute_column_summaries(df, missing)}
+            # Keep the frame's column order, so a full scan reads like one pass
+            entry.summaries = {name: scanned[name] for name in df.columns if name in scanned}
+        if columns is None:
+            return entry.summaries
+        return {name: entry.summaries[name] for name in names}
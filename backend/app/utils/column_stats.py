@@ -0,0 +1,726 @@
+"""Per-column statistics computed while a CSV is imported
+
+Statistics are accumulated chunk by chunk as the importer streams rows into
+SQLite and are stored in the ``__si_column_stats`` table next to the data,
+so overview and structure analysis read one row per column instead of
+scanning the table. Every statistic is mergeable (counts, sums, moments,
+min/max, HyperLogLog, t-digest, heavy hitters) and the sketch state is
+stored alongside the summary, so appended rows update the statistics
+without rescanning the table. Pairwise sums and cross-products of the
+numeric columns go to ``__si_cross_moments`` (one row per table), so
+correlations are derived without reading rows.
+"""
+import json
+import math
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from app.utils.sqlite_types import is_numeric_type
+
+
+# Tables with this prefix hold SpeakInsights metadata, not user data
+INTERNAL_TABLE_PREFIX = "__si_"
+STATS_TABLE = f"{INTERNAL_TABLE_PREFIX}column_stats"
+MOMENTS_TABLE = f"{INTERNAL_TABLE_PREFIX}cross_moments"
+
+# Quantiles stored for every numeric column
+STATS_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Values kept for type inference, and heavy hitters tracked/reported per column
+SAMPLE_SIZE = 20
+TOP_K_TRACKED = 100
+TOP_K = 10
+
+# Column name -> SQLite type of the stats table, in insert order
+STATS_COLUMNS = [
+    ("table_name", "TEXT NOT NULL"),
+    ("column_name", "TEXT NOT NULL"),
+    ("position", "INTEGER"),
+    ("declared_type", "TEXT"),
+    ("is_numeric", "INTEGER"),
+    ("row_count", "INTEGER"),
+    ("null_count", "INTEGER"),
+    ("numeric_count", "INTEGER"),
+    ("min", "REAL"),
+    ("max", "REAL"),
+    ("sum", "REAL"),
+    ("sum_sq", "REAL"),
+    ("mean", "REAL"),
+    ("m2", "REAL"),
+    ("quantiles", "TEXT"),
+    ("distinct_estimate", "INTEGER"),
+    ("top_values", "TEXT"),
+    ("sample", "TEXT"),
+    # Sketch state, only read back when merging appended rows
+    ("hll_registers", "BLOB"),
+    ("hll_exact", "BLOB"),
+    ("digest_centroids", "BLOB"),
+    ("top_counts", "TEXT"),
+]
+SKETCH_COLUMNS = ("hll_registers", "hll_exact", "digest_centroids", "top_counts")
+SUMMARY_COLUMNS = [name for name, _ in STATS_COLUMNS if name not in SKETCH_COLUMNS]
+
+# Column name -> SQLite type of the cross-moments table, in insert order.
+# ``moments`` holds the count, sum, sum_sq and cross matrices as float64.
+MOMENTS_COLUMNS = [
+    ("table_name", "TEXT PRIMARY KEY"),
+    ("columns", "TEXT NOT NULL"),
+    ("row_count", "INTEGER"),
+    ("shift", "BLOB"),
+    ("moments", "BLOB"),
+]
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized int.bit_length() for uint64 arrays of values below 2**53
+
+    Such values convert to float64 exactly, so frexp's exponent is the
+    bit length.
+    """
+    return np.frexp(values.astype(np.float64))[1]
+
+
+def _to_native(value: Any, integer: bool = False) -> Any:
+    """Convert NumPy scalars to JSON-safe Python values"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if integer and isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _sorted_value_counts(values: np.ndarray) -> pd.Series:
+    """value_counts() for an already sorted array, from its run lengths"""
+    if len(values) == 0:
+        return pd.Series(dtype=np.float64)
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    return pd.Series(counts, index=values[starts])
+
+
+def pearson_from_sums(
+    n: np.ndarray,
+    sum_x: np.ndarray,
+    sum_y: np.ndarray,
+    sum_xx: np.ndarray,
+    sum_yy: np.ndarray,
+    sum_xy: np.ndarray,
+    min_periods: int = 2,
+) -> np.ndarray:
+    """
+    Pearson correlations from (shifted) pair counts, sums and cross sums
+
+    Args:
+        n: Rows where both columns of each pair are present
+        sum_x, sum_y: Sums of each column over those rows
+        sum_xx, sum_yy: Sums of squares over those rows
+        sum_xy: Sums of products over those rows
+        min_periods: Minimum complete pairs for a defined correlation
+
+    Returns:
+        Correlations clipped to [-1, 1] (NaN for constant columns or too few pairs)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - np.square(sum_x) / n
+        var_y = sum_yy - np.square(sum_y) / n
+        # Rounding can leave a tiny variance for a constant column
+        var_x = np.where(var_x > 1e-12 * sum_xx, var_x, np.nan)
+        var_y = np.where(var_y > 1e-12 * sum_yy, var_y, np.nan)
+        corr = cov / np.sqrt(var_x * var_y)
+    corr = np.where(n >= max(min_periods, 2), corr, np.nan)
+    return np.clip(corr, -1.0, 1.0)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over 64-bit value hashes
+
+    Hashes are also kept exactly until there are more than ``exact_limit``
+    distinct ones, so low-cardinality columns get exact counts.
+    """
+
+    def __init__(self, precision: int = 14, exact_limit: int = 4096):
+        # _bit_length needs the per-register bits (64 - precision) to be <= 53
+        self.precision = max(precision, 11)
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+        self.exact_limit = exact_limit
+        self.exact: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+
+    def add_hashes(self, hashes: np.ndarray):
+        """Add a batch of uint64 hashes"""
+        if len(hashes) == 0:
+            return
+        value_bits = 64 - self.precision
+        index = (hashes >> np.uint64(value_bits)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << value_bits) - 1)
+        rank = value_bits - _bit_length(remainder) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+        if self.exact is not None:
+            self.exact = np.union1d(self.exact, hashes)
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+
+    def merge(self, other: "HyperLogLog"):
+        """Fold another sketch (same precision) into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.exact is not None and other.exact is not None:
+            self.exact = np.union1d(self.exact, other.exact)
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+        else:
+            self.exact = None
+
+    def estimate(self) -> float:
+        """Estimated number of distinct values added"""
+        if self.exact is not None:
+            return float(len(self.exact))
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return raw
+
+
+class TDigest:
+    """
+    Merging t-digest for approximate quantiles
+
+    Centroids are clustered with the arcsine scale function, so clusters are
+    small in the tails and the digest stays around ``compression / 2``
+    centroids however many values are added.
+    """
+
+    def __init__(self, compression: int = 200):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def total(self) -> float:
+        return float(self.weights.sum())
+
+    def add(self, values: np.ndarray):
+        """Add a batch of (non-NaN) values"""
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(
+            np.concatenate([self.means, values.astype(np.float64)]),
+            np.concatenate([self.weights, np.ones(len(values))]),
+        )
+
+    def merge(self, other: "TDigest"):
+        """Fold another digest into this one"""
+        if len(other.means) == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        # k is non-decreasing, so each unit interval of k is one contiguous cluster
+        groups = np.floor(k)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile, interpolating between centroid centres"""
+        if len(self.means) == 0:
+            return None
+        if len(self.means) == 1:
+            return float(self.means[0])
+        total = self.total
+        centres = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(
+            q * total,
+            np.r_[0.0, centres, total],
+            np.r_[self.min, self.means, self.max],
+        ))
+
+
+class ColumnStats:
+    """Accumulates the statistics of one column across import chunks"""
+
+    def __init__(self, name: str, declared_type: Optional[str]):
+        self.name = name
+        self.declared_type = declared_type
+        self.is_numeric = is_numeric_type(declared_type)
+        self.null_count = 0
+        self.numeric_count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.distinct = HyperLogLog()
+        self.digest = TDigest()
+        self.top_counts = pd.Series(dtype=np.float64)
+        self.sample: List[Any] = []
+
+    def update(self, series: pd.Series):
+        """Fold one chunk of the column into the statistics"""
+        missing = series.isna()
+        self.null_count += int(missing.sum())
+        present = series[~missing]
+
+        if len(self.sample) < SAMPLE_SIZE:
+            integer = "INT" in (self.declared_type or "").upper()
+            self.sample.extend(
+                _to_native(v, integer) for v in present.head(SAMPLE_SIZE - len(self.sample)).tolist()
+            )
+
+        if self.is_numeric:
+            values = pd.to_numeric(present, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            values = np.sort(values[~np.isnan(values)])
+            self._update_moments(values)
+            self.digest.add(values)
+            self.distinct.add_hashes(pd.util.hash_array(values))
+            self._update_top(_sorted_value_counts(values))
+        else:
+            values = present.astype(str).to_numpy(dtype=object)
+            self.distinct.add_hashes(pd.util.hash_array(values))
+            self._update_top(pd.Series(values, dtype=object).value_counts())
+
+    def merge(self, other: "ColumnStats"):
+        """Fold the statistics of another batch of the same column into these"""
+        self.null_count += other.null_count
+        if other.numeric_count:
+            self._merge_moments(
+                other.numeric_count, other.mean, other.m2,
+                other.sum, other.sum_sq, other.min, other.max,
+            )
+        self.distinct.merge(other.distinct)
+        self.digest.merge(other.digest)
+        if len(other.top_counts):
+            self._update_top(other.top_counts)
+        self.sample.extend(other.sample[:SAMPLE_SIZE - len(self.sample)])
+
+    def _update_moments(self, values: np.ndarray):
+        n = len(values)
+        if n == 0:
+            return
+        chunk_mean = float(values.mean())
+        self._merge_moments(
+            n,
+            chunk_mean,
+            float(np.square(values - chunk_mean).sum()),
+            float(values.sum()),
+            float(np.square(values).sum()),
+            float(values.min()),
+            float(values.max()),
+        )
+
+    def _merge_moments(
+        self,
+        n: int,
+        mean: float,
+        m2: float,
+        total_sum: float,
+        sum_sq: float,
+        low: float,
+        high: float,
+    ):
+        # Chan et al. parallel update keeps the variance numerically stable
+        total = self.numeric_count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.numeric_count * n / total
+        self.numeric_count = total
+
+        self.sum += total_sum
+        self.sum_sq += sum_sq
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def _update_top(self, counts: pd.Series):
+        counts = counts.sort_values(ascending=False, kind="stable").head(TOP_K_TRACKED).astype(np.float64)
+        if len(self.top_counts):
+            counts = self.top_counts.add(counts, fill_value=0)
+        self.top_counts = counts.sort_values(ascending=False, kind="stable").head(TOP_K_TRACKED)
+
+    def to_record(self, table_name: str, position: int, row_count: int) -> tuple:
+        """Row for the stats table, in ``STATS_COLUMNS`` order"""
+        has_values = self.numeric_count > 0
+        integer = "INT" in (self.declared_type or "").upper()
+        quantiles = (
+            {str(q): self.digest.quantile(q) for q in STATS_QUANTILES}
+            if has_values else {}
+        )
+        top_values = [
+            {"value": _to_native(value, integer), "count": int(count)}
+            for value, count in self.top_counts.head(TOP_K).items()
+        ]
+        return (
+            table_name,
+            self.name,
+            position,
+            self.declared_type,
+            int(self.is_numeric),
+            row_count,
+            self.null_count,
+            self.numeric_count,
+            self.min,
+            self.max,
+            self.sum if has_values else None,
+            self.sum_sq if has_values else None,
+            self.mean if has_values else None,
+            self.m2 if has_values else None,
+            json.dumps(quantiles),
+            int(round(self.distinct.estimate())),
+            json.dumps(top_values),
+            json.dumps(self.sample, default=str),
+            self.distinct.registers.tobytes(),
+            self.distinct.exact.tobytes() if self.distinct.exact is not None else None,
+            np.stack([self.digest.means, self.digest.weights]).tobytes(),
+            json.dumps([[_to_native(v), float(c)] for v, c in self.top_counts.items()]),
+        )
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> Optional["ColumnStats"]:
+        """
+        Restore mergeable statistics from a stats table row
+
+        Returns:
+            The restored statistics, or None if the row has no sketch state
+        """
+        if row.get("hll_registers") is None or row.get("digest_centroids") is None:
+            return None
+
+        stats = cls(row["column_name"], row["declared_type"])
+        stats.null_count = row["null_count"]
+        if row["numeric_count"]:
+            stats._merge_moments(
+                row["numeric_count"], row["mean"], row["m2"],
+                row["sum"], row["sum_sq"], row["min"], row["max"],
+            )
+
+        registers = np.frombuffer(row["hll_registers"], dtype=np.uint8).copy()
+        stats.distinct = HyperLogLog(precision=int(np.log2(len(registers))))
+        stats.distinct.registers = registers
+        stats.distinct.exact = (
+            np.frombuffer(row["hll_exact"], dtype=np.uint64).copy()
+            if row.get("hll_exact") is not None else None
+        )
+
+        centroids = np.frombuffer(row["digest_centroids"], dtype=np.float64).reshape(2, -1)
+        stats.digest.means, stats.digest.weights = centroids[0].copy(), centroids[1].copy()
+        if row["numeric_count"]:
+            stats.digest.min, stats.digest.max = row["min"], row["max"]
+
+        top_counts = json.loads(row["top_counts"] or "[]")
+        stats.top_counts = pd.Series(
+            [count for _, count in top_counts],
+            index=pd.Index([value for value, _ in top_counts], dtype=np.float64 if stats.is_numeric else object),
+            dtype=np.float64,
+        )
+        stats.sample = json.loads(row["sample"] or "[]")
+        return stats
+
+
+class CrossMoments:
+    """
+    Pairwise-complete sufficient statistics of a table's numeric columns
+
+    For every pair of columns (i, j), over the rows where both are present:
+    the row count, the sum and sum of squares of column i, and the sum of
+    products. Any Pearson correlation between the columns follows from
+    these in O(1) (the full matrix in O(cols^2)) without reading rows, and
+    appended rows just add to them. Values are stored shifted by a rough
+    per-column centre (the first chunk's mean) so variances derived from
+    the sums don't lose precision to cancellation.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.row_count = 0
+        self.shift = np.zeros(size)
+        self.has_shift = False
+        self.count = np.zeros((size, size))
+        self.sum = np.zeros((size, size))
+        self.sum_sq = np.zeros((size, size))
+        self.cross = np.zeros((size, size))
+
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk of rows into the statistics"""
+        self.row_count += len(df)
+        if not self.columns or len(df) == 0:
+            return
+        values = np.column_stack([
+            pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            for name in self.columns
+        ])
+        present = ~np.isnan(values)
+        if not self.has_shift:
+            counts = present.sum(axis=0)
+            totals = np.where(present, values, 0.0).sum(axis=0)
+            self.shift = np.divide(totals, counts, out=np.zeros(len(self.columns)), where=counts > 0)
+            self.has_shift = True
+
+        centred = np.where(present, values - self.shift, 0.0)
+        if present.all():
+            # No missing values: every pair shares every row
+            self.count += len(values)
+            self.sum += centred.sum(axis=0)[:, None]
+            self.sum_sq += np.einsum("ij,ij->j", centred, centred)[:, None]
+        else:
+            mask = present.astype(np.float64)
+            self.count += mask.T @ mask
+            self.sum += centred.T @ mask
+            self.sum_sq += np.square(centred).T @ mask
+        self.cross += centred.T @ centred
+
+    def merge(self, other: "CrossMoments"):
+        """Fold the statistics of another batch of rows (same columns) into these"""
+        self.row_count += other.row_count
+        if not other.has_shift:
+            return
+        if not self.has_shift:
+            self.shift, self.has_shift = other.shift.copy(), True
+
+        # Re-centre the other batch's sums on this shift: x - a = (x - b) + (b - a)
+        delta = other.shift - self.shift
+        self.count += other.count
+        self.sum += other.sum + other.count * delta[:, None]
+        self.sum_sq += (
+            other.sum_sq
+            + 2 * other.sum * delta[:, None]
+            + other.count * np.square(delta)[:, None]
+        )
+        self.cross += (
+            other.cross
+            + other.sum * delta[None, :]
+            + other.sum.T * delta[:, None]
+            + other.count * np.outer(delta, delta)
+        )
+
+    def subset(self, columns: Sequence[str]) -> "CrossMoments":
+        """Statistics restricted to some of the columns"""
+        index = [self.columns.index(name) for name in columns]
+        subset = CrossMoments(columns)
+        subset.row_count = self.row_count
+        subset.shift = self.shift[index]
+        subset.has_shift = self.has_shift
+        grid = np.ix_(index, index)
+        subset.count = self.count[grid]
+        subset.sum = self.sum[grid]
+        subset.sum_sq = self.sum_sq[grid]
+        subset.cross = self.cross[grid]
+        return subset
+
+    def _correlations(self, rows: Any, cols: Any, min_periods: int = 2) -> np.ndarray:
+        """Correlations for (broadcast) index arrays of column pairs"""
+        return pearson_from_sums(
+            self.count[rows, cols],
+            self.sum[rows, cols],
+            self.sum[cols, rows],
+            self.sum_sq[rows, cols],
+            self.sum_sq[cols, rows],
+            self.cross[rows, cols],
+            min_periods,
+        )
+
+    def correlation(self, x: str, y: str) -> Optional[float]:
+        """Correlation of two columns over the rows where both are present"""
+        value = float(self._correlations(self.columns.index(x), self.columns.index(y)))
+        return None if math.isnan(value) else value
+
+    def target_correlations(self, target: str, min_periods: int = 2) -> pd.Series:
+        """Correlation of every other column with ``target`` (NaN where undefined)"""
+        index = self.columns.index(target)
+        corr = self._correlations(
+            np.full(len(self.columns), index), np.arange(len(self.columns)), min_periods
+        )
+        return pd.Series(corr, index=self.columns).drop(labels=[target])
+
+    def correlation_matrix(self) -> np.ndarray:
+        """Full correlation matrix in column order (NaN where undefined)"""
+        index = np.arange(len(self.columns))
+        return self._correlations(index[:, None], index[None, :])
+
+    def present_count(self, name: str) -> int:
+        """Number of non-missing values of a column"""
+        index = self.columns.index(name)
+        return int(self.count[index, index])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the statistics' arrays"""
+        return sum(array.nbytes for array in (self.shift, self.count, self.sum, self.sum_sq, self.cross))
+
+    def variances(self) -> pd.Series:
+        """Sample variance of each column over its non-missing values"""
+        diag = np.arange(len(self.columns))
+        n = self.count[diag, diag]
+        sums = self.sum[diag, diag]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = (self.sum_sq[diag, diag] - np.square(sums) / n) / (n - 1)
+        return pd.Series(np.where(n >= 2, np.maximum(var, 0.0), np.nan), index=self.columns)
+
+    def to_record(self, table_name: str) -> tuple:
+        """Row for the cross-moments table, in ``MOMENTS_COLUMNS`` order"""
+        return (
+            table_name,
+            json.dumps(self.columns),
+            self.row_count,
+            self.shift.tobytes() if self.has_shift else None,
+            np.stack([self.count, self.sum, self.sum_sq, self.cross]).tobytes(),
+        )
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "CrossMoments":
+        """Restore the statistics from a cross-moments table row"""
+        moments = cls(json.loads(row["columns"]))
+        moments.row_count = row["row_count"]
+        if row.get("shift") is not None:
+            moments.shift = np.frombuffer(row["shift"], dtype=np.float64).copy()
+            moments.has_shift = True
+        size = len(moments.columns)
+        stacked = np.frombuffer(row["moments"], dtype=np.float64).reshape(4, size, size)
+        moments.count, moments.sum, moments.sum_sq, moments.cross = (m.copy() for m in stacked)
+        return moments
+
+
+class TableStats:
+    """Column statistics for a table being imported or appended to"""
+
+    def __init__(self, columns: Sequence[str], declared_types: Sequence[Optional[str]]):
+        self.columns = {
+            name: ColumnStats(name, declared_type)
+            for name, declared_type in zip(columns, declared_types)
+        }
+        self.moments = CrossMoments(
+            [name for name, stats in self.columns.items() if stats.is_numeric]
+        )
+        self.row_count = 0
+
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk of rows into every column's statistics"""
+        self.row_count += len(df)
+        for name, stats in self.columns.items():
+            stats.update(df[name])
+        self.moments.update(df)
+
+    def merge(self, other: "TableStats"):
+        """Fold the statistics of another batch of rows into these"""
+        self.row_count += other.row_count
+        for name, stats in self.columns.items():
+            stats.merge(other.columns[name])
+        self.moments.merge(other.moments)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: List[Dict[str, Any]],
+        columns: Sequence[str],
+        declared_types: Sequence[Optional[str]],
+        moments_row: Optional[Dict[str, Any]] = None,
+    ) -> Optional["TableStats"]:
+        """
+        Restore a table's statistics from its stats table rows
+
+        Returns:
+            The restored statistics, or None if any column is missing or
+            has no sketch state, or the cross moments are missing or cover
+            other columns (the table then needs a rescan)
+        """
+        by_name = {row["column_name"]: row for row in rows}
+        table_stats = cls(columns, declared_types)
+        if moments_row is None:
+            return None
+        moments = CrossMoments.from_row(moments_row)
+        if moments.columns != table_stats.moments.columns:
+            return None
+        table_stats.moments = moments
+        for name in columns:
+            row = by_name.get(name)
+            stats = ColumnStats.from_row(row) if row is not None else None
+            if stats is None:
+                return None
+            table_stats.columns[name] = stats
+            table_stats.row_count = row["row_count"]
+        return table_stats
+
+    def records(self, table_name: str, columns: Sequence[str]) -> List[tuple]:
+        """Stats table rows for the given (kept) columns"""
+        return [
+            self.columns[name].to_record(table_name, position, self.row_count)
+            for position, name in enumerate(columns)
+        ]
+
+    def moments_record(self, table_name: str, columns: Sequence[str]) -> tuple:
+        """Cross-moments table row for the numeric ones of the given (kept) columns"""
+        kept = [name for name in self.moments.columns if name in columns]
+        return self.moments.subset(kept).to_record(table_name)
+
+
+def create_stats_table_sql() -> str:
+    """CREATE TABLE statement for the stats table"""
+    column_defs = ", ".join(f'"{name}" {sql_type}' for name, sql_type in STATS_COLUMNS)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {STATS_TABLE} ("
+        f"{column_defs}, PRIMARY KEY (table_name, column_name))"
+    )
+
+
+def insert_stats_sql() -> str:
+    """INSERT statement with one ``?`` placeholder per stats column"""
+    names = ", ".join(f'"{name}"' for name, _ in STATS_COLUMNS)
+    placeholders = ", ".join("?" for _ in STATS_COLUMNS)
+    return f"INSERT INTO {STATS_TABLE} ({names}) VALUES ({placeholders})"
+
+
+def create_moments_table_sql() -> str:
+    """CREATE TABLE statement for the cross-moments table"""
+    column_defs = ", ".join(f'"{name}" {sql_type}' for name, sql_type in MOMENTS_COLUMNS)
+    return f"CREATE TABLE IF NOT EXISTS {MOMENTS_TABLE} ({column_defs})"
+
+
+def insert_moments_sql() -> str:
+    """INSERT statement with one ``?`` placeholder per cross-moments column"""
+    names = ", ".join(f'"{name}"' for name, _ in MOMENTS_COLUMNS)
+    placeholders = ", ".join("?" for _ in MOMENTS_COLUMNS)
+    return f"INSERT INTO {MOMENTS_TABLE} ({names}) VALUES ({placeholders})"
+
+
+def decode_stats_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a stats table row into a column statistics dict
+
+    JSON fields are parsed and the derived values used by the playbooks
+    (``std``, ``median``, ``missing_pct``) are added.
+    """
+    stats = dict(row)
+    for key in ("quantiles", "top_values", "sample"):
+        stats[key] = json.loads(stats[key]) if stats.get(key) else ([] if key != "quantiles" else {})
+    stats["is_numeric"] = bool(stats.get("is_numeric"))
+
+    count = stats.get("numeric_count") or 0
+    m2 = stats.get("m2")
+    stats["std"] = math.sqrt(max(m2, 0.0) / (count - 1)) if m2 is not None and count > 1 else None
+    stats["median"] = stats["quantiles"].get("0.5")
+
+    row_count = stats.get("row_count") or 0
+    stats["missing_pct"] = 100.0 * stats.get("null_count", 0) / row_count if row_count else 0.0
+    return stats
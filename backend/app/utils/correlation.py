@@ -0,0 +1,138 @@
+"""Pairwise-complete Pearson correlations over NumPy column arrays
+
+Each pair of columns is correlated over the rows where both are present,
+like ``DataFrame.corr()``, instead of first dropping every row with any
+missing value. Columns are read as float64 arrays (no copy when they
+already are) and masked one at a time, so the only temporaries are a few
+column-sized arrays. Both engines fold rows in chunk by chunk and share
+the final step with the stored cross moments (``pearson_from_sums``), so
+every path gives the same answer.
+"""
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+from app.utils.column_stats import CrossMoments, pearson_from_sums
+
+
+# Rows per chunk when a full matrix is computed from an in-memory frame;
+# bounds the (rows x columns) temporaries of the cross-product step
+MATRIX_CHUNK_ROWS = 65536
+
+
+def column_values(df: pd.DataFrame, name: str) -> np.ndarray:
+    """A column as float64 with NaN for missing values (a view when already float64)"""
+    series = df[name]
+    if series.dtype == np.float64:
+        return series.to_numpy()
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class TargetMoments:
+    """
+    Pairwise-complete sums of each column against one target column
+
+    Per column: the number of rows where both it and the target are
+    present, and over those rows the sums, sums of squares and sum of
+    products. Values are shifted by the first chunk's means so variances
+    derived from the sums keep their precision.
+    """
+
+    def __init__(self, target: str, columns: Sequence[str]):
+        self.target = target
+        self.columns = [name for name in columns if name != target]
+        size = len(self.columns)
+        self.count = np.zeros(size)
+        self.sum_x = np.zeros(size)
+        self.sum_y = np.zeros(size)
+        self.sum_xx = np.zeros(size)
+        self.sum_yy = np.zeros(size)
+        self.sum_xy = np.zeros(size)
+        # Per-column shifts of the feature and the target, set from the first
+        # chunk's complete pairs
+        self.shift_x: Optional[np.ndarray] = None
+        self.shift_y: Optional[np.ndarray] = None
+
+    def update(self, df: pd.DataFrame):
+        """Fold one chunk of rows into the sums"""
+        y = column_values(df, self.target)
+        y_present = ~np.isnan(y)
+        y_all_present = bool(y_present.all())
+        first_chunk = self.shift_x is None
+        if first_chunk:
+            self.shift_x = np.zeros(len(self.columns))
+            self.shift_y = np.zeros(len(self.columns))
+
+        for index, name in enumerate(self.columns):
+            x = column_values(df, name)
+            if y_all_present and not np.isnan(x).any():
+                xs, ys = x, y
+            else:
+                both = ~np.isnan(x) & y_present
+                xs, ys = x[both], y[both]
+            if first_chunk and len(xs):
+                self.shift_x[index] = xs.mean()
+                self.shift_y[index] = ys.mean()
+            xs = xs - self.shift_x[index]
+            ys = ys - self.shift_y[index]
+            self.count[index] += len(xs)
+            self.sum_x[index] += xs.sum()
+            self.sum_y[index] += ys.sum()
+            self.sum_xx[index] += xs @ xs
+            self.sum_yy[index] += ys @ ys
+            self.sum_xy[index] += xs @ ys
+
+    def correlations(self, min_periods: int = 2) -> pd.Series:
+        """Correlation of each column with the target (NaN where undefined)"""
+        corr = pearson_from_sums(
+            self.count, self.sum_x, self.sum_y, self.sum_xx, self.sum_yy, self.sum_xy, min_periods
+        )
+        return pd.Series(corr, index=self.columns)
+
+
+def target_correlations(
+    df: pd.DataFrame,
+    target: str,
+    columns: Optional[Sequence[str]] = None,
+    min_periods: int = 2,
+) -> pd.Series:
+    """
+    Pairwise-complete correlation of every other column with `target`
+
+    Costs O(rows x cols), where the full ``DataFrame.corr()`` matrix costs
+    O(rows x cols^2).
+
+    Args:
+        df: Frame holding the columns
+        target: Column to correlate against
+        columns: Columns to correlate (default: every column of `df`)
+        min_periods: Minimum complete pairs for a defined correlation
+
+    Returns:
+        Correlations indexed by column (NaN for constant columns or too few pairs)
+    """
+    moments = TargetMoments(target, list(df.columns) if columns is None else columns)
+    moments.update(df)
+    return moments.correlations(min_periods)
+
+
+def correlation_matrix(
+    df: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    chunk_rows: int = MATRIX_CHUNK_ROWS,
+) -> np.ndarray:
+    """
+    Pairwise-complete correlation matrix, accumulated `chunk_rows` at a time
+
+    Args:
+        df: Frame holding the columns
+        columns: Columns of the matrix, in order (default: every column of `df`)
+        chunk_rows: Rows folded in per step
+
+    Returns:
+        Square matrix in column order (NaN where undefined)
+    """
+    moments = CrossMoments(list(df.columns) if columns is None else columns)
+    for start in range(0, len(df), max(chunk_rows, 1)):
+        moments.update(df.iloc[start:start + chunk_rows])
+    return moments.correlation_matrix()
+
@@ -1,10 +1,16 @@
 """CSV import utility for creating tables and inserting data"""
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, BinaryIO, Callable, List, Optional
 from sqlalchemy import text
 from pathlib import Path
 import io
 import asyncio
+from app.core.database import db_manager
+from app.utils import column_stats
+
+
+# Rows parsed per chunk when streaming a CSV into SQLite
+IMPORT_CHUNK_ROWS = 100_000
 
 
 class CSVImporter:
@@ -66,13 +72,161 @@ class CSVImporter:
         # Default to TEXT
         return 'TEXT'
     
+    @staticmethod
+    def to_sqlite_values(series: pd.Series) -> list:
+        """
+        Convert a column to a list of SQLite-ready Python values
+        
+        Missing values become None and datetimes are formatted once for the
+        whole column instead of per cell.
+        """
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.dt.strftime('%Y-%m-%d')
+        else:
+            values = series
+        return values.astype(object).where(series.notna(), None).tolist()
+    
+    @staticmethod
+    def dataframe_batches(df: pd.DataFrame, batch_size: int) -> List[List[tuple]]:
+        """Convert a DataFrame to row tuples, split into executemany batches"""
+        columns = [CSVImporter.to_sqlite_values(df[col]) for col in df.columns]
+        rows = list(zip(*columns))
+        return [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    
+    @staticmethod
+    async def insert_dataframe(conn, insert_sql: str, df: pd.DataFrame, batch_size: int = 50000) -> int:
+        """
+        Bulk insert a DataFrame with one executemany per batch
+        
+        Column conversion runs in the thread pool and each executemany runs on
+        the driver's worker thread, so the event loop is never blocked by
+        per-row Python work.
+        
+        Args:
+            conn: SQLAlchemy async connection inside an open transaction
+            insert_sql: INSERT statement with one ``?`` placeholder per column
+            df: Data to insert, columns in placeholder order
+            batch_size: Rows per executemany call
+            
+        Returns:
+            Number of rows inserted
+        """
+        loop = asyncio.get_event_loop()
+        batches = await loop.run_in_executor(
+            None, CSVImporter.dataframe_batches, df, batch_size
+        )
+        
+        rows_inserted = 0
+        for batch in batches:
+            await conn.exec_driver_sql(insert_sql, batch)
+            rows_inserted += len(batch)
+        return rows_inserted
+    
+    @staticmethod
+    async def ensure_stats_table(conn):
+        """
+        Create the column statistics and cross-moments tables, adding any
+        columns missing from a stats table written by an older version
+        (their rows get NULL sketch state and are rebuilt on the next append)
+        """
+        await conn.exec_driver_sql(column_stats.create_stats_table_sql())
+        await conn.exec_driver_sql(column_stats.create_moments_table_sql())
+        result = await conn.exec_driver_sql(f"PRAGMA table_info({column_stats.STATS_TABLE})")
+        existing = {row[1] for row in result.fetchall()}
+        for name, sql_type in column_stats.STATS_COLUMNS:
+            if name not in existing:
+                await conn.exec_driver_sql(
+                    f'ALTER TABLE {column_stats.STATS_TABLE} ADD COLUMN "{name}" {sql_type}'
+                )
+    
+    @staticmethod
+    async def write_column_stats(
+        conn,
+        table_name: str,
+        records: List[tuple],
+        moments_record: Optional[tuple] = None
+    ):
+        """
+        Replace a table's rows in the column statistics and cross-moments tables
+        
+        Args:
+            conn: SQLAlchemy async connection inside an open transaction
+            table_name: Table the statistics describe
+            records: Rows in ``column_stats.STATS_COLUMNS`` order
+            moments_record: Row in ``column_stats.MOMENTS_COLUMNS`` order
+        """
+        await CSVImporter.ensure_stats_table(conn)
+        for stats_table in (column_stats.STATS_TABLE, column_stats.MOMENTS_TABLE):
+            await conn.exec_driver_sql(
+                f"DELETE FROM {stats_table} WHERE table_name = ?",
+                (table_name,),
+            )
+        if records:
+            await conn.exec_driver_sql(column_stats.insert_stats_sql(), records)
+        if moments_record is not None:
+            await conn.exec_driver_sql(column_stats.insert_moments_sql(), moments_record)
+    
+    @staticmethod
+    async def load_column_stats(
+        conn,
+        table_name: str,
+        columns: List[str],
+        column_types: List[str],
+        chunk_rows: int = IMPORT_CHUNK_ROWS
+    ) -> column_stats.TableStats:
+        """
+        Load the mergeable statistics of an existing table
+        
+        Tables without stored sketch state or cross moments (imported
+        before these existed) are scanned once to build them.
+        
+        Args:
+            conn: SQLAlchemy async connection inside an open transaction
+            table_name: Existing table
+            columns: Table columns, in order
+            column_types: Declared SQLite type of each column
+            chunk_rows: Rows per chunk when a scan is needed
+            
+        Returns:
+            Statistics covering every row currently in the table
+        """
+        await CSVImporter.ensure_stats_table(conn)
+        result = await conn.exec_driver_sql(
+            f"SELECT * FROM {column_stats.STATS_TABLE} WHERE table_name = ?",
+            (table_name,),
+        )
+        rows = [dict(row._mapping) for row in result.fetchall()]
+        result = await conn.exec_driver_sql(
+            f"SELECT * FROM {column_stats.MOMENTS_TABLE} WHERE table_name = ?",
+            (table_name,),
+        )
+        moments_row = result.fetchone()
+        table_stats = column_stats.TableStats.from_rows(
+            rows,
+            columns,
+            column_types,
+            dict(moments_row._mapping) if moments_row is not None else None,
+        )
+        if table_stats is not None:
+            return table_stats
+        
+        loop = asyncio.get_event_loop()
+        table_stats = column_stats.TableStats(columns, column_types)
+        select_list = ', '.join(CSVImporter.escape_identifier(col) for col in columns)
+        result = await conn.stream(text(f"SELECT {select_list} FROM {table_name}"))
+        async for partition in result.partitions(chunk_rows):
+            chunk = pd.DataFrame.from_records(partition, columns=columns)
+            await loop.run_in_executor(None, table_stats.update, chunk)
+        return table_stats
+    
     @staticmethod
     async def import_csv(
         engine,
         csv_content: bytes,
         table_name: Optional[str] = None,
         encoding: str = 'utf-8',
-        delimiter: str = ','
+        delimiter: str = ',',
+        mode: str = 'replace'
     ) -> Dict[str, Any]:
         """
         Import CSV file into SQLite database
@@ -83,111 +237,241 @@ class CSVImporter:
             table_name: Optional table name (defaults to filename)
             encoding: File encoding
             delimiter: CSV delimiter
+            mode: ``replace`` to recreate the table or ``append`` to add
+                rows to an existing one
+            
+        Returns:
+            Dict with import results
+        """
+        return await CSVImporter.import_csv_stream(
+            engine,
+            io.BytesIO(csv_content),
+            table_name=table_name,
+            encoding=encoding,
+            delimiter=delimiter,
+            mode=mode,
+        )
+    
+    @staticmethod
+    async def import_csv_stream(
+        engine,
+        source: BinaryIO,
+        table_name: Optional[str] = None,
+        encoding: str = 'utf-8',
+        delimiter: str = ',',
+        chunk_rows: int = IMPORT_CHUNK_ROWS,
+        progress: Optional[Callable[..., None]] = None,
+        mode: str = 'replace'
+    ) -> Dict[str, Any]:
+        """
+        Import a CSV stream into SQLite chunk by chunk
+        
+        The file is parsed with ``read_csv(chunksize=...)`` so only one chunk
+        is in memory at a time. Column names and types are inferred from the
+        first chunk, and every chunk is appended inside a single transaction,
+        so readers see either the old table or the complete new one. A new
+        table is loaded under a staging name and renamed into place; if
+        columns turn out to be almost entirely missing, only the kept columns
+        are copied over instead (one copy, rather than one table rewrite per
+        ``DROP COLUMN``).
+        Per-column statistics are accumulated along the way and written to
+        the ``__si_column_stats`` table in the same transaction.
+        
+        In ``append`` mode an existing table keeps its rows and columns: CSV
+        columns the table doesn't have are ignored, table columns missing
+        from the CSV are stored as NULL, and the statistics of the new rows
+        are merged into the stored ones instead of rescanning the table.
+        
+        Args:
+            engine: SQLAlchemy async engine (writer)
+            source: Binary file object positioned at the start of the CSV
+            table_name: Optional table name (defaults to filename)
+            encoding: File encoding
+            delimiter: CSV delimiter
+            chunk_rows: Rows parsed per chunk
+            progress: Optional callback receiving ``rows_parsed``,
+                ``rows_inserted`` and ``bytes_read`` keyword arguments after
+                every chunk
+            mode: ``replace`` or ``append``
             
         Returns:
             Dict with import results
         """
+        if mode not in ('replace', 'append'):
+            raise ValueError(f"Unknown import mode '{mode}' (expected 'replace' or 'append')")
+        
         try:
             # Run pandas operations in thread pool to avoid blocking
             loop = asyncio.get_event_loop()
             
-            def read_csv():
-                csv_string = csv_content.decode(encoding)
-                return pd.read_csv(io.StringIO(csv_string), delimiter=delimiter)
+            reader = await loop.run_in_executor(
+                None,
+                lambda: pd.read_csv(
+                    source,
+                    delimiter=delimiter,
+                    encoding=encoding,
+                    chunksize=chunk_rows,
+                ),
+            )
+            
+            def next_chunk() -> Optional[pd.DataFrame]:
+                return next(reader, None)
             
-            # Read CSV into pandas DataFrame (non-blocking)
-            df = await loop.run_in_executor(None, read_csv)
+            df = await loop.run_in_executor(None, next_chunk)
             
-            if df.empty:
+            if df is None or df.empty:
                 raise ValueError("CSV file is empty")
             
             # Sanitize column names
-            df.columns = [CSVImporter.sanitize_column_name(col) for col in df.columns]
-
-            # Light data cleaning: drop columns that are almost entirely missing
-            # This keeps the schema simpler and avoids charts built on empty data.
-            missing_fraction = df.isna().mean()
-            dropped_columns = [
-                col for col, frac in missing_fraction.items()
-                if frac >= 0.98  # 98%+ missing values → treat as unusable
-            ]
-            if dropped_columns:
-                df = df.drop(columns=dropped_columns)
-                if df.empty:
-                    raise ValueError(
-                        "All columns were dropped because they were almost entirely missing."
-                    )
+            csv_columns = [CSVImporter.sanitize_column_name(col) for col in df.columns]
+            df.columns = csv_columns
             
             # Determine table name
             if not table_name:
                 table_name = 'imported_data'
             table_name = CSVImporter.sanitize_table_name(table_name)
             
-            # Infer column types and escape column names
-            column_defs = []
-            escaped_columns = []
-            for col in df.columns:
-                sql_type = CSVImporter.infer_sqlite_type(df[col])
-                escaped_col = CSVImporter.escape_identifier(col)
-                column_defs.append(f"{escaped_col} {sql_type}")
-                escaped_columns.append(escaped_col)
+            rows_inserted = 0
+            rows_parsed = 0
+            dropped_columns: List[str] = []
+            ignored_columns: List[str] = []
             
-            # Create table
-            create_table_sql = f"""
-                CREATE TABLE IF NOT EXISTS {table_name} (
-                    {', '.join(column_defs)}
-                )
-            """
+            def report():
+                if progress is not None:
+                    progress(
+                        rows_parsed=rows_parsed,
+                        rows_inserted=rows_inserted,
+                        bytes_read=source.tell(),
+                    )
             
             async with engine.begin() as conn:
-                # Drop existing table if it exists (for re-import)
-                await conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
-                
-                # Create new table
-                await conn.execute(text(create_table_sql))
+                existing = []
+                if mode == 'append':
+                    result = await conn.execute(text(f"PRAGMA table_info({table_name})"))
+                    existing = [(row[1], row[2]) for row in result.fetchall()]
+                appending = bool(existing)
                 
-                # Insert data
-                # Prepare all rows for bulk insert
-                all_rows = []
-                for _, row in df.iterrows():
-                    # Prepare values, handling NaN as NULL
-                    row_values = []
-                    for col in df.columns:
-                        val = row[col]
-                        if pd.isna(val):
-                            row_values.append(None)
-                        else:
-                            # Convert datetime to string if needed
-                            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                                row_values.append(val.strftime('%Y-%m-%d'))
-                            else:
-                                row_values.append(val)
-                    all_rows.append(row_values)
+                if appending:
+                    # Keep the table's columns and types
+                    columns = [name for name, _ in existing]
+                    column_types = [sql_type for _, sql_type in existing]
+                    ignored_columns = [col for col in csv_columns if col not in columns]
+                    if len(ignored_columns) == len(csv_columns):
+                        raise ValueError(
+                            f"CSV has none of the columns of table '{table_name}'"
+                        )
+                    table_stats = await CSVImporter.load_column_stats(
+                        conn, table_name, columns, column_types, chunk_rows
+                    )
+                    load_table = table_name
+                else:
+                    # Infer column types (from the first chunk)
+                    columns = csv_columns
+                    column_types = [CSVImporter.infer_sqlite_type(df[col]) for col in columns]
+                    column_defs = [
+                        f"{CSVImporter.escape_identifier(col)} {sql_type}"
+                        for col, sql_type in zip(columns, column_types)
+                    ]
+                    
+                    # Load into a staging table; it replaces the existing table
+                    # (if any) once every row is in and the kept columns are known
+                    load_table = f"{column_stats.INTERNAL_TABLE_PREFIX}import_{table_name}"
+                    await conn.execute(text(f"DROP TABLE IF EXISTS {load_table}"))
+                    await conn.execute(text(f"""
+                        CREATE TABLE {load_table} (
+                            {', '.join(column_defs)}
+                        )
+                    """))
+                    table_stats = None
                 
-                # Create placeholders and SQL statement
-                placeholders = [f':p{i}' for i in range(len(df.columns))]
+                escaped_columns = [CSVImporter.escape_identifier(col) for col in columns]
                 insert_sql = f"""
-                    INSERT INTO {table_name} ({', '.join(escaped_columns)})
-                    VALUES ({', '.join(placeholders)})
+                    INSERT INTO {load_table} ({', '.join(escaped_columns)})
+                    VALUES ({', '.join('?' for _ in escaped_columns)})
                 """
+                missing_counts = pd.Series(0, index=columns)
+                batch_stats = column_stats.TableStats(columns, column_types)
                 
-                # Insert all rows using executemany pattern
-                rows_inserted = 0
-                for row_values in all_rows:
-                    # Convert row to dict with named parameters
-                    params = {f'p{i}': val for i, val in enumerate(row_values)}
-                    await conn.execute(text(insert_sql), params)
-                    rows_inserted += 1
+                # Append chunks in batches with executemany over pre-converted columns
+                while df is not None:
+                    df.columns = csv_columns
+                    if appending:
+                        df = df.reindex(columns=columns)
+                    rows_parsed += len(df)
+                    missing_counts += df.isna().sum()
+                    # Statistics are computed on a worker thread while the chunk is inserted
+                    _, inserted = await asyncio.gather(
+                        loop.run_in_executor(None, batch_stats.update, df),
+                        CSVImporter.insert_dataframe(conn, insert_sql, df),
+                    )
+                    rows_inserted += inserted
+                    report()
+                    df = await loop.run_in_executor(None, next_chunk)
                 
-                return {
-                    "success": True,
-                    "table_name": table_name,
-                    "rows_imported": rows_inserted,
-                    "columns": list(df.columns),
-                    "column_count": len(df.columns),
-                    "dropped_columns": dropped_columns,
-                    "dropped_column_count": len(dropped_columns),
-                }
+                if appending:
+                    # Merge the new rows' sketches into the stored statistics
+                    table_stats.merge(batch_stats)
+                else:
+                    table_stats = batch_stats
+                    
+                    # Light data cleaning: drop columns that are almost entirely missing
+                    # This keeps the schema simpler and avoids charts built on empty data.
+                    missing_fraction = missing_counts / rows_inserted
+                    dropped_columns = [
+                        col for col, frac in missing_fraction.items()
+                        if frac >= 0.98  # 98%+ missing values → treat as unusable
+                    ]
+                    if len(dropped_columns) == len(columns):
+                        raise ValueError(
+                            "All columns were dropped because they were almost entirely missing."
+                        )
+                    
+                    # Drop existing table if it exists (for re-import)
+                    await conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+                    if not dropped_columns:
+                        await conn.execute(text(f"ALTER TABLE {load_table} RENAME TO {table_name}"))
+                    else:
+                        kept_defs = [
+                            column_def
+                            for col, column_def in zip(columns, column_defs)
+                            if col not in dropped_columns
+                        ]
+                        kept_list = ', '.join(
+                            CSVImporter.escape_identifier(col)
+                            for col in columns
+                            if col not in dropped_columns
+                        )
+                        await conn.execute(text(f"CREATE TABLE {table_name} ({', '.join(kept_defs)})"))
+                        await conn.execute(text(
+                            f"INSERT INTO {table_name} ({kept_list}) SELECT {kept_list} FROM {load_table}"
+                        ))
+                        await conn.execute(text(f"DROP TABLE {load_table}"))
+                
+                # Store per-column statistics and cross moments so overviews and
+                # correlations don't rescan the rows
+                kept_columns = [col for col in columns if col not in dropped_columns]
+                await CSVImporter.write_column_stats(
+                    conn,
+                    table_name,
+                    table_stats.records(table_name, kept_columns),
+                    table_stats.moments_record(table_name, kept_columns),
+                )
+            
+            # Table was replaced or extended; cached schema for this dataset is stale
+            db_manager.invalidate_engine_schema(engine)
+            
+            return {
+                "success": True,
+                "table_name": table_name,
+                "mode": mode,
+                "rows_imported": rows_inserted,
+                "total_rows": table_stats.row_count,
+                "columns": kept_columns,
+                "column_count": len(kept_columns),
+                "dropped_columns": dropped_columns,
+                "dropped_column_count": len(dropped_columns),
+                "ignored_columns": ignored_columns,
+            }
         
         except pd.errors.EmptyDataError:
             raise ValueError("CSV file is empty or invalid")
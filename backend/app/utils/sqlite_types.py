@@ -0,0 +1,30 @@
+"""Declared SQLite column types
+
+The importer, the stored column statistics, the columnar fetch path, the
+SQL playbooks and the intent router all decide "is this column numeric?"
+from the declared type, so they share these helpers and always agree.
+"""
+from typing import Optional
+
+
+def is_numeric_type(declared_type: Optional[str]) -> bool:
+    """
+    Return True if a declared SQLite column type has numeric affinity
+
+    Follows SQLite's affinity rules (INTEGER, REAL and NUMERIC affinity,
+    so BOOLEAN and DECIMAL count as numeric), except that DATE/TIME types
+    are not: the CSV importer stores dates as text.
+    """
+    decl = (declared_type or "").upper()
+    if not decl:
+        return False
+    if "CHAR" in decl or "CLOB" in decl or "TEXT" in decl or "BLOB" in decl:
+        return False
+    if "DATE" in decl or "TIME" in decl:
+        return False
+    return True
+
+
+def is_integer_type(declared_type: Optional[str]) -> bool:
+    """Return True if a declared SQLite column type has INTEGER affinity"""
+    return "INT" in (declared_type or "").upper()
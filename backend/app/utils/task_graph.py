@@ -0,0 +1,68 @@
+"""Small async DAG executor for overlapping independent pipeline steps"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+
+class TaskGraph:
+    """
+    Runs named async steps as soon as the steps they depend on finish
+
+    Each step is a coroutine function called with its dependencies' results
+    as keyword arguments. Steps start when added (once their dependencies
+    are done), so independent work such as LLM planning and a speculative
+    table fetch overlaps. Steps that turn out not to be needed can be
+    cancelled; ``aclose`` cancels anything still running.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def add(
+        self,
+        name: str,
+        step: Callable[..., Awaitable[Any]],
+        deps: Iterable[str] = (),
+    ) -> asyncio.Task:
+        """
+        Schedule a step
+
+        Args:
+            name: Step name, unique within the graph
+            step: Coroutine function receiving each dependency's result as a
+                keyword argument named after the dependency
+            deps: Names of steps that must finish first (added earlier)
+
+        Returns:
+            The task running the step
+        """
+        if name in self.tasks:
+            raise ValueError(f"Step '{name}' already exists")
+        dep_tasks = {dep: self.tasks[dep] for dep in deps}
+
+        async def run():
+            results = {dep: await task for dep, task in dep_tasks.items()}
+            return await step(**results)
+
+        task = asyncio.create_task(run(), name=name)
+        self.tasks[name] = task
+        return task
+
+    async def get(self, name: str) -> Any:
+        """Wait for a step and return its result (re-raising its error)"""
+        return await self.tasks[name]
+
+    def cancel(self, name: str) -> bool:
+        """Cancel a step that is no longer needed; True if it was still running"""
+        task = self.tasks.get(name)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def aclose(self):
+        """Cancel unfinished steps and wait for them to unwind"""
+        pending = [task for task in self.tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        # Collect results so failed or cancelled steps don't log "never retrieved"
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
@@ -0,0 +1,115 @@
+"""Tests for narrative insights generation and its cache"""
+from app.services.analysis_service import AnalysisService
+from app.utils.cache import SQLiteCache
+
+
+class FakeLLM:
+    """Stand-in for LLMClient that counts calls"""
+
+    model = "test-model"
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    async def generate_json(self, messages, temperature=0.3, timeout=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("boom")
+        return {"summary": "Glucose is high", "key_findings": ["a"], "follow_ups": ["Show more"]}
+
+    async def stream_chat_completion(self, messages, temperature=0.3, response_format=None, timeout=None):
+        self.calls += 1
+        for piece in ('{"summary": ', '"Glucose is high"}'):
+            yield piece
+
+
+ROWS = [{"glucose": 120}, {"glucose": 140}]
+VIZ = {"type": "histogram", "config": {"title": "Glucose"}}
+
+
+def _service(llm, store=None):
+    service = AnalysisService()
+    service.llm = llm
+    service.insights_store = store
+    return service
+
+
+class TestInsightsCache:
+    """Identical prompts reuse the previous narrative"""
+
+    async def test_repeat_skips_llm(self):
+        llm = FakeLLM()
+        service = _service(llm)
+
+        first = await service.generate_insights("why?", ROWS, "", {}, VIZ)
+        first["summary"] = "mutated by caller"
+        second = await service.generate_insights("why?", ROWS, "", {}, VIZ)
+
+        assert llm.calls == 1
+        assert second["summary"] == "Glucose is high"
+
+    async def test_different_context_misses(self):
+        llm = FakeLLM()
+        service = _service(llm)
+
+        await service.generate_insights("why?", ROWS, "", {}, VIZ)
+        await service.generate_insights("why?", ROWS, "", {}, {**VIZ, "type": "bar"})
+        await service.generate_insights("why not?", ROWS, "", {}, VIZ)
+
+        assert llm.calls == 3
+
+    async def test_fallback_is_not_cached(self):
+        llm = FakeLLM(fail=True)
+        service = _service(llm)
+
+        await service.generate_insights("why?", ROWS, "", {}, VIZ)
+        await service.generate_insights("why?", ROWS, "", {}, VIZ)
+
+        assert llm.calls == 2
+
+    async def test_streamed_insights_are_cached(self):
+        llm = FakeLLM()
+        service = _service(llm)
+
+        streamed = [event async for event in service.stream_insights("why?", ROWS, "", {}, VIZ)]
+        replayed = [event async for event in service.stream_insights("why?", ROWS, "", {}, VIZ)]
+
+        assert llm.calls == 1
+        assert replayed == [streamed[-1]]
+        assert await service.generate_insights("why?", ROWS, "", {}, VIZ) == streamed[-1][1]
+
+    async def test_persistent_store_survives_restart(self, temp_data_dir):
+        path = temp_data_dir / "insights.db"
+        llm = FakeLLM()
+        await _service(llm, SQLiteCache(str(path), 10, 60)).generate_insights("why?", ROWS, "", {}, VIZ)
+
+        restarted = _service(llm, SQLiteCache(str(path), 10, 60))
+        analysis = await restarted.generate_insights("why?", ROWS, "", {}, VIZ)
+
+        assert llm.calls == 1
+        assert analysis["summary"] == "Glucose is high"
+
+
+class TestSQLiteCache:
+    """Tests for the on-disk cache"""
+
+    def test_expiry(self, temp_data_dir):
+        now = [1000.0]
+        cache = SQLiteCache(str(temp_data_dir / "c.db"), max_entries=10, ttl_seconds=60, clock=lambda: now[0])
+        cache.set("k", {"v": 1})
+
+        assert cache.get("k") == {"v": 1}
+        now[0] += 61
+        assert cache.get("k") is None
+
+    def test_keeps_newest_entries(self, temp_data_dir):
+        now = [0.0]
+        cache = SQLiteCache(str(temp_data_dir / "c.db"), max_entries=2, ttl_seconds=60, clock=lambda: now[0])
+        for key in ("a", "b", "c"):
+            now[0] += 1
+            cache.set(key, key)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == "b"
+        assert cache.get("c") == "c"
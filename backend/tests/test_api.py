@@ -1,7 +1,10 @@
 """Integration tests for API endpoints"""
+import json
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from app.main import app
+from app.api.routes import query as query_routes
 from app.core import auth
 from pathlib import Path
 import tempfile
@@ -68,6 +71,73 @@ class TestHealthEndpoints:
         assert "status" in data
         assert data["status"] == "healthy"
 
+    def test_metrics_endpoint(self, client):
+        """Test /metrics exposes engine pool counters"""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        pool = response.json()["engine_pool"]
+        for key in ("hits", "misses", "evictions", "open_engines"):
+            assert key in pool
+        assert "hits" in response.json()["planner_cache"]
+        assert "queue_depth" in response.json()["cpu_executor"]
+
+    def test_unknown_import_job(self, client):
+        """Test polling an unknown import job returns 404"""
+        response = client.get("/api/v1/imports/does-not-exist")
+        assert response.status_code == 404
+
+
+class TestQueryStreamEndpoint:
+    """Tests for the Server-Sent Events query endpoint"""
+
+    @staticmethod
+    def _events(body: str):
+        events = []
+        for block in body.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.split("\n"))
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+
+    def test_stages_are_streamed_in_order(self, client, monkeypatch):
+        async def fake_events(request, stream_insights=False):
+            assert stream_insights
+            yield "plan", {"playbook": "overview"}
+            yield "visualization", {"sql": "", "results": [], "visualization": {"type": "table"}, "data_structure": {}}
+            yield "extra_visualization", {"type": "bar"}
+            yield "insights_token", {"text": "{\"summary\""}
+            yield "analysis", {"summary": "ok", "score": float("nan")}
+
+        monkeypatch.setattr(query_routes, "_query_events", fake_events)
+        response = client.post(
+            "/api/v1/query/stream",
+            json={"user_id": "u", "dataset_id": "d", "query": "overview"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self._events(response.text)
+        assert [name for name, _ in events] == [
+            "plan", "visualization", "extra_visualization", "insights_token", "analysis", "done",
+        ]
+        assert events[4][1] == {"summary": "ok", "score": None}
+
+    def test_errors_become_error_events(self, client, monkeypatch):
+        async def fake_events(request, stream_insights=False):
+            yield "plan", {"playbook": "overview"}
+            raise HTTPException(status_code=500, detail="Failed to execute data fetch: boom")
+
+        monkeypatch.setattr(query_routes, "_query_events", fake_events)
+        response = client.post(
+            "/api/v1/query/stream",
+            json={"user_id": "u", "dataset_id": "d", "query": "overview"},
+        )
+
+        events = self._events(response.text)
+        assert events[-1] == (
+            "error",
+            {"status_code": 500, "detail": "Failed to execute data fetch: boom"},
+        )
+
 
 class TestAuthEndpoints:
     """Tests for authentication endpoints"""
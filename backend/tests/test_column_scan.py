@@ -0,0 +1,124 @@
+"""Tests for the shared single-pass column scanner"""
+import gc
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils import column_scan
+from app.utils.column_scan import compute_column_summaries, scan_columns
+
+
+@pytest.fixture
+def mixed_dataframe(sample_dataframe):
+    """Sample data with missing values, a text column and an empty column"""
+    df = sample_dataframe.copy()
+    df["group"] = np.where(df["outcome"] == 1, "positive", "negative")
+    df.loc[::9, "glucose"] = np.nan
+    df["empty"] = np.nan
+    return df
+
+
+class TestComputeColumnSummaries:
+    """Statistics match the per-column pandas calls they replace"""
+
+    @pytest.mark.parametrize("batch_bytes", [64 * 1024 * 1024, 1])
+    def test_numeric_matches_pandas(self, mixed_dataframe, monkeypatch, batch_bytes):
+        monkeypatch.setattr(column_scan, "SCAN_BATCH_BYTES", batch_bytes)
+
+        summaries = compute_column_summaries(mixed_dataframe)
+
+        for col in ["age", "glucose", "bmi", "outcome", "pregnancies", "empty"]:
+            series = mixed_dataframe[col]
+            summary = summaries[col]
+            assert summary["is_numeric"]
+            assert summary["count"] == series.count()
+            assert summary["null_count"] == series.isna().sum()
+            assert summary["nunique"] == series.nunique()
+            np.testing.assert_allclose(
+                [summary[key] for key in ("min", "max", "mean", "std", "median")],
+                [series.min(), series.max(), series.mean(), series.std(), series.median()],
+            )
+
+    def test_other_columns_count_only(self, mixed_dataframe):
+        summary = compute_column_summaries(mixed_dataframe)["group"]
+
+        assert not summary["is_numeric"]
+        assert summary["nunique"] == 2
+        assert summary["mean"] is None
+
+    def test_empty_frame(self):
+        summaries = compute_column_summaries(pd.DataFrame({"x": pd.Series([], dtype=float)}))
+
+        assert summaries["x"]["count"] == 0
+        assert np.isnan(summaries["x"]["median"])
+
+
+class TestScanColumns:
+    """One scan per live DataFrame"""
+
+    def test_memoized_per_frame(self, mixed_dataframe, monkeypatch):
+        calls = 0
+        compute = column_scan.compute_column_summaries
+
+        def counting(df, columns=None):
+            nonlocal calls
+            calls += 1
+            time.sleep(0.05)
+            return compute(df, columns)
+
+        monkeypatch.setattr(column_scan, "compute_column_summaries", counting)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(scan_columns(mixed_dataframe)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+
+        scan_columns(mixed_dataframe.copy())
+        assert calls == 2
+
+    def test_new_columns_rescan(self, mixed_dataframe):
+        first = scan_columns(mixed_dataframe)
+        mixed_dataframe["extra"] = 1.0
+
+        second = scan_columns(mixed_dataframe)
+
+        assert second is not first
+        assert "extra" in second
+
+    def test_subset_scans_only_new_columns(self, mixed_dataframe, monkeypatch):
+        scanned = []
+        compute = column_scan.compute_column_summaries
+
+        def counting(df, columns=None):
+            scanned.append(list(df.columns) if columns is None else list(columns))
+            return compute(df, columns)
+
+        monkeypatch.setattr(column_scan, "compute_column_summaries", counting)
+
+        subset = scan_columns(mixed_dataframe, ["glucose", "group"])
+        scan_columns(mixed_dataframe, ["group"])
+        full = scan_columns(mixed_dataframe)
+
+        assert list(subset) == ["glucose", "group"]
+        assert scanned == [["glucose", "group"], ["age", "bmi", "outcome", "pregnancies", "empty"]]
+        assert list(full) == list(mixed_dataframe.columns)
+        assert full["glucose"] is subset["glucose"]
+
+    def test_entry_dropped_with_frame(self, sample_dataframe):
+        df = sample_dataframe.copy()
+        scan_columns(df)
+        key = id(df)
+        assert key in column_scan._scans
+
+        del df
+        gc.collect()
+
+        assert key not in column_scan._scans
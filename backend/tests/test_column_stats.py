@@ -0,0 +1,219 @@
+"""Tests for import-time column statistics"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.services import playbooks
+from app.services.data_analysis_service import DataAnalysisService
+from app.utils.column_stats import (
+    ColumnStats,
+    CrossMoments,
+    HyperLogLog,
+    TDigest,
+    TableStats,
+    MOMENTS_COLUMNS,
+    STATS_COLUMNS,
+    decode_stats_row,
+)
+
+
+def _stats_for(df: pd.DataFrame, declared_types, chunk_rows: int = 30):
+    """Accumulate a DataFrame in chunks and decode the resulting stats rows"""
+    table_stats = TableStats(list(df.columns), declared_types)
+    for start in range(0, len(df), chunk_rows):
+        table_stats.update(df.iloc[start:start + chunk_rows])
+    names = [name for name, _ in STATS_COLUMNS]
+    return [
+        decode_stats_row(dict(zip(names, record)))
+        for record in table_stats.records("data", list(df.columns))
+    ]
+
+
+@pytest.fixture
+def mixed_dataframe(sample_dataframe):
+    """Sample data with missing values and a text column"""
+    df = sample_dataframe.copy()
+    df["group"] = np.where(df["outcome"] == 1, "positive", "negative")
+    df.loc[::9, "glucose"] = np.nan
+    return df
+
+
+MIXED_TYPES = ["INTEGER", "REAL", "REAL", "INTEGER", "INTEGER", "TEXT"]
+
+
+class TestSketches:
+    """Tests for the HyperLogLog and t-digest sketches"""
+
+    def test_hyperloglog_small_cardinality_is_exact(self):
+        hll = HyperLogLog()
+        hll.add_hashes(pd.util.hash_array(np.arange(1000, dtype=np.float64) % 37))
+
+        assert hll.estimate() == 37
+
+    def test_hyperloglog_large_cardinality(self):
+        hll = HyperLogLog()
+        values = np.arange(200_000, dtype=np.float64)
+        for chunk in np.array_split(values, 4):
+            hll.add_hashes(pd.util.hash_array(chunk))
+
+        assert hll.exact is None
+        assert hll.estimate() == pytest.approx(200_000, rel=0.03)
+
+    def test_tdigest_quantiles(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(50, 10, 50_000)
+        digest = TDigest()
+        for chunk in np.array_split(values, 5):
+            digest.add(chunk)
+
+        assert len(digest.means) <= digest.compression
+        assert digest.total == len(values)
+        for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+            assert digest.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.3)
+
+    def test_tdigest_small_median_is_exact(self):
+        digest = TDigest()
+        digest.add(np.array([4.0, 1.0, 3.0, 2.0]))
+
+        assert digest.quantile(0.5) == 2.5
+        assert digest.quantile(0.0) == 1.0
+        assert digest.quantile(1.0) == 4.0
+
+
+class TestColumnStats:
+    """Chunked statistics should match pandas on the whole column"""
+
+    def test_numeric_moments(self, mixed_dataframe):
+        stats = {s["column_name"]: s for s in _stats_for(mixed_dataframe, MIXED_TYPES)}
+        glucose = mixed_dataframe["glucose"]
+
+        assert stats["glucose"]["row_count"] == 100
+        assert stats["glucose"]["null_count"] == int(glucose.isna().sum())
+        assert stats["glucose"]["min"] == glucose.min()
+        assert stats["glucose"]["max"] == glucose.max()
+        assert stats["glucose"]["sum"] == pytest.approx(glucose.sum())
+        assert stats["glucose"]["mean"] == pytest.approx(glucose.mean())
+        assert stats["glucose"]["std"] == pytest.approx(glucose.std())
+        assert stats["glucose"]["median"] == pytest.approx(glucose.median())
+        assert stats["glucose"]["missing_pct"] == pytest.approx(100 * glucose.isna().mean())
+
+    def test_distinct_and_top_values(self, mixed_dataframe):
+        stats = {s["column_name"]: s for s in _stats_for(mixed_dataframe, MIXED_TYPES)}
+        counts = mixed_dataframe["group"].value_counts()
+
+        assert stats["group"]["is_numeric"] is False
+        assert stats["group"]["distinct_estimate"] == 2
+        assert stats["group"]["top_values"] == [
+            {"value": value, "count": int(count)} for value, count in counts.items()
+        ]
+        assert stats["age"]["distinct_estimate"] == mixed_dataframe["age"].nunique()
+        assert isinstance(stats["age"]["top_values"][0]["value"], int)
+
+    def test_overview_matches_playbook(self, mixed_dataframe):
+        column_stats = _stats_for(mixed_dataframe, MIXED_TYPES)
+
+        assert playbooks.overview_from_stats(column_stats) == playbooks.overview_playbook(mixed_dataframe)
+
+    def test_structure_matches_analyze_structure(self, mixed_dataframe):
+        service = DataAnalysisService()
+        from_stats = service.analyze_column_stats(_stats_for(mixed_dataframe, MIXED_TYPES))
+        from_rows = service.analyze_structure(mixed_dataframe)
+
+        assert from_stats == from_rows
+
+    def test_merge_matches_single_pass(self, mixed_dataframe):
+        first = TableStats(list(mixed_dataframe.columns), MIXED_TYPES)
+        first.update(mixed_dataframe.iloc[:60])
+        second = TableStats(list(mixed_dataframe.columns), MIXED_TYPES)
+        second.update(mixed_dataframe.iloc[60:])
+        first.merge(second)
+
+        names = [name for name, _ in STATS_COLUMNS]
+        merged = [
+            decode_stats_row(dict(zip(names, record)))
+            for record in first.records("data", list(mixed_dataframe.columns))
+        ]
+        single = _stats_for(mixed_dataframe, MIXED_TYPES, chunk_rows=100)
+
+        for got, expected in zip(merged, single):
+            for key in ("row_count", "null_count", "numeric_count", "min", "max", "distinct_estimate", "top_values"):
+                assert got[key] == expected[key]
+            for key in ("mean", "std", "sum", "median"):
+                assert got[key] == pytest.approx(expected[key])
+
+    def test_sketch_round_trip(self, mixed_dataframe):
+        stats = ColumnStats("glucose", "REAL")
+        stats.update(mixed_dataframe["glucose"])
+        names = [name for name, _ in STATS_COLUMNS]
+        row = dict(zip(names, stats.to_record("data", 0, 100)))
+
+        restored = ColumnStats.from_row(row)
+
+        assert restored.to_record("data", 0, 100) == stats.to_record("data", 0, 100)
+
+    def test_rows_without_sketches_need_rescan(self, mixed_dataframe):
+        names = [name for name, _ in STATS_COLUMNS]
+        rows = [dict(zip(names, record)) for record in TableStats(["age"], ["INTEGER"]).records("data", ["age"])]
+        rows[0]["hll_registers"] = None
+
+        assert TableStats.from_rows(rows, ["age"], ["INTEGER"]) is None
+
+    def test_empty_stats(self):
+        assert DataAnalysisService().analyze_column_stats([])["row_count"] == 0
+
+
+NUMERIC_COLUMNS = ["age", "glucose", "bmi", "outcome", "pregnancies"]
+
+
+class TestCrossMoments:
+    """Pairwise-complete correlations from mergeable sums"""
+
+    def test_matrix_matches_pairwise_pandas(self, mixed_dataframe):
+        moments = CrossMoments(NUMERIC_COLUMNS)
+        for start in range(0, len(mixed_dataframe), 30):
+            moments.update(mixed_dataframe.iloc[start:start + 30])
+
+        expected = mixed_dataframe[NUMERIC_COLUMNS].corr()
+        np.testing.assert_allclose(moments.correlation_matrix(), expected.values)
+        assert moments.correlation("glucose", "bmi") == pytest.approx(expected.loc["glucose", "bmi"])
+        assert moments.row_count == 100
+        assert moments.present_count("glucose") == mixed_dataframe["glucose"].count()
+
+    def test_merge_rebases_shift(self, mixed_dataframe):
+        # Shifted data makes the two batches' shifts far apart
+        df = mixed_dataframe[NUMERIC_COLUMNS] + 1e6
+        first = CrossMoments(NUMERIC_COLUMNS)
+        first.update(df.iloc[:20])
+        second = CrossMoments(NUMERIC_COLUMNS)
+        second.update(df.iloc[20:] * 3 - 2e6)
+        first.merge(second)
+
+        combined = pd.concat([df.iloc[:20], df.iloc[20:] * 3 - 2e6])
+        np.testing.assert_allclose(first.correlation_matrix(), combined.corr().values, atol=1e-9)
+        np.testing.assert_allclose(first.variances().values, combined.var().values, rtol=1e-9)
+
+    def test_constant_column_is_undefined(self, sample_dataframe):
+        df = sample_dataframe.assign(constant=5.0)
+        moments = CrossMoments(["age", "constant"])
+        moments.update(df)
+
+        assert moments.correlation("age", "constant") is None
+        assert moments.target_correlations("age").isna().all()
+
+    def test_round_trip_through_table_stats(self, mixed_dataframe):
+        columns = list(mixed_dataframe.columns)
+        table_stats = TableStats(columns, MIXED_TYPES)
+        table_stats.update(mixed_dataframe)
+        names = [name for name, _ in STATS_COLUMNS]
+        rows = [dict(zip(names, record)) for record in table_stats.records("data", columns)]
+        moments_row = dict(zip(
+            [name for name, _ in MOMENTS_COLUMNS],
+            table_stats.moments_record("data", columns),
+        ))
+
+        restored = TableStats.from_rows(rows, columns, MIXED_TYPES, moments_row)
+
+        assert restored.moments.columns == NUMERIC_COLUMNS
+        np.testing.assert_array_equal(
+            restored.moments.correlation_matrix(), table_stats.moments.correlation_matrix()
+        )
+        assert TableStats.from_rows(rows, columns, MIXED_TYPES) is None
@@ -0,0 +1,73 @@
+"""Tests for the pairwise-complete correlation engine"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.correlation import (
+    TargetMoments,
+    column_values,
+    correlation_matrix,
+    target_correlations,
+)
+
+
+@pytest.fixture
+def sparse_dataframe(sample_dataframe):
+    """Sample data with missing values scattered over different rows per column"""
+    df = sample_dataframe.astype(float)
+    df.loc[::7, "glucose"] = np.nan
+    df.loc[3::5, "bmi"] = np.nan
+    df.loc[::11, "outcome"] = np.nan
+    return df
+
+
+def _chunks(df, size):
+    return (df.iloc[start:start + size] for start in range(0, len(df), size))
+
+
+class TestTargetCorrelations:
+    """Target-only correlations over complete pairs"""
+
+    def test_matches_pairwise_pandas(self, sparse_dataframe):
+        corrs = target_correlations(sparse_dataframe, "outcome")
+
+        expected = sparse_dataframe.corr()["outcome"].drop(labels=["outcome"])
+        pd.testing.assert_series_equal(corrs, expected, check_names=False)
+
+    def test_chunked_matches_single_pass(self, sparse_dataframe):
+        moments = TargetMoments("outcome", list(sparse_dataframe.columns))
+        for chunk in _chunks(sparse_dataframe, 17):
+            moments.update(chunk)
+
+        pd.testing.assert_series_equal(moments.correlations(), target_correlations(sparse_dataframe, "outcome"))
+
+    def test_min_periods_and_constant_columns(self, sample_dataframe):
+        df = sample_dataframe.assign(
+            constant=1.0,
+            rare=np.where(np.arange(len(sample_dataframe)) < 3, sample_dataframe["age"], np.nan),
+        )
+
+        corrs = target_correlations(df, "outcome", min_periods=5)
+
+        assert np.isnan(corrs["constant"])
+        assert np.isnan(corrs["rare"])
+        assert not np.isnan(corrs["glucose"])
+
+    def test_float_columns_are_not_copied(self, sparse_dataframe):
+        values = column_values(sparse_dataframe, "glucose")
+
+        assert np.shares_memory(values, sparse_dataframe["glucose"].to_numpy())
+
+
+class TestCorrelationMatrix:
+    """Full pairwise-complete matrix, in chunks"""
+
+    def test_matches_pairwise_pandas(self, sparse_dataframe):
+        matrix = correlation_matrix(sparse_dataframe, chunk_rows=23)
+
+        np.testing.assert_allclose(matrix, sparse_dataframe.corr().values)
+
+    def test_columns_subset(self, sparse_dataframe):
+        columns = ["bmi", "age"]
+        matrix = correlation_matrix(sparse_dataframe, columns, chunk_rows=40)
+
+        np.testing.assert_allclose(matrix, sparse_dataframe[columns].corr().values)
@@ -0,0 +1,219 @@
+"""Tests for the CSV importer"""
+import io
+import sqlite3
+import pytest
+import pandas as pd
+from app.core.database import DatabaseManager
+from app.utils.csv_importer import CSVImporter
+
+
+CSV_CONTENT = b"""Patient Id,Age,BMI,Name,Visit Date,Notes
+1,34,22.5,alice,2024-01-02,
+2,51,,bob,2024-02-03,
+3,29,30.1,carol,2024-03-04,
+4,,27.0,,2024-04-05,
+"""
+
+
+@pytest.fixture
+async def engine(temp_data_dir):
+    """Writer engine for a fresh dataset in a temporary directory"""
+    manager = DatabaseManager()
+    manager.data_path = temp_data_dir
+    await manager.create_database("u1", "ds")
+    engine = await manager.get_writer_engine("u1", "ds")
+    yield engine
+    await manager.close_all()
+
+
+def _read_table(engine, table_name):
+    conn = sqlite3.connect(engine.url.database)
+    try:
+        return conn.execute(f"SELECT * FROM {table_name} ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+
+
+class TestImportCSV:
+    """Tests for CSVImporter.import_csv"""
+
+    async def test_import_round_trip(self, engine):
+        result = await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients")
+
+        assert result["rows_imported"] == 4
+        assert result["columns"] == ["Patient_Id", "Age", "BMI", "Name", "Visit_Date"]
+        assert result["dropped_columns"] == ["Notes"]
+
+        rows = _read_table(engine, "patients")
+        assert rows[0] == (1, 34.0, 22.5, "alice", "2024-01-02")
+        # Missing values are stored as NULL
+        assert rows[1][2] is None
+        assert rows[3][1] is None
+        assert rows[3][3] is None
+
+    async def test_reimport_replaces_table(self, engine):
+        await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients")
+        result = await CSVImporter.import_csv(engine, b"a,b\n1,2\n", table_name="patients")
+
+        assert result["rows_imported"] == 1
+        assert _read_table(engine, "patients") == [(1, 2)]
+
+    async def test_stream_in_chunks(self, engine):
+        # "late" is empty for the whole first chunk but filled afterwards;
+        # "sparse" is 99% missing across the whole file and gets dropped.
+        lines = ["id,late,sparse"]
+        for i in range(200):
+            late = "" if i < 50 else str(i)
+            sparse = "x" if i == 0 else ""
+            lines.append(f"{i},{late},{sparse}")
+        source = io.BytesIO("\n".join(lines).encode())
+
+        result = await CSVImporter.import_csv_stream(engine, source, table_name="big", chunk_rows=30)
+
+        assert result["rows_imported"] == 200
+        assert result["columns"] == ["id", "late"]
+        assert result["dropped_columns"] == ["sparse"]
+        rows = _read_table(engine, "big")
+        assert len(rows) == 200
+        assert rows[199] == (199, 199.0)
+
+    async def test_no_staging_table_left(self, engine):
+        await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients")
+        await CSVImporter.import_csv(engine, b"a,b\n1,2\n", table_name="patients")
+
+        conn = sqlite3.connect(engine.url.database)
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        conn.close()
+        assert "__si_import_patients" not in tables
+        assert "patients" in tables
+
+    async def test_column_stats_written(self, engine, temp_data_dir):
+        await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients")
+
+        manager = DatabaseManager()
+        manager.data_path = temp_data_dir
+        schema = await manager.get_schema("u1", "ds")
+        stats = await manager.get_column_stats("u1", "ds", "patients")
+        await manager.close_all()
+
+        # The stats table is metadata and stays out of the schema
+        assert [t["name"] for t in schema["tables"]] == ["patients"]
+        assert [s["column_name"] for s in stats] == ["Patient_Id", "Age", "BMI", "Name", "Visit_Date"]
+        age = stats[1]
+        assert age["row_count"] == 4
+        assert age["null_count"] == 1
+        assert (age["min"], age["max"], age["median"]) == (29.0, 51.0, 34.0)
+        assert stats[3]["distinct_estimate"] == 3
+        assert stats[3]["sample"] == ["alice", "bob", "carol"]
+
+    async def test_append_merges_statistics(self, engine, temp_data_dir):
+        await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients")
+        result = await CSVImporter.import_csv(
+            engine,
+            b"Age,Patient Id,Extra\n70,5,x\n18,6,y\n",
+            table_name="patients",
+            mode="append",
+        )
+
+        assert result["rows_imported"] == 2
+        assert result["total_rows"] == 6
+        assert result["ignored_columns"] == ["Extra"]
+        rows = _read_table(engine, "patients")
+        assert rows[4] == (5, 70, None, None, None)
+
+        manager = DatabaseManager()
+        manager.data_path = temp_data_dir
+        stats = await manager.get_column_stats("u1", "ds", "patients")
+        await manager.close_all()
+
+        age = stats[1]
+        assert age["row_count"] == 6
+        assert age["null_count"] == 1
+        assert (age["min"], age["max"]) == (18.0, 70.0)
+        assert age["mean"] == pytest.approx((34 + 51 + 29 + 70 + 18) / 5)
+        assert stats[0]["distinct_estimate"] == 6
+        assert stats[2]["null_count"] == 3
+
+    async def test_append_updates_cross_moments(self, engine, temp_data_dir):
+        await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients")
+        await CSVImporter.import_csv(
+            engine, b"Age,BMI\n70,35.5\n18,19.0\n", table_name="patients", mode="append"
+        )
+
+        manager = DatabaseManager()
+        manager.data_path = temp_data_dir
+        moments = await manager.get_cross_moments("u1", "ds", "patients")
+        await manager.close_all()
+
+        expected = pd.DataFrame({
+            "Age": [34, 51, 29, None, 70, 18],
+            "BMI": [22.5, None, 30.1, 27.0, 35.5, 19.0],
+        }).corr().loc["Age", "BMI"]
+        assert moments.columns == ["Patient_Id", "Age", "BMI"]
+        assert moments.row_count == 6
+        assert moments.correlation("Age", "BMI") == pytest.approx(expected)
+
+    async def test_cross_moments_cache_is_bounded(self, temp_data_dir):
+        manager = DatabaseManager()
+        manager.data_path = temp_data_dir
+        for dataset_id in ("a", "b"):
+            await manager.create_database("u1", dataset_id)
+            writer = await manager.get_writer_engine("u1", dataset_id)
+            await CSVImporter.import_csv(writer, CSV_CONTENT, table_name="patients")
+
+        first = await manager.get_cross_moments("u1", "a", "patients")
+        manager.moments_cache.max_bytes = first.nbytes
+        await manager.get_cross_moments("u1", "b", "patients")
+        stats = manager.moments_cache.stats()
+        await manager.close_all()
+
+        assert stats["entries"] == 1
+        assert stats["bytes"] <= first.nbytes
+
+    async def test_append_without_stored_stats_rescans(self, engine):
+        await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients")
+        conn = sqlite3.connect(engine.url.database)
+        conn.execute("DELETE FROM __si_column_stats")
+        conn.commit()
+        conn.close()
+
+        await CSVImporter.import_csv(
+            engine, b"Patient Id,Age\n5,70\n", table_name="patients", mode="append"
+        )
+
+        conn = sqlite3.connect(engine.url.database)
+        row = conn.execute(
+            "SELECT row_count, null_count, max FROM __si_column_stats WHERE column_name = 'Age'"
+        ).fetchone()
+        conn.close()
+        assert row == (5, 1, 70.0)
+
+    async def test_append_creates_missing_table(self, engine):
+        result = await CSVImporter.import_csv(engine, b"a,b\n1,2\n", table_name="fresh", mode="append")
+
+        assert result["total_rows"] == 1
+        assert _read_table(engine, "fresh") == [(1, 2)]
+
+    async def test_unknown_mode(self, engine):
+        with pytest.raises(ValueError):
+            await CSVImporter.import_csv(engine, CSV_CONTENT, table_name="patients", mode="merge")
+
+    async def test_empty_csv(self, engine):
+        with pytest.raises(Exception):
+            await CSVImporter.import_csv(engine, b"", table_name="empty")
+
+
+class TestValueConversion:
+    """Tests for column conversion helpers"""
+
+    def test_datetimes_are_formatted_per_column(self):
+        series = pd.Series(pd.to_datetime(["2024-01-02", None, "2024-03-04"]))
+
+        assert CSVImporter.to_sqlite_values(series) == ["2024-01-02", None, "2024-03-04"]
+
+    def test_batches(self):
+        df = pd.DataFrame({"a": [1, 2, 3], "b": [0.5, None, 1.5]})
+        batches = CSVImporter.dataframe_batches(df, batch_size=2)
+
+        assert batches == [[(1, 0.5), (2, None)], [(3, 1.5)]]
+        assert type(batches[0][0][0]) is int
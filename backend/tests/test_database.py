@@ -0,0 +1,208 @@
+"""Tests for the database manager"""
+import asyncio
+import sqlite3
+import pytest
+import numpy as np
+import pandas as pd
+from app.core.database import DatabaseManager
+
+
+@pytest.fixture
+def db(temp_data_dir):
+    """Database manager rooted in a temporary directory"""
+    manager = DatabaseManager()
+    manager.data_path = temp_data_dir
+    yield manager
+
+
+@pytest.fixture
+def populated_db(db):
+    """Create a small typed table for user 'u1', dataset 'ds'"""
+    conn = sqlite3.connect(db.get_database_path("u1", "ds"))
+    conn.execute('CREATE TABLE data ("id" INTEGER, "score" REAL, "maybe" INTEGER, "name" TEXT)')
+    conn.executemany(
+        "INSERT INTO data VALUES (?, ?, ?, ?)",
+        [(i, i * 1.5, None if i % 4 == 0 else i, f"n{i}") for i in range(10)],
+    )
+    conn.commit()
+    conn.close()
+    return db
+
+
+COLUMN_TYPES = {"id": "INTEGER", "score": "REAL", "maybe": "INTEGER", "name": "TEXT"}
+
+
+class TestExecuteFrame:
+    """Tests for the columnar DataFrame fetch path"""
+
+    async def test_typed_columns(self, populated_db):
+        df = await populated_db.execute_frame("u1", "ds", "SELECT * FROM data", column_types=COLUMN_TYPES)
+        await populated_db.close_all()
+
+        assert list(df.columns) == ["id", "score", "maybe", "name"]
+        assert df["id"].dtype == np.int64
+        assert df["score"].dtype == np.float64
+        # INTEGER column with NULLs is promoted to float with NaN
+        assert df["maybe"].dtype == np.float64
+        assert df["maybe"].isna().sum() == 3
+        assert pd.api.types.is_string_dtype(df["name"])
+        assert df["name"].tolist() == [f"n{i}" for i in range(10)]
+
+    async def test_chunked_matches_dict_path(self, populated_db):
+        df = await populated_db.execute_frame(
+            "u1", "ds", "SELECT * FROM data", column_types=COLUMN_TYPES, chunk_size=3
+        )
+        rows = await populated_db.execute_query("u1", "ds", "SELECT * FROM data")
+        await populated_db.close_all()
+
+        pd.testing.assert_frame_equal(df, pd.DataFrame(rows))
+
+    async def test_empty_result_keeps_columns(self, populated_db):
+        df = await populated_db.execute_frame("u1", "ds", "SELECT id, name FROM data WHERE id < 0")
+        await populated_db.close_all()
+
+        assert df.empty
+        assert list(df.columns) == ["id", "name"]
+
+    async def test_reads_are_read_only(self, populated_db):
+        with pytest.raises(Exception):
+            await populated_db.execute_query("u1", "ds", "DELETE FROM data")
+        rows = await populated_db.execute_query("u1", "ds", "SELECT COUNT(*) AS n FROM data")
+        await populated_db.close_all()
+
+        assert rows[0]["n"] == 10
+
+    async def test_writer_enables_wal(self, db):
+        await db.create_database("u1", "new")
+        engine = await db.get_writer_engine("u1", "new")
+        async with engine.connect() as conn:
+            mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+        await db.close_all()
+
+        assert mode == "wal"
+
+    async def test_missing_database(self, db):
+        with pytest.raises(FileNotFoundError):
+            await db.execute_frame("u1", "missing", "SELECT 1")
+
+
+class TestSchemaCache:
+    """Tests for the per-dataset schema cache"""
+
+    async def test_schema_is_cached(self, populated_db):
+        first = await populated_db.get_schema("u1", "ds")
+        second = await populated_db.get_schema("u1", "ds")
+        await populated_db.close_all()
+
+        assert first is second
+        assert [c["name"] for c in first["tables"][0]["columns"]] == ["id", "score", "maybe", "name"]
+
+    async def test_schema_change_is_detected(self, populated_db):
+        await populated_db.get_schema("u1", "ds")
+
+        conn = sqlite3.connect(populated_db.get_database_path("u1", "ds"))
+        conn.execute('CREATE TABLE extra ("x" INTEGER)')
+        conn.commit()
+        conn.close()
+
+        schema = await populated_db.get_schema("u1", "ds")
+        await populated_db.close_all()
+
+        assert [t["name"] for t in schema["tables"]] == ["data", "extra"]
+
+    async def test_invalidate_by_engine(self, populated_db):
+        first = await populated_db.get_schema("u1", "ds")
+        engine = await populated_db.get_writer_engine("u1", "ds")
+        populated_db.invalidate_engine_schema(engine)
+        second = await populated_db.get_schema("u1", "ds")
+        await populated_db.close_all()
+
+        assert first is not second
+        assert first == second
+
+    async def test_invalidate_by_dataset(self, populated_db):
+        await populated_db.get_schema("u1", "ds")
+        populated_db.invalidate_schema("u1", "ds")
+        await populated_db.close_all()
+
+        assert ("u1", "ds") not in populated_db.schema_cache
+
+
+class TestEnginePool:
+    """Tests for the bounded LRU engine pool"""
+
+    async def test_hits_and_misses(self, db):
+        first = await db.get_engine("u1", "a")
+        second = await db.get_engine("u1", "a")
+        stats = db.pool_stats()
+        await db.close_all()
+
+        assert first is second
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["open_engines"] == 1
+
+    async def test_lru_eviction(self, db):
+        db.engine_pool_max_size = 2
+        await db.get_engine("u1", "a")
+        await db.get_engine("u1", "b")
+        await db.get_engine("u1", "a")  # "b" is now least recently used
+        await db.get_engine("u1", "c")
+        stats = db.pool_stats()
+        keys = list(db.connections)
+        await db.close_all()
+
+        assert keys == ["u1:a", "u1:c"]
+        assert stats["evictions"] == 1
+        assert stats["open_engines"] == 2
+
+    async def test_returned_engine_stays_tracked(self, db):
+        db.engine_pool_max_size = 1
+        engines = await asyncio.gather(*(db.get_engine("u1", name) for name in "abcd"))
+        last = engines[-1]
+        tracked = list(db.connections.values())
+        await db.close_all()
+
+        assert tracked == [last]
+        assert db.pool_stats()["evictions"] == 3
+
+    async def test_create_database_keeps_writer_pooled(self, db):
+        await db.create_database("u1", "new")
+        keys = list(db.connections)
+        await db.close_all()
+
+        assert keys == ["u1:new:writer"]
+
+    async def test_idle_eviction(self, db):
+        await db.get_engine("u1", "a")
+        db.last_used["u1:a"] -= db.engine_idle_timeout + 1
+        await db.get_engine("u1", "b")
+        keys = list(db.connections)
+        await db.close_all()
+
+        assert keys == ["u1:b"]
+        assert db.pool_stats()["evictions"] == 1
+
+    async def test_evict_idle_engines_without_traffic(self, db):
+        await db.get_engine("u1", "a")
+        await db.get_engine("u1", "b")
+        db.last_used["u1:a"] -= db.engine_idle_timeout + 1
+        await db.evict_idle_engines()
+        keys = list(db.connections)
+        await db.close_all()
+
+        assert keys == ["u1:b"]
+
+    async def test_idle_sweeper_stops_on_close(self, db):
+        db.start_idle_sweeper()
+        sweeper = db.idle_sweeper
+        await db.close_all()
+
+        assert db.idle_sweeper is None
+        assert sweeper.cancelling() or sweeper.cancelled()
+
+    async def test_release_engine(self, db):
+        await db.get_engine("u1", "a")
+        await db.release_engine("u1", "a")
+
+        assert db.pool_stats()["open_engines"] == 0
@@ -0,0 +1,90 @@
+"""Tests for the CPU executor"""
+import asyncio
+import threading
+import time
+import pytest
+from app.core.executor import CPUExecutor
+
+
+def _square(value):
+    return value * value
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+class TestCPUExecutor:
+    """Tests for CPUExecutor"""
+
+    async def test_runs_off_the_event_loop(self):
+        executor = CPUExecutor(max_workers=2)
+        thread_names = await asyncio.gather(*[
+            executor.run(lambda: threading.current_thread().name) for _ in range(2)
+        ])
+        executor.shutdown()
+
+        assert all(name.startswith("cpu") for name in thread_names)
+        assert executor.stats()["completed"] == 2
+
+    async def test_errors_are_reraised_and_counted(self):
+        executor = CPUExecutor(max_workers=1)
+        with pytest.raises(RuntimeError, match="boom"):
+            await executor.run(_fail)
+        executor.shutdown()
+
+        stats = executor.stats()
+        assert stats["failed"] == 1
+        assert stats["completed"] == 0
+        assert stats["running"] == 0
+
+    async def test_queue_depth_and_admission_limit(self):
+        executor = CPUExecutor(max_workers=1, max_pending=2)
+        release = threading.Event()
+        tasks = [asyncio.create_task(executor.run(release.wait)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+
+        stats = executor.stats()
+        assert stats["running"] == 1
+        assert stats["submitted"] == 2
+        # One admitted call waits for the worker, two wait for admission
+        assert stats["queue_depth"] == 3
+
+        release.set()
+        await asyncio.gather(*tasks)
+        executor.shutdown()
+
+        stats = executor.stats()
+        assert stats["completed"] == 4
+        assert stats["queue_depth"] == 0
+        assert stats["max_queue_depth"] >= 1
+
+    async def test_process_pool(self):
+        executor = CPUExecutor(kind="process", max_workers=1)
+        try:
+            assert await executor.run(_square, 7) == 49
+        finally:
+            executor.shutdown()
+
+        assert executor.stats()["kind"] == "process"
+
+    async def test_blocking_work_keeps_loop_responsive(self):
+        executor = CPUExecutor(max_workers=1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await executor.run(time.sleep, 0.2)
+        task.cancel()
+        executor.shutdown()
+
+        assert ticks > 5
+
+    def test_unknown_kind(self):
+        with pytest.raises(ValueError):
+            CPUExecutor(kind="gpu")
@@ -0,0 +1,67 @@
+"""Tests for background CSV import jobs"""
+import asyncio
+import sqlite3
+import pytest
+from app.core.database import db_manager
+from app.services.import_jobs import ImportJob, ImportJobManager
+
+
+@pytest.fixture
+async def jobs(temp_data_dir, monkeypatch):
+    """Job manager writing datasets into a temporary directory"""
+    monkeypatch.setattr(db_manager, "data_path", temp_data_dir)
+    yield ImportJobManager()
+    await db_manager.release_engine("u1", "ds")
+
+
+async def _wait(manager, job):
+    task = manager.tasks.get(job.job_id)
+    if task is not None:
+        await asyncio.wait_for(task, timeout=10)
+
+
+class TestImportJobManager:
+    """Tests for ImportJobManager"""
+
+    async def test_job_imports_and_reports_progress(self, jobs, temp_data_dir):
+        csv_path = temp_data_dir / "upload.csv"
+        csv_path.write_bytes(b"a,b\n" + b"".join(f"{i},{i * 2}\n".encode() for i in range(100)))
+
+        job = jobs.submit("u1", "ds", csv_path, table_name="t", total_bytes=csv_path.stat().st_size)
+        assert job.status == "queued"
+        assert jobs.get(job.job_id) is job
+
+        await _wait(jobs, job)
+        state = job.to_dict()
+
+        assert state["status"] == "succeeded"
+        assert state["rows_parsed"] == 100
+        assert state["rows_inserted"] == 100
+        assert state["bytes_read"] == state["total_bytes"]
+        assert state["result"]["rows_imported"] == 100
+        assert not csv_path.exists()
+
+        conn = sqlite3.connect(db_manager.get_database_path("u1", "ds"))
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 100
+        conn.close()
+
+    async def test_failed_job_records_error(self, jobs, temp_data_dir):
+        csv_path = temp_data_dir / "empty.csv"
+        csv_path.write_bytes(b"")
+
+        job = jobs.submit("u1", "ds", csv_path, table_name="t")
+        await _wait(jobs, job)
+
+        assert job.status == "failed"
+        assert job.error
+        assert not csv_path.exists()
+
+    def test_trim_keeps_unfinished_jobs(self, jobs):
+        jobs.max_jobs = 1
+        for status in ("succeeded", "running"):
+            job = ImportJob("u1", "ds", "t")
+            job.status = status
+            jobs.jobs[job.job_id] = job
+        jobs._trim()
+
+        assert [j.status for j in jobs.jobs.values()] == ["running"]
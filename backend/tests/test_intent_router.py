@@ -0,0 +1,127 @@
+"""Tests for the deterministic intent router"""
+import pytest
+from app.services.intent_router import route_question, find_column_mentions
+from app.services.query_service import QueryService
+
+
+COLUMNS = {
+    "Pregnancies": "INTEGER",
+    "Glucose": "INTEGER",
+    "BloodPressure": "INTEGER",
+    "BMI": "REAL",
+    "Age": "INTEGER",
+    "Outcome": "INTEGER",
+    "Group": "TEXT",
+}
+SCHEMA = {
+    "tables": [
+        {
+            "name": "diabetes",
+            "columns": [{"name": name, "type": sql_type} for name, sql_type in COLUMNS.items()],
+        }
+    ]
+}
+
+
+def _slots(plan):
+    """The non-default slots of a plan"""
+    return {k: v for k, v in plan.items() if v not in (None, [], "quick")}
+
+
+class TestRouteQuestion:
+    """Common phrasings are planned without the LLM"""
+
+    @pytest.mark.parametrize("question, expected", [
+        ("Give me an overview", {"intent": "overview", "playbook": "overview"}),
+        ("Summarize this dataset please", {"intent": "overview", "playbook": "overview"}),
+        (
+            "What is the distribution of glucose?",
+            {"intent": "distribution", "playbook": "distribution", "feature": "Glucose"},
+        ),
+        (
+            "histogram of blood pressure with 20 bins",
+            {"intent": "distribution", "playbook": "distribution", "feature": "BloodPressure", "bins": 20},
+        ),
+        (
+            "Glucose vs Age",
+            {"intent": "relationship", "playbook": "relationship", "feature_x": "Glucose", "feature_y": "Age"},
+        ),
+        (
+            "relationship between BMI and age",
+            {"intent": "relationship", "playbook": "relationship", "feature_x": "BMI", "feature_y": "Age"},
+        ),
+        (
+            "Compare glucose by group",
+            {"intent": "compare_groups", "playbook": "segment_comparison", "segment_column": "Group", "target": "Glucose"},
+        ),
+        (
+            "compare glucose by outcome",
+            {"intent": "compare_groups", "playbook": "segment_comparison", "segment_column": "Outcome", "target": "Glucose"},
+        ),
+        (
+            "Top 5 drivers of Outcome",
+            {"intent": "drivers", "playbook": "correlation", "target": "Outcome", "top_n": 5},
+        ),
+        (
+            "What is the class balance?",
+            {"intent": "outcome_breakdown", "playbook": "outcome_breakdown", "target": "Outcome"},
+        ),
+    ])
+    def test_recognized(self, question, expected):
+        plan = route_question(question, SCHEMA)
+
+        assert plan is not None
+        assert _slots(plan) == expected
+        assert plan["filter_segment"] is None
+        assert plan["secondary_playbooks"] == []
+
+    @pytest.mark.parametrize("question", [
+        "Show glucose only for patients over 50",
+        "distribution of glucose for age > 40",
+        "distribution of glucose by outcome",  # ambiguous: distribution and comparison
+        "tell me something interesting",
+        "distribution of group",  # not numeric
+        "summary of glucose",
+        "what drives group",  # text target
+        "top 3 drivers of group",
+        "compare glucose by age",  # continuous segment column
+        "Is glucose correlated with BMI?",  # glucose would be ignored
+        "what is the distribution of age for diabetics",  # unhandled filter
+    ])
+    def test_falls_back_to_llm(self, question):
+        assert route_question(question, SCHEMA) is None
+
+    def test_deep_mode(self):
+        assert route_question("detailed overview", SCHEMA)["mode"] == "deep"
+
+    def test_column_mentions(self):
+        template, mentions = find_column_mentions("blood pressure vs bloodpressure and ages", list(COLUMNS))
+
+        assert template == "{0} vs {1} and ages"
+        assert mentions == ["BloodPressure", "BloodPressure"]
+
+
+class StubLLM:
+    """Local stand-in for LLMClient"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_json(self, messages, temperature=0.3, timeout=None):
+        self.calls += 1
+        return {"intent": "overview", "playbook": "overview"}
+
+
+class TestPlannerFastPath:
+    """QueryService uses the router ahead of the LLM"""
+
+    async def test_routed_questions_skip_llm(self):
+        service = QueryService()
+        service.llm = StubLLM()
+
+        plan = await service.select_analysis("what drives outcome", SCHEMA)
+        await service.select_analysis("tell me something interesting", SCHEMA)
+
+        assert plan["playbook"] == "correlation"
+        assert service.llm.calls == 1
+        assert service.router_metrics == {"routed": 1, "fallbacks": 1}
@@ -0,0 +1,175 @@
+"""Tests for the async LLM client wrapper"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+import pytest
+from app.core import llm
+from app.services.analysis_service import AnalysisService
+
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions that sleeps like a slow model"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        content = json.dumps({"ok": True})
+        if kwargs.get("stream"):
+            return self._stream(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, content: str):
+        yield SimpleNamespace(choices=[])
+        for start in range(0, len(content), 4):
+            delta = SimpleNamespace(content=content[start:start + 4])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """LLMClient whose requests go to FakeCompletions, limited to 2 in flight"""
+    completions = FakeCompletions()
+    slots = asyncio.Semaphore(2)
+    monkeypatch.setattr(llm, "get_request_slots", lambda: slots)
+    client = llm.LLMClient()
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+class TestLLMClient:
+    """Tests for LLMClient"""
+
+    async def test_calls_do_not_block_event_loop(self, fake_llm):
+        client, _ = fake_llm
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        result = await client.generate_json([{"role": "user", "content": "hi"}])
+        task.cancel()
+
+        assert result == {"ok": True}
+        assert ticks > 3
+
+    async def test_concurrency_limit(self, fake_llm):
+        client, completions = fake_llm
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            client.chat_completion([{"role": "user", "content": str(i)}]) for i in range(6)
+        ])
+
+        assert completions.max_in_flight == 2
+        assert time.perf_counter() - start >= 3 * completions.delay
+
+    async def test_per_call_timeout(self, fake_llm):
+        client, completions = fake_llm
+        await client.chat_completion([{"role": "user", "content": "hi"}], timeout=5)
+        await client.chat_completion([{"role": "user", "content": "hi"}])
+
+        assert completions.calls[0]["timeout"] == 5
+        assert "timeout" not in completions.calls[1]
+
+    async def test_errors_are_wrapped(self, fake_llm):
+        client, completions = fake_llm
+
+        async def fail(**kwargs):
+            raise RuntimeError("boom")
+
+        completions.create = fail
+        with pytest.raises(Exception, match="LLM API error: boom"):
+            await client.chat_completion([{"role": "user", "content": "hi"}])
+
+    async def test_client_is_shared(self):
+        assert llm.LLMClient().client is llm.LLMClient().client
+        await llm.close_async_client()
+
+    def test_each_loop_gets_its_own_client(self):
+        async def resources():
+            pair = (llm.get_async_client(), llm.get_request_slots())
+            async with pair[1]:
+                pass
+            return pair
+
+        async def close_and_reopen():
+            first = llm.get_async_client()
+            await llm.close_async_client()
+            return first, llm.get_async_client()
+
+        first = asyncio.run(resources())
+        second = asyncio.run(resources())
+        closed, reopened = asyncio.run(close_and_reopen())
+
+        assert first[0] is not second[0]
+        assert first[1] is not second[1]
+        assert closed is not reopened
+
+    async def test_stream_chat_completion(self, fake_llm):
+        client, completions = fake_llm
+        pieces = [
+            piece
+            async for piece in client.stream_chat_completion([{"role": "user", "content": "hi"}])
+        ]
+
+        assert len(pieces) > 1
+        assert json.loads("".join(pieces)) == {"ok": True}
+        assert completions.calls[0]["stream"] is True
+
+    async def test_stream_insights(self, fake_llm, monkeypatch):
+        client, completions = fake_llm
+        completions.create = _insights_create
+        service = AnalysisService()
+        service.llm = client
+
+        events = [
+            event
+            async for event in service.stream_insights("q", [{"a": 1}], "", {}, {"type": "table"})
+        ]
+
+        tokens = "".join(data for name, data in events if name == "token")
+        assert json.loads(tokens)["summary"] == "All good"
+        assert events[-1][0] == "insights"
+        assert events[-1][1]["summary"] == "All good"
+        assert events[-1][1]["follow_ups"]
+
+    async def test_stream_insights_falls_back(self, fake_llm):
+        client, completions = fake_llm
+
+        async def fail(**kwargs):
+            raise RuntimeError("boom")
+
+        completions.create = fail
+        service = AnalysisService()
+        service.llm = client
+
+        events = [
+            event
+            async for event in service.stream_insights("q", [{"a": 1}], "", {}, {"type": "table"})
+        ]
+
+        assert events == [("insights", service._generate_fallback_analysis(1, {}))]
+
+
+async def _insights_create(**kwargs):
+    async def stream():
+        for piece in ('{"summary": ', '"All good", ', '"key_findings": []}'):
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+    return stream()
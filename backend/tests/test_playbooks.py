@@ -3,6 +3,25 @@ import pytest
 import pandas as pd
 import numpy as np
 from app.services import playbooks
+from app.utils.column_stats import CrossMoments
+
+
+def _stored_stats(df, **overrides):
+    """Column statistics rows as stored at import, with per-column overrides"""
+    return [
+        {
+            "column_name": col,
+            "row_count": len(df),
+            "numeric_count": int(df[col].count()),
+            "min": float(df[col].min()),
+            "max": float(df[col].max()),
+            "mean": float(df[col].mean()),
+            "median": float(df[col].median()),
+            "distinct_estimate": int(df[col].nunique()),
+            **overrides.get(col, {}),
+        }
+        for col in df.columns
+    ]
 
 
 class TestOverviewPlaybook:
@@ -67,6 +86,68 @@ class TestCorrelationPlaybook:
         
         assert result["analysis_context"]["reason"] == "insufficient_data"
 
+    def test_missing_values_keep_rows(self, sample_dataframe):
+        """A sparse feature doesn't drop rows from the other features' correlations"""
+        df = sample_dataframe.copy()
+        df["sparse"] = np.where(np.arange(len(df)) % 3 == 0, df["glucose"], np.nan)
+
+        result = playbooks.correlation_playbook(df, outcome="outcome", top_n=10)
+
+        expected = df.corr()["outcome"].drop(labels=["outcome"])
+        top = result["analysis_context"]["top_correlations"]
+        assert set(top) == set(expected.index)
+        for name, value in top.items():
+            assert value == round(expected[name], 2)
+
+    def test_constant_column_is_skipped(self, sample_dataframe):
+        """A zero-variance feature has no correlation and is not ranked"""
+        df = sample_dataframe.assign(constant=1.0)
+
+        result = playbooks.correlation_playbook(df, outcome="outcome", top_n=10)
+
+        assert "constant" not in result["visualization"]["data"]["labels"]
+
+    def test_matrix_only_on_request(self, sample_dataframe):
+        """The full matrix is computed only when asked for"""
+        default = playbooks.correlation_playbook(sample_dataframe, outcome="outcome")
+        with_matrix = playbooks.correlation_playbook(
+            sample_dataframe, outcome="outcome", include_matrix=True
+        )
+
+        assert "metadata" not in default["visualization"]
+        matrix = with_matrix["visualization"]["metadata"]["correlation_matrix"]
+        expected = sample_dataframe.select_dtypes(include="number").corr()
+        assert matrix["labels"] == expected.columns.tolist()
+        np.testing.assert_allclose(matrix["matrix"], expected.values)
+
+
+    def test_stored_moments_give_same_ranking(self, sample_dataframe):
+        """Complete stored moments replace the row scan without changing the output"""
+        moments = CrossMoments(sample_dataframe.select_dtypes(include="number").columns.tolist())
+        moments.update(sample_dataframe)
+
+        from_rows = playbooks.correlation_playbook(sample_dataframe, outcome="outcome", include_matrix=True)
+        from_moments = playbooks.correlation_playbook(
+            sample_dataframe, outcome="outcome", include_matrix=True, moments=moments
+        )
+
+        assert from_moments["analysis_context"] == from_rows["analysis_context"]
+        np.testing.assert_allclose(
+            from_moments["visualization"]["metadata"]["correlation_matrix"]["matrix"],
+            from_rows["visualization"]["metadata"]["correlation_matrix"]["matrix"],
+        )
+
+    def test_stale_moments_are_ignored(self, sample_dataframe):
+        """Moments of a different row set (e.g. before a filter) are not used"""
+        moments = CrossMoments(sample_dataframe.select_dtypes(include="number").columns.tolist())
+        moments.update(sample_dataframe)
+        subset = sample_dataframe.iloc[:50]
+
+        result = playbooks.correlation_playbook(subset, outcome="outcome", moments=moments)
+
+        expected = playbooks.correlation_playbook(subset, outcome="outcome")
+        assert result["analysis_context"] == expected["analysis_context"]
+
 
 class TestDistributionPlaybook:
     """Tests for distribution_playbook"""
@@ -98,6 +179,23 @@ class TestDistributionPlaybook:
         assert result["analysis_context"]["kind"] == "distribution"
         assert "feature" in result["analysis_context"]
 
+    def test_stored_stats_are_used(self, sample_dataframe):
+        stats = _stored_stats(sample_dataframe, glucose={"mean": 123.0})
+
+        result = playbooks.distribution_playbook(sample_dataframe, feature="glucose", column_stats=stats)
+
+        assert result["analysis_context"]["mean"] == 123.0
+        assert result["analysis_context"]["row_count"] == 100
+
+    def test_stale_stats_are_ignored(self, sample_dataframe):
+        stats = _stored_stats(sample_dataframe, glucose={"mean": 123.0})
+
+        result = playbooks.distribution_playbook(
+            sample_dataframe.head(50), feature="glucose", column_stats=stats
+        )
+
+        assert result["analysis_context"]["mean"] == round(sample_dataframe["glucose"].head(50).mean(), 2)
+
     def test_distribution_playbook_no_numeric(self, empty_dataframe):
         """Test distribution playbook with no numeric columns"""
         df = pd.DataFrame({'text': ['a', 'b', 'c']})
@@ -151,6 +249,20 @@ class TestSegmentComparisonPlaybook:
         assert result["analysis_context"]["kind"] == "segment_comparison"
         assert "segments" in result["analysis_context"]
 
+    def test_fallback_segment_from_scan(self, sample_dataframe):
+        result = playbooks.segment_comparison_playbook(sample_dataframe, outcome="glucose")
+
+        assert result["analysis_context"]["segment_column"] == "outcome"
+
+    def test_fallback_segment_from_stored_stats(self, sample_dataframe):
+        stats = _stored_stats(sample_dataframe, age={"distinct_estimate": 4})
+
+        result = playbooks.segment_comparison_playbook(
+            sample_dataframe, outcome="glucose", column_stats=stats
+        )
+
+        assert result["analysis_context"]["segment_column"] == "age"
+
 
 class TestRelationshipPlaybook:
     """Tests for relationship_playbook"""
@@ -169,6 +281,29 @@ class TestRelationshipPlaybook:
         assert "y" in result["visualization"]["data"]
         assert len(result["visualization"]["data"]["x"]) > 0
 
+    def test_relationship_playbook_downsamples(self):
+        """Large scatters are capped; correlation still uses every point"""
+        rng = np.random.default_rng(1)
+        x = rng.normal(0, 1, 50_000)
+        df = pd.DataFrame({"x": x, "y": 2 * x + rng.normal(0, 1, 50_000)})
+        df.loc[123, ["x", "y"]] = [40.0, -40.0]
+
+        result = playbooks.relationship_playbook(df, feature_x="x", feature_y="y", max_points=500)
+        data = result["visualization"]["data"]
+        context = result["analysis_context"]
+
+        assert len(data["x"]) == len(data["y"]) == 500
+        assert context["point_count"] == 50_000
+        assert context["plotted_points"] == 500
+        assert context["correlation"] == round(df["x"].corr(df["y"]), 3)
+        # The lone outlier gets its own grid cell, so it is always kept
+        assert (40.0, -40.0) in zip(data["x"], data["y"])
+
+    def test_scatter_sample_indices_small_input(self):
+        """Inputs within budget are returned whole"""
+        values = np.arange(10, dtype=float)
+        assert playbooks.scatter_sample_indices(values, values, 100).tolist() == list(range(10))
+
     def test_relationship_playbook_auto_features(self, sample_dataframe):
         """Test relationship playbook with auto-selected features"""
         result = playbooks.relationship_playbook(
@@ -182,3 +317,25 @@ class TestRelationshipPlaybook:
         assert "feature_y" in result["analysis_context"]
 
 
+class TestSegmentedDistributionPlaybook:
+    """Tests for segmented_distribution_playbook"""
+
+    def test_segment_summaries(self, sample_dataframe):
+        """Per-segment statistics come from one grouped aggregation"""
+        result = playbooks.segmented_distribution_playbook(
+            sample_dataframe, feature="glucose", segment_column="outcome"
+        )
+
+        context = result["analysis_context"]
+        grouped = sample_dataframe.groupby("outcome")["glucose"]
+        assert context["segment_means"] == {
+            str(seg): round(float(mean), 2) for seg, mean in grouped.mean().items()
+        }
+        for summary in context["segment_summaries"]:
+            series = grouped.get_group(int(summary["segment"]))
+            assert summary["count"] == len(series)
+            assert summary["median"] == round(float(series.median()), 2)
+            assert (summary["min"], summary["max"]) == (
+                round(float(series.min()), 2),
+                round(float(series.max()), 2),
+            )
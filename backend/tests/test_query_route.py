@@ -0,0 +1,383 @@
+"""Tests for the query pipeline behind /query and /query/stream"""
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from app.api.routes import query as query_routes
+from app.config import settings
+from app.services import playbooks
+from app.services.result_cache import result_cache
+from app.utils import column_scan
+from app.utils.csv_importer import CSVImporter
+
+
+@pytest.fixture
+async def dataset(sample_dataframe, temp_data_dir, monkeypatch):
+    """Import the sample data for user 'route_user', dataset 'route_ds'"""
+    db_manager = query_routes.db_manager
+    monkeypatch.setattr(db_manager, "data_path", temp_data_dir)
+    await db_manager.create_database("route_user", "route_ds")
+    engine = await db_manager.get_writer_engine("route_user", "route_ds")
+    await CSVImporter.import_csv(engine, sample_dataframe.to_csv(index=False).encode(), table_name="data")
+    result_cache.clear()
+    yield query_routes.QueryRequest(user_id="route_user", dataset_id="route_ds", query="q")
+    result_cache.clear()
+    await db_manager.close_all()
+
+
+def _use_plan(monkeypatch, **plan):
+    """Skip the LLM: fixed plan and a canned narrative"""
+    async def select_analysis(user_query, schema_info):
+        return {"intent": "custom", "secondary_playbooks": [], **plan}
+
+    async def generate_insights(*args, **kwargs):
+        return {"summary": "done", "key_findings": [], "patterns": [], "recommendations": []}
+
+    monkeypatch.setattr(query_routes.query_service, "select_analysis", select_analysis)
+    monkeypatch.setattr(query_routes.analysis_service, "generate_insights", generate_insights)
+
+
+def _slow(playbook, delay):
+    """Wrap a playbook so it blocks its worker thread for `delay` seconds"""
+    def run(*args, **kwargs):
+        time.sleep(delay)
+        return playbook(*args, **kwargs)
+    return run
+
+
+class TestAggregateStructure:
+    """SQL aggregate plans describe the whole table, not the aggregated rows"""
+
+    async def test_without_column_stats(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, playbook="distribution", feature="glucose", bins=10)
+
+        async def no_stats(*args, **kwargs):
+            return None
+
+        monkeypatch.setattr(query_routes.db_manager, "get_column_stats", no_stats)
+
+        response = await query_routes.execute_query(dataset)
+
+        assert response.total_rows == 100
+        assert response.data_structure["row_count"] == 100
+        assert set(response.data_structure["columns"]) == set(sample_dataframe.columns)
+        assert "glucose" in response.data_structure["numeric_columns"]
+
+    async def test_stats_overview_counts_rows(self, dataset, monkeypatch):
+        _use_plan(monkeypatch, intent="overview", playbook="overview")
+
+        response = await query_routes.execute_query(dataset)
+
+        assert response.total_rows == 100
+
+    async def test_stats_overview_pages_table_rows(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, intent="overview", playbook="overview")
+        request = dataset.model_copy(update={"results_mode": "page", "page_size": 60})
+
+        response = await query_routes.execute_query(request)
+        page = await query_routes.get_result_page(response.next_cursor, limit=60)
+
+        assert response.sql == 'SELECT * FROM "data"'
+        ages = [row["age"] for row in response.results + page.results]
+        assert ages == sample_dataframe["age"].tolist()
+
+
+class TestSecondaryPlaybooks:
+    """Secondary playbooks run concurrently on the worker pool"""
+
+    async def test_run_concurrently_in_planner_order(self, dataset, monkeypatch):
+        _use_plan(
+            monkeypatch,
+            playbook="relationship",
+            feature_x="glucose",
+            feature_y="bmi",
+            target="outcome",
+            feature="glucose",
+            secondary_playbooks=["correlation", "feature_outcome_profile", "segmented_distribution"],
+        )
+        for name in ("correlation_playbook", "feature_outcome_profile_playbook", "segmented_distribution_playbook"):
+            monkeypatch.setattr(playbooks, name, _slow(getattr(playbooks, name), 0.2))
+
+        start = time.perf_counter()
+        response = await query_routes.execute_query(dataset)
+        elapsed = time.perf_counter() - start
+
+        titles = [viz["config"]["title"] for viz in response.extra_visualizations]
+        assert len(titles) == 3
+        assert titles[0].startswith("Top ")
+        assert elapsed < 0.5
+
+    async def test_timed_out_playbook_is_skipped(self, dataset, monkeypatch):
+        _use_plan(
+            monkeypatch,
+            playbook="relationship",
+            feature_x="glucose",
+            feature_y="bmi",
+            target="outcome",
+            secondary_playbooks=["correlation", "outcome_breakdown"],
+        )
+        monkeypatch.setattr(settings, "secondary_playbook_timeout_seconds", 0.1)
+        monkeypatch.setattr(playbooks, "correlation_playbook", _slow(playbooks.correlation_playbook, 0.5))
+
+        response = await query_routes.execute_query(dataset)
+
+        assert [viz["type"] for viz in response.extra_visualizations] == ["pie"]
+
+    async def test_event_loop_stays_responsive(self, dataset, monkeypatch):
+        _use_plan(
+            monkeypatch,
+            playbook="relationship",
+            feature_x="glucose",
+            feature_y="bmi",
+            target="outcome",
+            secondary_playbooks=["correlation"],
+        )
+        monkeypatch.setattr(playbooks, "correlation_playbook", _slow(playbooks.correlation_playbook, 0.2))
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await query_routes.execute_query(dataset)
+        task.cancel()
+
+        assert ticks > 5
+
+
+class TestResultCache:
+    """Repeated plans on unchanged data skip the fetch and playbooks"""
+
+    async def test_repeat_is_served_from_cache(self, dataset, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+        calls = 0
+        relationship = playbooks.relationship_playbook
+
+        def counting(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return relationship(*args, **kwargs)
+
+        monkeypatch.setattr(playbooks, "relationship_playbook", counting)
+
+        first = await query_routes.execute_query(dataset)
+        second = await query_routes.execute_query(dataset)
+
+        assert calls == 1
+        assert second.visualization == first.visualization
+        assert second.total_rows == first.total_rows == 100
+        assert result_cache.stats()["hits"] >= 1
+
+    async def test_table_rows_are_refetched(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+
+        await query_routes.execute_query(dataset)
+        (_, entry), = result_cache.entries.values()
+        hits = result_cache.stats()["hits"]
+        second = await query_routes.execute_query(
+            dataset.model_copy(update={"results_mode": "page", "page_size": 10})
+        )
+
+        assert entry["results"] is None
+        assert result_cache.stats()["hits"] == hits + 1
+        assert [row["age"] for row in second.results] == sample_dataframe["age"].head(10).tolist()
+
+    async def test_import_invalidates(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+        first = await query_routes.execute_query(dataset)
+
+        engine = await query_routes.db_manager.get_writer_engine("route_user", "route_ds")
+        await CSVImporter.import_csv(
+            engine, sample_dataframe.head(10).to_csv(index=False).encode(), table_name="data"
+        )
+        second = await query_routes.execute_query(dataset)
+
+        assert first.total_rows == 100
+        assert second.total_rows == 10
+
+    async def test_partial_results_are_not_cached(self, dataset, monkeypatch):
+        _use_plan(
+            monkeypatch,
+            playbook="relationship",
+            feature_x="glucose",
+            feature_y="bmi",
+            target="outcome",
+            secondary_playbooks=["correlation"],
+        )
+        monkeypatch.setattr(settings, "secondary_playbook_timeout_seconds", 0.1)
+        monkeypatch.setattr(playbooks, "correlation_playbook", _slow(playbooks.correlation_playbook, 0.3))
+
+        await query_routes.execute_query(dataset)
+
+        assert result_cache.stats()["entries"] == 0
+
+
+class TestStoredMoments:
+    """Correlations on an unfiltered table come from the import-time moments"""
+
+    async def test_correlation_skips_row_scan(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, playbook="correlation", target="outcome", top_n=3)
+
+        def no_scan(*args, **kwargs):
+            raise AssertionError("rows were scanned")
+
+        monkeypatch.setattr(playbooks, "target_correlations", no_scan)
+
+        response = await query_routes.execute_query(dataset)
+
+        expected = sample_dataframe.corr()["outcome"].drop(labels=["outcome"])
+        top = expected.reindex(expected.abs().sort_values(ascending=False).index).head(3)
+        assert response.visualization["data"]["labels"] == top.index.tolist()
+
+    async def test_filtered_frame_scans_rows(self, dataset, monkeypatch):
+        _use_plan(
+            monkeypatch,
+            playbook="correlation",
+            target="outcome",
+            focus_range={"feature": "age", "min": 30, "max": 60},
+        )
+        calls = 0
+        target_correlations = playbooks.target_correlations
+
+        def counting(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return target_correlations(*args, **kwargs)
+
+        monkeypatch.setattr(playbooks, "target_correlations", counting)
+
+        await query_routes.execute_query(dataset)
+
+        assert calls == 1
+
+
+class TestSharedColumnScan:
+    """Playbooks in one request share one scan of each column they need"""
+
+    def _count_scans(self, monkeypatch):
+        scanned = []
+        compute = column_scan.compute_column_summaries
+
+        def counting(df, columns=None):
+            scanned.extend(df.columns if columns is None else columns)
+            return compute(df, columns)
+
+        monkeypatch.setattr(column_scan, "compute_column_summaries", counting)
+        return scanned
+
+    async def test_each_column_scanned_once(self, dataset, monkeypatch):
+        # The focus range filters rows, so the stored statistics don't apply
+        _use_plan(
+            monkeypatch,
+            playbook="relationship",
+            feature_x="glucose",
+            feature_y="bmi",
+            feature="glucose",
+            secondary_playbooks=["segmented_distribution", "segment_comparison", "distribution"],
+            focus_range={"feature": "age", "min": 30, "max": 60},
+        )
+        scanned = self._count_scans(monkeypatch)
+
+        response = await query_routes.execute_query(dataset)
+
+        assert len(response.extra_visualizations) == 3
+        assert scanned
+        assert len(scanned) == len(set(scanned))
+
+    async def test_stored_stats_skip_scan(self, dataset, monkeypatch):
+        _use_plan(
+            monkeypatch,
+            playbook="distribution",
+            feature="glucose",
+            secondary_playbooks=["segmented_distribution", "segment_comparison"],
+        )
+        scanned = self._count_scans(monkeypatch)
+
+        response = await query_routes.execute_query(dataset)
+
+        assert len(response.extra_visualizations) == 2
+        assert response.data_structure["feature"] == "glucose"
+        assert scanned == []
+
+
+class TestResultRows:
+    """Raw rows are omitted by default and paged or sampled on request"""
+
+    async def test_rows_omitted_by_default(self, dataset, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+
+        response = await query_routes.execute_query(dataset)
+
+        assert response.results == []
+        assert response.total_rows == 100
+        assert response.next_cursor is None
+
+    async def test_pages_follow_cursor(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+        request = dataset.model_copy(update={"results_mode": "page", "page_size": 40})
+
+        response = await query_routes.execute_query(request)
+        rows = list(response.results)
+        cursor = response.next_cursor
+        while cursor:
+            page = await query_routes.get_result_page(cursor, limit=40)
+            rows.extend(page.results)
+            cursor = page.next_cursor
+
+        assert len(response.results) == 40
+        assert [row["age"] for row in rows] == sample_dataframe["age"].tolist()
+
+    async def test_cursor_does_not_hold_table_rows(self, dataset, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+        request = dataset.model_copy(update={"results_mode": "page", "page_size": 40})
+
+        response = await query_routes.execute_query(request)
+        result_id = response.next_cursor.split(":")[0]
+
+        assert query_routes.result_pages.get(result_id)["row_count"] == 100
+
+    async def test_cursor_expires_when_data_changes(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+        request = dataset.model_copy(update={"results_mode": "page", "page_size": 40})
+
+        response = await query_routes.execute_query(request)
+        engine = await query_routes.db_manager.get_writer_engine("route_user", "route_ds")
+        await CSVImporter.import_csv(
+            engine, sample_dataframe.head(10).to_csv(index=False).encode(), table_name="data"
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await query_routes.get_result_page(response.next_cursor, limit=40)
+
+        assert exc_info.value.status_code == 404
+
+    async def test_sample_is_evenly_spaced(self, dataset, sample_dataframe, monkeypatch):
+        _use_plan(monkeypatch, playbook="relationship", feature_x="glucose", feature_y="bmi")
+        request = dataset.model_copy(update={"results_mode": "sample", "page_size": 5})
+
+        response = await query_routes.execute_query(request)
+
+        ages = sample_dataframe["age"].tolist()
+        assert [row["age"] for row in response.results] == [ages[i] for i in (0, 24, 49, 74, 99)]
+        assert response.next_cursor is None
+
+    async def test_aggregate_rows_are_paged(self, dataset, monkeypatch):
+        _use_plan(monkeypatch, playbook="distribution", feature="glucose", bins=10)
+        request = dataset.model_copy(update={"results_mode": "page", "page_size": 4})
+
+        response = await query_routes.execute_query(request)
+        page = await query_routes.get_result_page(response.next_cursor, limit=100)
+
+        assert response.total_rows == 100
+        assert len(response.results) == 4
+        assert len(page.results) == page.total_rows - 4
+        assert page.next_cursor is None
+
+    async def test_unknown_cursor(self):
+        with pytest.raises(HTTPException) as exc_info:
+            await query_routes.get_result_page("missing:100", limit=10)
+
+        assert exc_info.value.status_code == 404
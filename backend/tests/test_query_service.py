@@ -0,0 +1,104 @@
+"""Tests for the analysis planner"""
+import pytest
+from app.services.query_service import QueryService, normalize_question
+from app.utils.cache import TTLCache
+
+
+SCHEMA = {
+    "tables": [
+        {
+            "name": "diabetes",
+            "columns": [
+                {"name": "Glucose", "type": "INTEGER", "nullable": False},
+                {"name": "Age", "type": "INTEGER", "nullable": False},
+                {"name": "Outcome", "type": "INTEGER", "nullable": False},
+            ],
+            "sample_rows": [],
+        }
+    ]
+}
+
+
+class StubLLM:
+    """Local stand-in for LLMClient that returns a fixed plan"""
+
+    def __init__(self, response=None):
+        self.response = response if response is not None else {
+            "intent": "drivers",
+            "playbook": "correlation",
+            "target": "Outcome",
+        }
+        self.calls = 0
+
+    async def generate_json(self, messages, temperature=0.3, timeout=None):
+        self.calls += 1
+        return self.response
+
+
+@pytest.fixture
+def service():
+    """QueryService whose LLM is a local stub"""
+    query_service = QueryService()
+    query_service.llm = StubLLM()
+    return query_service
+
+
+class TestPlanCache:
+    """Tests for planner result caching"""
+
+    async def test_repeated_question_skips_llm(self, service):
+        first = await service.select_analysis("Anything unusual about Outcome?", SCHEMA)
+        second = await service.select_analysis("  anything unusual about   outcome ", SCHEMA)
+
+        assert service.llm.calls == 1
+        assert first == second
+        assert first["playbook"] == "correlation"
+        assert service.plan_cache.stats()["hits"] == 1
+
+    async def test_cached_plan_is_not_shared(self, service):
+        first = await service.select_analysis("anything unusual about outcome", SCHEMA)
+        first["secondary_playbooks"].append("distribution")
+        second = await service.select_analysis("anything unusual about outcome", SCHEMA)
+
+        assert second["secondary_playbooks"] == []
+
+    async def test_schema_change_misses(self, service):
+        await service.select_analysis("anything unusual about outcome", SCHEMA)
+        changed = {"tables": [{**SCHEMA["tables"][0], "columns": SCHEMA["tables"][0]["columns"][:2]}]}
+        await service.select_analysis("anything unusual about outcome", changed)
+
+        assert service.llm.calls == 2
+
+    async def test_fallback_plans_are_not_cached(self, service):
+        service.llm.response = ["not", "a", "dict"]
+        await service.select_analysis("anything unusual about outcome", SCHEMA)
+        await service.select_analysis("anything unusual about outcome", SCHEMA)
+
+        assert service.llm.calls == 2
+
+    def test_normalize_question(self):
+        assert normalize_question("  Give me an   OVERVIEW?? ") == "give me an overview"
+
+
+class TestTTLCache:
+    """Tests for the TTL + LRU cache"""
+
+    def test_expiry(self):
+        now = [0.0]
+        cache = TTLCache(max_entries=10, ttl_seconds=5, clock=lambda: now[0])
+        cache.set("a", 1)
+        now[0] = 4
+        assert cache.get("a") == 1
+        now[0] = 6
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert list(cache.entries) == ["a", "c"]
+        assert cache.stats()["evictions"] == 1
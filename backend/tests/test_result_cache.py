@@ -0,0 +1,75 @@
+"""Tests for the query result cache"""
+from app.services.result_cache import result_cache_key
+from app.utils.cache import SizedLRUCache, approximate_size
+
+
+class TestSizedLRUCache:
+    """Tests for the byte-bounded LRU cache"""
+
+    def test_evicts_least_recently_used_within_budget(self):
+        cache = SizedLRUCache(max_bytes=250, sizeof=lambda value: 100)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["bytes"] == 200
+        assert cache.stats()["evictions"] == 1
+
+    def test_oversized_values_are_not_stored(self):
+        cache = SizedLRUCache(max_bytes=50, sizeof=lambda value: 100)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+        assert cache.stats()["rejected"] == 1
+
+    def test_replacing_a_key_updates_size(self):
+        cache = SizedLRUCache(max_bytes=1000, sizeof=len)
+        cache.set("a", "x" * 100)
+        cache.set("a", "x" * 10)
+
+        assert cache.stats()["bytes"] == 10
+
+    def test_invalidate_by_key(self):
+        cache = SizedLRUCache(max_bytes=1000, sizeof=lambda value: 1)
+        cache.set(("u1", "ds", 1), "one")
+        cache.set(("u1", "other", 1), "two")
+
+        assert cache.invalidate(lambda key: key[1] == "ds") == 1
+        assert cache.get(("u1", "ds", 1)) is None
+        assert cache.get(("u1", "other", 1)) == "two"
+        assert cache.stats()["bytes"] == 1
+
+    def test_approximate_size_scales_with_rows(self):
+        rows = [{"age": i, "name": f"n{i}"} for i in range(10_000)]
+
+        small = approximate_size(rows[:100])
+        large = approximate_size(rows)
+
+        assert 50 < large / small < 200
+
+
+class TestResultCacheKey:
+    """Equivalent plans share a key; anything that changes the output doesn't"""
+
+    def test_normalizes_slots(self):
+        first = result_cache_key("u", "d", (1, 2, 3), "distribution", {"feature": "age", "bins": None}, [])
+        second = result_cache_key("u", "d", (1, 2, 3), "distribution", {"intent": "x", "feature": "age"}, [])
+
+        assert first == second
+
+    def test_version_and_filters_change_key(self):
+        plan = {"feature": "age"}
+        base = result_cache_key("u", "d", (1, 2, 3), "distribution", plan, [])
+
+        assert base != result_cache_key("u", "d", (2, 2, 3), "distribution", plan, [])
+        assert base != result_cache_key(
+            "u", "d", (1, 2, 3), "distribution", {**plan, "filter_segment": {"column": "sex", "value": "F"}}, []
+        )
+        assert base != result_cache_key("u", "d", (1, 2, 3), "distribution", plan, ["correlation"])
+        assert base != result_cache_key(
+            "u", "d", (1, 2, 3), "distribution", plan, [], include_correlation_matrix=True
+        )
@@ -0,0 +1,131 @@
+"""Tests for SQL-compiled aggregate playbooks"""
+import sqlite3
+import pytest
+import pandas as pd
+import numpy as np
+from app.services import playbooks
+from app.services.sql_playbooks import SQLPlaybookRunner, build_where_clause
+
+
+def _make_runner(df: pd.DataFrame, filter_segment=None, focus_range=None):
+    """Load a DataFrame into an in-memory SQLite table and build a runner over it"""
+    conn = sqlite3.connect(":memory:")
+    df.to_sql("data", conn, index=False)
+    columns = [
+        {"name": row[1], "type": row[2], "nullable": not row[3]}
+        for row in conn.execute("PRAGMA table_info(data)")
+    ]
+
+    async def fetch(sql, params):
+        cursor = conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    return SQLPlaybookRunner(fetch, "data", columns, filter_segment, focus_range)
+
+
+@pytest.fixture
+def segmented_dataframe(sample_dataframe):
+    """Sample data with a text segment column and some missing values"""
+    df = sample_dataframe.copy()
+    df["group"] = np.where(df["outcome"] == 1, "positive", "negative")
+    df.loc[::7, "glucose"] = np.nan
+    return df
+
+
+def _strip(play):
+    """Drop the SQL-only keys so results can be compared with the pandas playbooks"""
+    return {k: v for k, v in play.items() if k not in ("sql", "rows")}
+
+
+class TestSQLPlaybooks:
+    """SQL playbooks should match their pandas counterparts"""
+
+    async def test_distribution_matches_pandas(self, segmented_dataframe):
+        runner = _make_runner(segmented_dataframe)
+        result = await runner.distribution(feature="glucose", bins=10)
+        expected = playbooks.distribution_playbook(segmented_dataframe, feature="glucose", bins=10)
+
+        assert _strip(result) == expected
+        assert len(result["rows"]) <= 10
+
+    async def test_distribution_constant_column(self):
+        df = pd.DataFrame({"value": [3.0] * 10})
+        result = await _make_runner(df).distribution(feature="value", bins=5)
+        expected = playbooks.distribution_playbook(df, feature="value", bins=5)
+
+        assert _strip(result) == expected
+
+    async def test_distribution_auto_feature(self, sample_dataframe):
+        result = await _make_runner(sample_dataframe).distribution(feature=None, bins=5)
+        expected = playbooks.distribution_playbook(sample_dataframe, feature=None, bins=5)
+
+        assert result["analysis_context"]["feature"] == expected["analysis_context"]["feature"]
+
+    async def test_distribution_no_numeric(self):
+        df = pd.DataFrame({"text": ["a", "b", "c"]})
+        result = await _make_runner(df).distribution()
+
+        assert result["analysis_context"]["reason"] == "no_numeric_columns"
+
+    async def test_outcome_breakdown_matches_pandas(self, sample_dataframe):
+        result = await _make_runner(sample_dataframe).outcome_breakdown(outcome="outcome")
+        expected = playbooks.outcome_breakdown_playbook(sample_dataframe, outcome="outcome")
+
+        assert _strip(result) == expected
+
+    async def test_segment_comparison_matches_pandas(self, segmented_dataframe):
+        runner = _make_runner(segmented_dataframe)
+        result = await runner.segment_comparison(segment_column="group", outcome="glucose")
+        expected = playbooks.segment_comparison_playbook(
+            segmented_dataframe, segment_column="group", outcome="glucose"
+        )
+
+        assert result["analysis_context"]["segments"] == expected["analysis_context"]["segments"]
+        assert result["analysis_context"]["values"] == expected["analysis_context"]["values"]
+
+    async def test_segment_comparison_infers_segment(self, segmented_dataframe):
+        result = await _make_runner(segmented_dataframe).segment_comparison()
+        expected = playbooks.segment_comparison_playbook(segmented_dataframe)
+
+        assert result["analysis_context"]["segment_column"] == expected["analysis_context"]["segment_column"]
+
+    async def test_segmented_distribution_matches_pandas(self, segmented_dataframe):
+        runner = _make_runner(segmented_dataframe)
+        result = await runner.segmented_distribution(feature="glucose", segment_column="group")
+        expected = playbooks.segmented_distribution_playbook(
+            segmented_dataframe, feature="glucose", segment_column="group"
+        )
+
+        assert _strip(result) == expected
+
+    async def test_filters_become_where_clauses(self, segmented_dataframe):
+        runner = _make_runner(
+            segmented_dataframe,
+            filter_segment={"column": "group", "value": "positive"},
+            focus_range={"feature": "age", "min": 30, "max": 60},
+        )
+        result = await runner.distribution(feature="bmi", bins=5)
+
+        filtered = segmented_dataframe[
+            (segmented_dataframe["group"] == "positive")
+            & segmented_dataframe["age"].between(30, 60)
+        ]
+        expected = playbooks.distribution_playbook(filtered, feature="bmi", bins=5)
+
+        assert _strip(result) == expected
+
+    def test_where_clause_ignores_unknown_columns(self):
+        columns = [{"name": "age", "type": "INTEGER"}]
+        predicates, params = build_where_clause(
+            columns,
+            filter_segment={"column": "missing", "value": 1},
+            focus_range={"feature": "age", "min": 1, "max": 2},
+        )
+
+        assert len(predicates) == 1
+        assert params == {"focus_min": 1, "focus_max": 2}
+
+    async def test_unknown_playbook_raises(self, sample_dataframe):
+        with pytest.raises(ValueError):
+            await _make_runner(sample_dataframe).run("correlation")
@@ -0,0 +1,20 @@
+"""Tests for the declared SQLite type helpers"""
+import pytest
+from app.utils.sqlite_types import is_integer_type, is_numeric_type
+
+
+class TestIsNumericType:
+    """Every component classifies declared types the same way"""
+
+    @pytest.mark.parametrize("declared_type", ["INTEGER", "BIGINT", "REAL", "DOUBLE", "NUMERIC", "DECIMAL(10,2)", "BOOLEAN"])
+    def test_numeric(self, declared_type):
+        assert is_numeric_type(declared_type)
+
+    @pytest.mark.parametrize("declared_type", ["TEXT", "VARCHAR(20)", "BLOB", "DATE", "DATETIME", "", None])
+    def test_not_numeric(self, declared_type):
+        assert not is_numeric_type(declared_type)
+
+    def test_integer_affinity(self):
+        assert is_integer_type("bigint")
+        assert not is_integer_type("REAL")
+        assert not is_integer_type(None)
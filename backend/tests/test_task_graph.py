@@ -0,0 +1,99 @@
+"""Tests for the async task graph"""
+import asyncio
+import pytest
+from app.utils.task_graph import TaskGraph
+
+
+class TestTaskGraph:
+    """Tests for dependency ordering and cancellation"""
+
+    async def test_dependencies_receive_results(self):
+        graph = TaskGraph()
+
+        async def schema():
+            return {"tables": ["data"]}
+
+        async def plan(schema):
+            return f"plan for {schema['tables'][0]}"
+
+        async def combine(schema, plan):
+            return (schema["tables"], plan)
+
+        graph.add("schema", schema)
+        graph.add("plan", plan, deps=["schema"])
+        graph.add("combine", combine, deps=["schema", "plan"])
+
+        assert await graph.get("combine") == (["data"], "plan for data")
+        await graph.aclose()
+
+    async def test_independent_steps_overlap(self):
+        graph = TaskGraph()
+        started = []
+        release = asyncio.Event()
+
+        async def step(name):
+            started.append(name)
+            await release.wait()
+            return name
+
+        graph.add("a", lambda: step("a"))
+        graph.add("b", lambda: step("b"))
+        await asyncio.sleep(0)
+
+        assert sorted(started) == ["a", "b"]
+        release.set()
+        assert await graph.get("a") == "a"
+        assert await graph.get("b") == "b"
+
+    async def test_cancel_unneeded_step(self):
+        graph = TaskGraph()
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        graph.add("slow", slow)
+        await asyncio.sleep(0)
+
+        assert graph.cancel("slow") is True
+        with pytest.raises(asyncio.CancelledError):
+            await graph.get("slow")
+        assert graph.cancel("slow") is False
+        assert graph.cancel("missing") is False
+
+    async def test_errors_propagate_to_dependents(self):
+        graph = TaskGraph()
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        async def dependent(broken):
+            return broken
+
+        graph.add("broken", broken)
+        graph.add("dependent", dependent, deps=["broken"])
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await graph.get("dependent")
+        await graph.aclose()
+
+    async def test_aclose_cancels_pending(self):
+        graph = TaskGraph()
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        task = graph.add("slow", slow)
+        await graph.aclose()
+
+        assert task.cancelled()
+
+    async def test_duplicate_step_rejected(self):
+        graph = TaskGraph()
+
+        async def step():
+            return 1
+
+        graph.add("step", step)
+        with pytest.raises(ValueError):
+            graph.add("step", step)
+        await graph.aclose()
@@ -4,6 +4,7 @@ export interface QueryRequest {
   user_id: string;
   dataset_id: string;
   query: string;
+  include_correlation_matrix?: boolean;
 }
 
 export interface AuthResponse {
@@ -15,8 +16,10 @@ export interface AuthResponse {
 }
 
 export interface QueryResponse {
-  sql: string;
+  sql: string | null;
   results: Record<string, unknown>[];
+  total_rows?: number;
+  next_cursor?: string | null;
   visualization: VisualizationConfig;
   extra_visualizations?: VisualizationConfig[];
   analysis: TextualAnalysis;